@@ -1,14 +1,43 @@
+import time
+
+# Время запуска отсчитывается до импорта aiogram и модулей бота
+BOOT_STARTED = time.monotonic()
+
 import asyncio
 import logging
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 import os
+import signal
 import sys
 from config import config
 from handlers import routers
+from middlewares import (
+    BootTimingMiddleware,
+    EventIsolationMiddleware,
+    InFlightMiddleware,
+    UserContextMiddleware,
+    UserMiddleware,
+    RegistrationGateMiddleware
+)
+from storage import create_storage, create_events_isolation
 from database import db
+from services.boot import boot_timer
+from services.http import close_session
+from services.metrics import metrics
+from services.outbound import OutboundSession
+from services import wiki, lookup_scheduler
+from services.prefetch import link_prefetcher
+from services.searches import search_registry
+from services.shutdown import in_flight, cancel_tasks
+from services.warmer import cache_warmer
+from services.broadcast import broadcaster
+from services.registered import registered_users
 
 # Настройка логирования
 logging.basicConfig(
@@ -17,56 +46,237 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+boot_timer.start(BOOT_STARTED)
+boot_timer.mark("импорт модулей")
+
+# Ссылки на фоновые задачи, чтобы их не собрал сборщик мусора
+background_tasks = set()
+
+
+def run_in_background(coro) -> asyncio.Task:
+    """Запустить корутину фоновой задачей"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
 
-async def on_startup(bot: Bot):
+async def on_startup(bot: Bot, dispatcher: Dispatcher):
     """Действия при запуске бота"""
-    logger.info("Инициализация базы данных...")
-    await db.init_db()
-    logger.info("База данных инициализирована")
+    boot_timer.mark("подключение к Telegram")
+    if config.DB_MIGRATE:
+        logger.info("Инициализация базы данных...")
+        await db.init_db()
+        logger.info("База данных инициализирована")
+        boot_timer.mark("инициализация БД")
 
-    # Получаем статистику для логов
-    stats = await db.get_bot_stats()
-    logger.info(f"Загружено пользователей: {stats.total_users}")
-    logger.info(f"Всего поисков: {stats.total_searches}")
+    # Для логов хватает оценки: полный подсчет (get_bot_stats) задержал бы первое обновление
+    users, searches = await db.estimate_totals()
+    logger.info(f"Пользователей: ~{users}, поисков: ~{searches}")
+
+    # Индексы заголовков (опечатки, подсказки) строятся в фоне, чтобы не задерживать запуск
+    run_in_background(wiki.load_title_corpus())
+
+    # Множество зарегистрированных пользователей (пока грузится, проверка идет через БД)
+    run_in_background(registered_users.load())
+
+    # Отмена поисков, выполняющихся в других процессах бота
+    if config.FSM_STORAGE == "redis":
+        await search_registry.connect(dispatcher.storage.redis)
+
+    # Фоновый прогрев кэша популярных статей
+    if config.CACHE_WARMER_ENABLED:
+        cache_warmer.start()
+        logger.info("Прогрев кэша запущен")
+
+    # Рассылки, прерванные перезапуском
+    if config.BROADCAST_RESUME:
+        await broadcaster.resume(bot)
+    boot_timer.mark("запуск служб")
 
 
 async def on_shutdown(bot: Bot):
-    """Действия при выключении бота"""
+    """Действия при выключении бота (прием обновлений к этому моменту остановлен)"""
     logger.info("Бот выключается...")
-    # Закрываем соединения
-    logger.info("Соединения закрыты")
+    started = time.monotonic()
 
+    # Дорабатываем принятые обновления, но не дольше SHUTDOWN_TIMEOUT
+    drained, dropped = await in_flight.drain(config.SHUTDOWN_TIMEOUT)
+    metrics.inc("shutdown_drained", drained)
+    metrics.inc("shutdown_dropped", dropped)
 
-async def main():
-    """Основная функция запуска бота"""
+    # Фоновые задачи; рассылки сохранили курсор и продолжатся после запуска
+    await search_registry.disconnect()
+    await cache_warmer.stop()
+    await broadcaster.stop()
+    cancelled = await cancel_tasks(background_tasks)
+    cancelled += await link_prefetcher.stop()
 
-    # Проверка токена
-    if not config.BOT_TOKEN:
-        logger.error("Не указан BOT_TOKEN в конфигурации!")
-        return
+    # Пулы потоков и соединений
+    lookup_scheduler.shutdown()
+    cancelled += await wiki.close()
+    await close_session()
+
+    # Журнал WAL переносим в основной файл, чтобы не восстанавливать его при запуске
+    checkpointed = await db.checkpoint()
+
+    logger.info(
+        f"Выключение за {time.monotonic() - started:.1f} с: обновлений обработано {drained}, "
+        f"прервано {dropped}; фоновых задач отменено {cancelled}; "
+        f"WAL {'перенесен' if checkpointed else 'не перенесен (БД занята)'}"
+    )
 
-    # Инициализация бота
-    bot = Bot(
+
+async def set_webhook(bot: Bot, dispatcher: Dispatcher):
+    """Регистрация вебхука в Telegram при запуске в режиме webhook"""
+    await bot.set_webhook(
+        url=config.WEBHOOK_URL + config.WEBHOOK_PATH,
+        secret_token=config.WEBHOOK_SECRET or None,
+        allowed_updates=dispatcher.resolve_used_update_types()
+    )
+    logger.info(f"Вебхук установлен: {config.WEBHOOK_URL}{config.WEBHOOK_PATH}")
+
+
+def create_bot(**kwargs) -> Bot:
+    """Создание бота"""
+    if "session" not in kwargs:
+        api = TelegramAPIServer.from_base(config.BOT_API_URL) if config.BOT_API_URL else PRODUCTION
+        if config.OUTBOUND_SCHEDULER_ENABLED:
+            kwargs["session"] = OutboundSession(
+                api=api,
+                # Лимит Telegram общий для бота: процессы-обработчики делят его поровну
+                global_rate=config.OUTBOUND_GLOBAL_RATE / max(config.WORKERS, 1),
+                chat_rate=config.OUTBOUND_CHAT_RATE,
+                chat_burst=config.OUTBOUND_CHAT_BURST,
+                group_rate=config.OUTBOUND_GROUP_RATE,
+                max_retries=config.OUTBOUND_MAX_RETRIES
+            )
+        else:
+            kwargs["session"] = AiohttpSession(api=api)
+    return Bot(
         token=config.BOT_TOKEN,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+        **kwargs
     )
 
-    # Инициализация диспетчера
-    storage = MemoryStorage()
+
+def create_dispatcher() -> Dispatcher:
+    """Создание диспетчера с обработчиками"""
+    storage = create_storage()
     dp = Dispatcher(storage=storage)
 
     # Регистрируем обработчики запуска и выключения
     dp.startup.register(on_startup)
     dp.shutdown.register(on_shutdown)
+    # Обработчики дорабатывают раньше, чем aiogram закроет хранилище FSM
+    dp.shutdown.handlers.insert(0, dp.shutdown.handlers.pop())
+
+    # Обработку принятых обновлений дожидаемся при выключении
+    dp.update.outer_middleware(InFlightMiddleware())
+    # События пользователя — по одному на все процессы (кроме отмены поиска)
+    events_isolation = create_events_isolation(storage)
+    if events_isolation is not None:
+        dp.update.outer_middleware(EventIsolationMiddleware(events_isolation))
+    # Время от запуска до первого обновления
+    dp.update.outer_middleware(BootTimingMiddleware())
+    # Профиль пользователя загружается один раз на обновление
+    # и только для обработчиков с аргументом user
+    dp.update.outer_middleware(UserContextMiddleware())
+    # Затем проверка регистрации для обработчиков с флагом registration_required
+    user_middleware = UserMiddleware()
+    registration_gate = RegistrationGateMiddleware()
+    for observer in (dp.message, dp.callback_query):
+        observer.middleware(user_middleware)
+        observer.middleware(registration_gate)
 
     # Подключение роутеров
     for router in routers:
         dp.include_router(router)
 
+    boot_timer.mark("бот и диспетчер")
+    return dp
+
+
+def create_webhook_app(bot: Bot, dp: Dispatcher) -> web.Application:
+    """
+    aiohttp-приложение для режима webhook
+
+    Telegram сразу получает ответ 200, а обновление обрабатывается в фоне.
+    """
+    app = web.Application()
+
+    # Запуск и остановка диспетчера вместе с приложением; остановка — раньше,
+    # чем обработчик запросов закроет сессию бота
+    setup_application(app, dp, bot=bot)
+
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=config.WEBHOOK_SECRET or None,
+        handle_in_background=True
+    ).register(app, path=config.WEBHOOK_PATH)
+
+    async def health(request: web.Request) -> web.Response:
+        return web.Response(text="ok")
+
+    app.router.add_get("/health", health)
+    return app
+
+
+async def run_polling(bot: Bot, dp: Dispatcher):
+    """Запуск в режиме long polling"""
+    logger.info("Запуск бота (polling)...")
+    await bot.delete_webhook()
+    await dp.start_polling(bot)
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    """Запуск в режиме webhook"""
+    if not config.WEBHOOK_URL:
+        logger.error("Не указан WEBHOOK_URL для режима webhook!")
+        return
+
+    dp.startup.register(set_webhook)
+    runner = web.AppRunner(create_webhook_app(bot, dp))
+    await runner.setup()
+
+    site = web.TCPSite(runner, host=config.WEBAPP_HOST, port=config.WEBAPP_PORT)
+    await site.start()
+    logger.info(f"Запуск бота (webhook) на {config.WEBAPP_HOST}:{config.WEBAPP_PORT}...")
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopped.set)
+
+    try:
+        await stopped.wait()
+    finally:
+        # Перестаем принимать запросы и останавливаем диспетчер
+        await runner.cleanup()
+
+
+async def main():
+    """Основная функция запуска бота"""
+
+    # Проверка токена
+    if not config.BOT_TOKEN:
+        logger.error("Не указан BOT_TOKEN в конфигурации!")
+        return
+
+    # Инициализация бота и диспетчера
+    bot = create_bot()
+    dp = create_dispatcher()
+
     try:
-        # Запускаем long polling (лучше для Railway)
-        logger.info("Запуск бота...")
-        await dp.start_polling(bot)
+        if config.WORKERS > 1:
+            from supervisor import run_supervisor
+            await run_supervisor(bot, dp)
+        elif config.BOT_MODE == "webhook":
+            await run_webhook(bot, dp)
+        else:
+            # Long polling (лучше для Railway без публичного адреса)
+            await run_polling(bot, dp)
     except Exception as e:
         logger.error(f"Ошибка при запуске бота: {e}")
     finally:
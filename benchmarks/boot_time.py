@@ -0,0 +1,133 @@
+"""
+Бенчмарк запуска: время от старта процесса до ответа на первое обновление
+
+Заполняет временную БД пользователями и историей поиска, кладет в
+имитацию Bot API обновление /help (как накопившееся за время
+перезапуска) и запускает бота (app.py). Время — от запуска процесса
+до получения имитацией ответа; разбивка по этапам берется из лога бота.
+Для сравнения отдельно измеряется полный подсчет статистики
+(get_bot_stats), который раньше выполнялся при каждом запуске.
+
+Запуск:
+    python -m benchmarks.boot_time [--runs 5] [--users 100000] [--searches 1000000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import sqlite3
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+from benchmarks.webhook_latency import TOKEN, FakeTelegram, make_update
+
+TERMS = [f"термин {i}" for i in range(5000)]
+
+
+def fill_database(path: str, users: int, searches: int) -> None:
+    rng = random.Random(42)
+    connection = sqlite3.connect(path)
+    connection.executemany(
+        "INSERT INTO users (telegram_id, first_name, is_registered) VALUES (?, 'Bench', TRUE)",
+        ((1_000_000 + i,) for i in range(users))
+    )
+    connection.executemany(
+        "INSERT INTO search_history (user_id, search_term, result_title, success) VALUES (?, ?, ?, ?)",
+        (
+            (rng.randint(1, users), term, term, rng.random() < 0.9)
+            for term in (rng.choice(TERMS) for _ in range(searches))
+        )
+    )
+    connection.commit()
+    connection.close()
+
+
+async def measure(fake: FakeTelegram, database_url: str, update_id: int, api_port: int) -> tuple:
+    """Время до ответа на первое обновление и строка с разбивкой из лога бота"""
+    update = make_update(update_id)
+    reply = fake.wait_reply(update["message"]["chat"]["id"])
+    fake.push(update)
+
+    env = dict(
+        os.environ,
+        BOT_TOKEN=TOKEN,
+        BOT_MODE="polling",
+        BOT_API_URL=f"http://127.0.0.1:{api_port}",
+        DATABASE_URL=database_url,
+        CACHE_WARMER_ENABLED="False",
+    )
+    log = tempfile.TemporaryFile()
+    started = time.perf_counter()
+    bot = await asyncio.create_subprocess_exec(
+        sys.executable, "app.py", env=env,
+        stdout=asyncio.subprocess.DEVNULL, stderr=log
+    )
+
+    try:
+        elapsed = await asyncio.wait_for(reply, timeout=120) - started
+        # Разбивка пишется сразу после ответа
+        await asyncio.sleep(0.5)
+    finally:
+        bot.send_signal(signal.SIGTERM)
+        await bot.wait()
+
+    log.seek(0)
+    breakdown = next(
+        (line.split(" - ")[-1] for line in log.read().decode().splitlines() if "Первое обновление" in line),
+        "разбивка не найдена"
+    )
+    log.close()
+    return elapsed, breakdown
+
+
+async def run(runs: int, users: int, searches: int, api_port: int) -> None:
+    from database import db
+
+    db.db_path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    await db.init_db()
+    fill_database(db.db_path, users, searches)
+
+    started = time.perf_counter()
+    await db.get_bot_stats()
+    full_stats = time.perf_counter() - started
+    started = time.perf_counter()
+    await db.estimate_totals()
+    estimate = time.perf_counter() - started
+
+    fake = FakeTelegram()
+    api = web.Application()
+    api.router.add_post("/bot{token}/{method}", fake.handle)
+    runner = web.AppRunner(api)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", api_port).start()
+
+    results = []
+    for i in range(runs):
+        results.append(await measure(fake, "sqlite:///" + db.db_path, i + 1, api_port))
+    await runner.cleanup()
+
+    timings = sorted(elapsed for elapsed, _ in results)
+    median = timings[len(timings) // 2]
+    print(f"Пользователей: {users}, поисков: {searches}")
+    print(f"Полный подсчет статистики: {full_stats * 1000:.0f} мс, оценка по id: {estimate * 1000:.1f} мс")
+    print(f"До ответа на первое обновление: медиана {median:.2f} с, минимум {timings[0]:.2f} с (запусков: {runs})")
+    print("Разбивка (медианный запуск):", next(line for elapsed, line in results if elapsed == median))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--searches", type=int, default=1_000_000)
+    parser.add_argument("--api-port", type=int, default=8184)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.runs, args.users, args.searches, args.api_port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Бенчмарк индекса опечаток: построение, память и время поиска
+
+Запуск:
+    python -m benchmarks.fuzzy_matcher [--titles 1000000] [--distance 1] [--candidates 200]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from services.fuzzy import FuzzyMatcher
+
+ALPHABET = "абвгдеёжзийклмнопрстуфхцчшщъыьэюя"
+
+
+def random_title(rng: random.Random) -> str:
+    words = rng.randint(1, 3)
+    return " ".join(
+        "".join(rng.choice(ALPHABET) for _ in range(rng.randint(3, 10))).capitalize()
+        for _ in range(words)
+    )
+
+
+def make_typo(rng: random.Random, title: str) -> str:
+    position = rng.randrange(len(title))
+    operation = rng.choice(("delete", "insert", "replace", "swap"))
+    if operation == "delete":
+        return title[:position] + title[position + 1:]
+    if operation == "insert":
+        return title[:position] + rng.choice(ALPHABET) + title[position:]
+    if operation == "swap" and position < len(title) - 1:
+        return title[:position] + title[position + 1] + title[position] + title[position + 2:]
+    return title[:position] + rng.choice(ALPHABET) + title[position + 1:]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк индекса опечаток")
+    parser.add_argument("--titles", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--distance", type=int, default=1)
+    parser.add_argument("--prefix", type=int, default=7)
+    parser.add_argument("--candidates", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    titles = [random_title(rng) for _ in range(args.titles)]
+
+    # Как в боте: популярные заголовки первыми
+    weighted = sorted(((title, rng.randint(1, 100)) for title in titles), key=lambda item: -item[1])
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    matcher = FuzzyMatcher(max_distance=args.distance, prefix_length=args.prefix,
+                           max_candidates=args.candidates)
+    matcher.build(weighted)
+    build_time = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    queries = [make_typo(rng, rng.choice(titles)) for _ in range(args.queries)]
+    timings = []
+    found = 0
+    for query in queries:
+        started = time.perf_counter()
+        if matcher.lookup(query, limit=1):
+            found += 1
+        timings.append(time.perf_counter() - started)
+
+    # Как в боте: допустимое число опечаток зависит от длины термина
+    best_timings = []
+    for query in queries:
+        started = time.perf_counter()
+        matcher.best(query)
+        best_timings.append(time.perf_counter() - started)
+
+    print(f"Заголовков: {len(matcher)}, расстояние: {args.distance}, префикс: {args.prefix}, "
+          f"кандидатов на ключ: {args.candidates}")
+    print(f"Построение: {build_time:.1f} с")
+    print(f"Память индекса: {matcher.memory_usage() / 2 ** 20:.1f} МБ "
+          f"(tracemalloc: {current / 2 ** 20:.1f} МБ, пик {peak / 2 ** 20:.1f} МБ)")
+    print(f"Поиск (lookup, расстояние {args.distance} для любой длины): p50 {percentile(timings, 0.5) * 1e6:.0f} мкс, "
+          f"p99 {percentile(timings, 0.99) * 1e6:.0f} мкс")
+    print(f"Поиск (best, как в боте): p50 {percentile(best_timings, 0.5) * 1e6:.0f} мкс, "
+          f"p99 {percentile(best_timings, 0.99) * 1e6:.0f} мкс")
+    print(f"Найдено кандидатов: {found / len(queries) * 100:.1f}% запросов с опечаткой")
+
+
+if __name__ == "__main__":
+    main()
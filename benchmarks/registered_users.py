@@ -0,0 +1,83 @@
+"""
+Бенчмарк множества зарегистрированных пользователей: загрузка, память, поиск
+
+Заполняет временную БД случайными telegram_id и сравнивает
+RegisteredUsers с обычным set по памяти и времени проверки.
+
+Запуск:
+    python -m benchmarks.registered_users [--users 1000000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+
+def fill_database(path: str, users: int, rng: random.Random) -> list:
+    ids = rng.sample(range(1, 2 ** 52), users)
+    connection = sqlite3.connect(path)
+    connection.executemany(
+        "INSERT INTO users (telegram_id, first_name, is_registered) VALUES (?, 'Bench', TRUE)",
+        ((telegram_id,) for telegram_id in ids)
+    )
+    connection.commit()
+    connection.close()
+    return ids
+
+
+def measure_lookups(contains, queries: list) -> float:
+    started = time.perf_counter()
+    for telegram_id in queries:
+        contains(telegram_id)
+    return (time.perf_counter() - started) / len(queries)
+
+
+async def run(users: int, queries: int) -> None:
+    from database import db
+    from services.registered import RegisteredUsers
+
+    db.db_path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    await db.init_db()
+
+    rng = random.Random(42)
+    ids = fill_database(db.db_path, users, rng)
+
+    registered = RegisteredUsers()
+    tracemalloc.start()
+    started = time.perf_counter()
+    await registered.load()
+    load_time = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    plain = set(ids)
+    plain_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # Половина запросов — зарегистрированные, половина — случайные
+    lookups = rng.sample(ids, queries // 2) + [rng.randrange(1, 2 ** 52) for _ in range(queries // 2)]
+    rng.shuffle(lookups)
+
+    print(f"Пользователей: {len(registered)}")
+    print(f"Загрузка: {load_time:.2f} с (пик tracemalloc {peak / 2 ** 20:.1f} МБ)")
+    print(f"Память: массив {registered.memory_bytes() / 2 ** 20:.1f} МБ "
+          f"(tracemalloc {current / 2 ** 20:.1f} МБ), set {plain_memory / 2 ** 20:.1f} МБ")
+    print(f"Проверка: массив {measure_lookups(registered.contains, lookups) * 1e9:.0f} нс, "
+          f"set {measure_lookups(plain.__contains__, lookups) * 1e9:.0f} нс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк множества зарегистрированных пользователей")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Бенчмарк задержки обработки обновлений: polling против webhook
+
+Поднимает локальную имитацию Bot API и отправляет боту синтетические
+обновления (/help). Задержка — от отправки обновления до получения
+имитацией ответа бота (sendMessage). Для вебхука отдельно измеряется
+время до ответа 200. Реальный Telegram и токен не нужны.
+
+Запуск:
+    python -m benchmarks.webhook_latency [--mode both] [--updates 200] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import suppress
+
+import aiohttp
+from aiohttp import web
+
+TOKEN = "123456:BENCHMARK"
+
+
+class FakeTelegram:
+    """Имитация Bot API: отвечает на методы бота и отмечает время его ответов"""
+
+    def __init__(self):
+        self.pending = []
+        self.replies = {}
+        self._new_updates = asyncio.Event()
+        self._message_id = 0
+
+    def push(self, update: dict) -> None:
+        """Добавить обновление в очередь getUpdates"""
+        self.pending.append(update)
+        self._new_updates.set()
+
+    def wait_reply(self, chat_id: int) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.replies[chat_id] = future
+        return future
+
+    async def _get_updates(self, data) -> list:
+        offset = int(data.get("offset", 0))
+        self.pending = [update for update in self.pending if update["update_id"] >= offset]
+
+        if not self.pending:
+            self._new_updates.clear()
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._new_updates.wait(), timeout=float(data.get("timeout", 0)))
+        return self.pending[:100]
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        data = await request.post()
+
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        elif method == "getUpdates":
+            result = await self._get_updates(data)
+        elif method == "sendMessage":
+            chat_id = int(data["chat_id"])
+            future = self.replies.pop(chat_id, None)
+            if future is not None and not future.done():
+                future.set_result(time.perf_counter())
+            self._message_id += 1
+            result = {
+                "message_id": self._message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": data.get("text", ""),
+            }
+        else:
+            result = True
+
+        return web.json_response({"ok": True, "result": result})
+
+
+def make_update(update_id: int) -> dict:
+    user_id = 100000 + update_id
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Bench"},
+            "text": "/help",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 5}],
+        },
+    }
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def report(name: str, values: list) -> None:
+    print(
+        f"{name:<22} p50 {percentile(values, 0.5) * 1000:7.2f} мс   "
+        f"p95 {percentile(values, 0.95) * 1000:7.2f} мс   "
+        f"p99 {percentile(values, 0.99) * 1000:7.2f} мс"
+    )
+
+
+async def run(mode: str, updates: int, concurrency: int, api_port: int, webhook_port: int) -> None:
+    # Настройки — до импорта приложения
+    os.environ["BOT_TOKEN"] = TOKEN
+    from config import config
+    config.BOT_TOKEN = TOKEN
+    config.CACHE_WARMER_ENABLED = False
+
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+
+    import app as bot_app
+    from database import db
+
+    db.db_path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+
+    fake = FakeTelegram()
+    api = web.Application()
+    api.router.add_post("/bot{token}/{method}", fake.handle)
+    api_runner = web.AppRunner(api)
+    await api_runner.setup()
+    await web.TCPSite(api_runner, "127.0.0.1", api_port).start()
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(f"http://127.0.0.1:{api_port}"))
+    bot = bot_app.create_bot(session=session)
+    dp = bot_app.create_dispatcher()
+
+    webhook_runner = None
+    polling = None
+    client = aiohttp.ClientSession()
+    acks = []
+
+    if mode == "webhook":
+        webhook_runner = web.AppRunner(bot_app.create_webhook_app(bot, dp))
+        await webhook_runner.setup()
+        await web.TCPSite(webhook_runner, "127.0.0.1", webhook_port).start()
+        url = f"http://127.0.0.1:{webhook_port}{config.WEBHOOK_PATH}"
+        headers = {"X-Telegram-Bot-Api-Secret-Token": config.WEBHOOK_SECRET} if config.WEBHOOK_SECRET else {}
+
+        async def deliver(update: dict) -> None:
+            started = time.perf_counter()
+            async with client.post(url, json=update, headers=headers) as response:
+                await response.read()
+            acks.append(time.perf_counter() - started)
+    else:
+        polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False, polling_timeout=10))
+
+        async def deliver(update: dict) -> None:
+            fake.push(update)
+
+    # Прогрев: старт диспетчера, БД, первое соединение
+    await asyncio.sleep(0.5)
+    reply = fake.wait_reply(make_update(0)["message"]["chat"]["id"])
+    await deliver(make_update(0))
+    await asyncio.wait_for(reply, timeout=30)
+    acks.clear()
+
+    latencies = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(update_id: int) -> None:
+        async with slots:
+            update = make_update(update_id)
+            reply = fake.wait_reply(update["message"]["chat"]["id"])
+            started = time.perf_counter()
+            await deliver(update)
+            latencies.append(await asyncio.wait_for(reply, timeout=30) - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(1, updates + 1)))
+    elapsed = time.perf_counter() - started
+
+    print(f"Режим {mode}: {updates} обновлений, параллельно {concurrency}, "
+          f"{updates / elapsed:.0f} обновлений/с")
+    report("  ответ бота", latencies)
+    if acks:
+        report("  ответ 200 на вебхук", acks)
+
+    await client.close()
+    if polling is not None:
+        await dp.stop_polling()
+        await polling
+    if webhook_runner is not None:
+        await webhook_runner.cleanup()
+    await bot.session.close()
+    await api_runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("polling", "webhook", "both"), default="both")
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--api-port", type=int, default=8181)
+    parser.add_argument("--webhook-port", type=int, default=8182)
+    args = parser.parse_args()
+
+    if args.mode == "both":
+        # Роутеры подключаются к диспетчеру один раз за процесс — каждый режим в своем
+        for mode in ("polling", "webhook"):
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.webhook_latency", "--mode", mode,
+                 "--updates", str(args.updates), "--concurrency", str(args.concurrency),
+                 "--api-port", str(args.api_port), "--webhook-port", str(args.webhook_port)],
+                check=True
+            )
+        return
+
+    asyncio.run(run(args.mode, args.updates, args.concurrency, args.api_port, args.webhook_port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Бенчмарк масштабирования по процессам-обработчикам (WORKERS)
+
+Запускает бота (app.py) с разным числом процессов против локальной
+имитации Bot API, выдает ему пачку обновлений /help от разных
+пользователей и измеряет пропускную способность до получения всех
+ответов. Рост близок к линейному, пока процессов не больше ядер
+процессора (и пока сама имитация API не становится узким местом).
+
+Запуск:
+    python -m benchmarks.worker_scaling [--workers 1,2,4] [--updates 2000]
+"""
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+from benchmarks.webhook_latency import TOKEN, FakeTelegram, make_update
+
+
+async def measure(fake: FakeTelegram, workers: int, first_id: int, updates: int, api_port: int) -> float:
+    """Обновлений в секунду при заданном числе процессов"""
+    env = dict(
+        os.environ,
+        BOT_TOKEN=TOKEN,
+        BOT_MODE="polling",
+        BOT_API_URL=f"http://127.0.0.1:{api_port}",
+        WORKERS=str(workers),
+        WORKER_REPORT_INTERVAL="1",
+        DATABASE_URL="sqlite:///" + os.path.join(tempfile.mkdtemp(), "benchmark.db"),
+        CACHE_WARMER_ENABLED="False",
+    )
+    bot = await asyncio.create_subprocess_exec(
+        sys.executable, "app.py", env=env,
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+    )
+
+    async def deliver(update_ids) -> None:
+        replies = []
+        for update_id in update_ids:
+            update = make_update(update_id)
+            replies.append(fake.wait_reply(update["message"]["chat"]["id"]))
+            fake.push(update)
+        await asyncio.wait_for(asyncio.gather(*replies), timeout=300)
+
+    try:
+        # Прогрев: запуск процессов, БД, соединения — по несколько обновлений на каждый
+        warmup = 8 * workers
+        await deliver(range(first_id, first_id + warmup))
+
+        started = time.perf_counter()
+        await deliver(range(first_id + warmup, first_id + warmup + updates))
+        return updates / (time.perf_counter() - started)
+    finally:
+        bot.send_signal(signal.SIGTERM)
+        await bot.wait()
+
+
+async def run(workers_list, updates: int, api_port: int) -> None:
+    fake = FakeTelegram()
+    api = web.Application()
+    api.router.add_post("/bot{token}/{method}", fake.handle)
+    runner = web.AppRunner(api)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", api_port).start()
+
+    print(f"Ядер процессора: {os.cpu_count()}, обновлений: {updates}")
+    baseline = None
+    first_id = 1
+    for workers in workers_list:
+        throughput = await measure(fake, workers, first_id, updates, api_port)
+        first_id += updates + 8 * workers
+        baseline = baseline or throughput / workers
+        print(
+            f"WORKERS={workers:<3} {throughput:8.0f} обновлений/с   "
+            f"ускорение {throughput / baseline:5.2f}x   "
+            f"эффективность {throughput / baseline / workers * 100:5.1f}%"
+        )
+
+    await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="Число процессов через запятую")
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--api-port", type=int, default=8183)
+    args = parser.parse_args()
+
+    asyncio.run(run([int(n) for n in args.workers.split(",")], args.updates, args.api_port))
+
+
+if __name__ == "__main__":
+    main()
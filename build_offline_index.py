@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Скрипт сборки офлайн-индекса статей из дампа Википедии
+
+Поддерживаются дампы:
+    ruwiki-latest-abstract.xml[.gz|.bz2]          — заголовки и аннотации
+    ruwiki-latest-pages-articles.xml[.gz|.bz2]    — статьи и редиректы
+
+Пример:
+    python build_offline_index.py ruwiki-latest-pages-articles.xml.bz2
+"""
+import argparse
+import bz2
+import gzip
+import re
+import time
+import xml.etree.ElementTree as ET
+
+from config import config
+from services.offline_index import OfflineIndexWriter
+
+SUMMARY_LIMIT = 1500
+
+# Префиксы заголовков в дампе аннотаций ("Википедия: Заголовок")
+ABSTRACT_TITLE_PREFIXES = ("Википедия: ", "Wikipedia: ")
+
+# Страницы неоднозначностей в индекс не попадают: по такому термину бот
+# должен предложить варианты (AmbiguousTerm), а не вступление страницы
+DISAMBIGUATION_SUFFIXES = ("(значения)", "(disambiguation)")
+_DISAMBIGUATION_RE = re.compile(
+    r"\{\{\s*(?:неоднозначность|многозначность|disambig(?:uation)?|dab|"
+    r"однофамильцы|список однофамильцев|список полных тёзок|тёзки)\s*[|}]",
+    re.I
+)
+
+_TEMPLATE_RE = re.compile(r"\{\{[^{}]*\}\}")
+_TABLE_RE = re.compile(r"\{\|.*?\|\}", re.S)
+_REF_RE = re.compile(r"<ref[^>/]*/>|<ref[^>]*>.*?</ref>", re.S)
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.S)
+_TAG_RE = re.compile(r"<[^>]+>")
+_FILE_RE = re.compile(r"\[\[(?:Файл|Изображение|File|Image|Категория|Category):[^\[\]]*(?:\[\[[^\]]*\]\][^\[\]]*)*\]\]", re.I)
+_LINK_RE = re.compile(r"\[\[(?:[^|\]]*\|)?([^\]]*)\]\]")
+_EXTERNAL_LINK_RE = re.compile(r"\[https?://[^\s\]]+\s*([^\]]*)\]")
+_QUOTES_RE = re.compile(r"'{2,}")
+
+
+def open_dump(path: str):
+    """Открыть дамп с учетом сжатия"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    return open(path, "rb")
+
+
+def wikitext_to_summary(text: str, limit: int = SUMMARY_LIMIT) -> str:
+    """Грубое преобразование вики-разметки вводной части статьи в простой текст"""
+    # Берем текст до первого раздела
+    text = text.split("\n==", 1)[0]
+
+    text = _COMMENT_RE.sub("", text)
+    text = _REF_RE.sub("", text)
+    text = _TABLE_RE.sub("", text)
+
+    # Вложенные шаблоны удаляем изнутри наружу
+    previous = None
+    while previous != text:
+        previous = text
+        text = _TEMPLATE_RE.sub("", text)
+
+    text = _FILE_RE.sub("", text)
+    text = _LINK_RE.sub(r"\1", text)
+    text = _EXTERNAL_LINK_RE.sub(r"\1", text)
+    text = _TAG_RE.sub("", text)
+    text = _QUOTES_RE.sub("", text)
+
+    paragraphs = [" ".join(line.split()) for line in text.split("\n")]
+    summary = "\n".join(p for p in paragraphs if p and not p.startswith(("|", "!", "*", "#", ":")))
+    return summary[:limit]
+
+
+def is_disambiguation(title: str, text: str = "") -> bool:
+    """Страница неоднозначности: по заголовку или шаблону в вики-разметке"""
+    return title.rstrip().endswith(DISAMBIGUATION_SUFFIXES) or bool(_DISAMBIGUATION_RE.search(text))
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child_text(element, name: str) -> str:
+    for child in element.iter():
+        if _local_name(child.tag) == name:
+            return child.text or ""
+    return ""
+
+
+def build(dump_path: str, output_path: str, lang: str) -> dict:
+    """Прочитать дамп и записать индекс"""
+    writer = OfflineIndexWriter(output_path, lang=lang)
+    disambiguations = 0
+    root = None
+
+    with open_dump(dump_path) as dump:
+        for event, element in ET.iterparse(dump, events=("start", "end")):
+            if root is None:
+                root = element
+            if event != "end":
+                continue
+            tag = _local_name(element.tag)
+
+            if tag == "doc":
+                # Дамп аннотаций
+                title = _child_text(element, "title")
+                for prefix in ABSTRACT_TITLE_PREFIXES:
+                    if title.startswith(prefix):
+                        title = title[len(prefix):]
+                        break
+                abstract = _child_text(element, "abstract").strip()
+                if is_disambiguation(title):
+                    disambiguations += 1
+                elif title and abstract:
+                    writer.add_article(title, abstract[:SUMMARY_LIMIT])
+
+            elif tag == "page":
+                # Полный дамп статей: только основное пространство имен
+                if _child_text(element, "ns") == "0":
+                    title = _child_text(element, "title")
+                    text = _child_text(element, "text")
+                    redirect = next((c for c in element if _local_name(c.tag) == "redirect"), None)
+                    if redirect is not None:
+                        writer.add_redirect(title, redirect.get("title", ""))
+                    elif is_disambiguation(title, text):
+                        # Редиректы на нее тоже не попадут в индекс
+                        disambiguations += 1
+                    else:
+                        summary = wikitext_to_summary(text)
+                        if summary:
+                            writer.add_article(title, summary)
+
+            else:
+                continue
+
+            # Разобранные страницы удаляем из корня: element.clear() оставил бы
+            # в нем пустые элементы, и память росла бы с размером дампа
+            root.clear()
+
+    result = writer.finish()
+    result['disambiguations'] = disambiguations
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сборка офлайн-индекса Википедии")
+    parser.add_argument("dump", help="путь к дампу (xml, xml.gz или xml.bz2)")
+    parser.add_argument("-o", "--output", default=config.OFFLINE_INDEX_PATH, help="файл индекса")
+    parser.add_argument("--lang", default="ru", help="язык Википедии (для ссылок на статьи)")
+    args = parser.parse_args()
+
+    print(f"Сборка индекса из {args.dump}...")
+    started = time.monotonic()
+    result = build(args.dump, args.output, args.lang)
+    print(f"Статей: {result['articles']}, редиректов: {result['redirects']}, ключей: {result['keys']}, "
+          f"пропущено неоднозначностей: {result['disambiguations']}")
+    print(f"Индекс записан в {args.output} за {time.monotonic() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
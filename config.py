@@ -9,8 +9,151 @@ class Config:
     BOT_TOKEN = os.getenv("BOT_TOKEN")
     ADMIN_IDS = list(map(int, os.getenv("ADMIN_IDS", "").split(','))) if os.getenv("ADMIN_IDS") else []
 
+    # Режим получения обновлений: polling или webhook
+    BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+
+    # Вебхук: публичный адрес, путь, секрет и адрес локального сервера
+    WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").rstrip('/')
+    WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+    WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+    WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+    WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", os.getenv("PORT", "8080")))
+
+    # Несколько процессов-обработчиков (WORKERS > 1): обновления
+    # распределяются между ними по id пользователя
+    WORKERS = int(os.getenv("WORKERS", "1"))
+    WORKER_REPORT_INTERVAL = float(os.getenv("WORKER_REPORT_INTERVAL", "10"))
+
+    # Сколько секунд при выключении дорабатываются принятые обновления
+    # (Docker по умолчанию ждет 10 с после SIGTERM, затем завершает процесс)
+    SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "8"))
+
+    # Адрес Bot API (например, собственного сервера telegram-bot-api)
+    BOT_API_URL = os.getenv("BOT_API_URL", "")
+
+    # Очередь исходящих сообщений по лимитам Telegram (в секунду)
+    OUTBOUND_SCHEDULER_ENABLED = os.getenv("OUTBOUND_SCHEDULER_ENABLED", "True").lower() == "true"
+    # Общий лимит — на бота целиком, процессы-обработчики (WORKERS) делят его поровну
+    OUTBOUND_GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", "30"))
+    OUTBOUND_CHAT_RATE = float(os.getenv("OUTBOUND_CHAT_RATE", "1"))
+    OUTBOUND_CHAT_BURST = int(os.getenv("OUTBOUND_CHAT_BURST", "5"))
+    OUTBOUND_GROUP_RATE = float(os.getenv("OUTBOUND_GROUP_RATE", str(20 / 60)))
+    OUTBOUND_MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", "3"))
+
+    # Рассылки администратора: параллельные отправители, сообщений в секунду,
+    # размер пачки (между сохранениями курсора) и период обновления отчета
+    BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "8"))
+    BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "20"))
+    BROADCAST_BATCH_SIZE = int(os.getenv("BROADCAST_BATCH_SIZE", "200"))
+    BROADCAST_PROGRESS_INTERVAL = float(os.getenv("BROADCAST_PROGRESS_INTERVAL", "5"))
+    BROADCAST_RESUME = os.getenv("BROADCAST_RESUME", "True").lower() == "true"
+
+    # Хранилище состояний FSM: memory или redis (общее для нескольких процессов)
+    FSM_STORAGE = os.getenv("FSM_STORAGE", "memory").lower()
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    FSM_STATE_TTL = int(os.getenv("FSM_STATE_TTL", str(24 * 3600)))
+    FSM_DATA_TTL = int(os.getenv("FSM_DATA_TTL", str(24 * 3600)))
+    FSM_MEMORY_MAX_ENTRIES = int(os.getenv("FSM_MEMORY_MAX_ENTRIES", "100000"))
+
     # Настройки базы данных
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///bot_database.db")
+    # Миграции при запуске (в режиме супервизора их выполняет только супервизор)
+    DB_MIGRATE = os.getenv("DB_MIGRATE", "True").lower() == "true"
+
+    # Планировщик запросов к Википедии
+    LOOKUP_WORKERS = int(os.getenv("LOOKUP_WORKERS", "4"))
+    LOOKUP_MAX_CONCURRENCY = int(os.getenv("LOOKUP_MAX_CONCURRENCY", os.getenv("LOOKUP_WORKERS", "4")))
+    LOOKUP_QUEUE_SIZE = int(os.getenv("LOOKUP_QUEUE_SIZE", "50"))
+    LOOKUP_QUEUE_TIMEOUT = float(os.getenv("LOOKUP_QUEUE_TIMEOUT", "10"))
+
+    # Языковые разделы Википедии, доступные в настройках
+    WIKI_DEFAULT_LANGUAGE = os.getenv("WIKI_DEFAULT_LANGUAGE", "ru")
+    WIKI_LANGUAGES = os.getenv("WIKI_LANGUAGES", "ru,en,es,de").split(',')
+
+    # Запасные языки: ищем параллельно, если в основном языке статьи нет
+    # или он не ответил за FALLBACK_DELAY секунд
+    FALLBACK_ENABLED = os.getenv("FALLBACK_ENABLED", "False").lower() == "true"
+    FALLBACK_LANGUAGES = os.getenv("FALLBACK_LANGUAGES", "en,ru").split(',')
+    FALLBACK_MAX_LANGUAGES = int(os.getenv("FALLBACK_MAX_LANGUAGES", "2"))
+    FALLBACK_DELAY = float(os.getenv("FALLBACK_DELAY", "2.0"))
+
+    # Неоднозначные термины: варианты кнопками, их вступления загружаются заранее
+    DISAMBIGUATION_OPTIONS = int(os.getenv("DISAMBIGUATION_OPTIONS", "5"))
+    DISAMBIGUATION_PREFETCH = os.getenv("DISAMBIGUATION_PREFETCH", "True").lower() == "true"
+    DISAMBIGUATION_CONCURRENCY = int(os.getenv("DISAMBIGUATION_CONCURRENCY", "3"))
+    DISAMBIGUATION_CHOICES = int(os.getenv("DISAMBIGUATION_CHOICES", "1000"))
+    DISAMBIGUATION_TTL = int(os.getenv("DISAMBIGUATION_TTL", "3600"))
+
+    # Чтение полной статьи в чате: страницы (в символах Telegram) и кэш текстов
+    READER_PAGE_SIZE = int(os.getenv("READER_PAGE_SIZE", "3500"))
+    READER_CACHE_SIZE = int(os.getenv("READER_CACHE_SIZE", "200"))
+    READER_CACHE_TTL = int(os.getenv("READER_CACHE_TTL", str(6 * 3600)))
+
+    # Упреждающая загрузка статей по ссылкам показанной статьи
+    PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "False").lower() == "true"
+    PREFETCH_TOP_N = int(os.getenv("PREFETCH_TOP_N", "3"))
+    PREFETCH_USER_BUDGET = int(os.getenv("PREFETCH_USER_BUDGET", "5"))
+    PREFETCH_USER_WINDOW = float(os.getenv("PREFETCH_USER_WINDOW", "300"))
+    PREFETCH_GLOBAL_RATE = float(os.getenv("PREFETCH_GLOBAL_RATE", "1.0"))
+    PREFETCH_GLOBAL_BURST = int(os.getenv("PREFETCH_GLOBAL_BURST", "5"))
+    PREFETCH_COOCCURRENCE_WINDOW = int(os.getenv("PREFETCH_COOCCURRENCE_WINDOW", "3600"))
+
+    # Главное изображение статьи: отправляется по file_id после первой загрузки
+    LEAD_IMAGE_ENABLED = os.getenv("LEAD_IMAGE_ENABLED", "False").lower() == "true"
+    LEAD_IMAGE_SIZE = int(os.getenv("LEAD_IMAGE_SIZE", "640"))
+    IMAGE_FILE_ID_CACHE_SIZE = int(os.getenv("IMAGE_FILE_ID_CACHE_SIZE", "5000"))
+
+    # Поиск нескольких терминов одним сообщением (по термину в строке)
+    BULK_MAX_TERMS = int(os.getenv("BULK_MAX_TERMS", "20"))
+    BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "4"))
+    BULK_PAGE_SIZE = int(os.getenv("BULK_PAGE_SIZE", "3500"))
+    BULK_RESULTS_TTL = int(os.getenv("BULK_RESULTS_TTL", "3600"))
+
+    # Таймауты, повторы и выключатель для запросов к Википедии
+    WIKI_CALL_TIMEOUT = float(os.getenv("WIKI_CALL_TIMEOUT", "5"))
+    WIKI_LOOKUP_DEADLINE = float(os.getenv("WIKI_LOOKUP_DEADLINE", "15"))
+    WIKI_RETRIES = int(os.getenv("WIKI_RETRIES", "2"))
+    WIKI_RETRY_BACKOFF = float(os.getenv("WIKI_RETRY_BACKOFF", "0.5"))
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+    # Хеджирование: дублирующий запрос к REST/мобильному API, если основной
+    # не ответил за перцентиль HEDGE_PERCENTILE недавних длительностей
+    HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "True").lower() == "true"
+    HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.9"))
+    HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "1.0"))
+    HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.2"))
+    HEDGE_MAX_DELAY = float(os.getenv("HEDGE_MAX_DELAY", "3.0"))
+
+    # Кэш статей (секунды)
+    ARTICLE_CACHE_SIZE = int(os.getenv("ARTICLE_CACHE_SIZE", "2000"))
+    ARTICLE_CACHE_TTL = int(os.getenv("ARTICLE_CACHE_TTL", str(6 * 3600)))
+    ARTICLE_CACHE_STALE_TTL = int(os.getenv("ARTICLE_CACHE_STALE_TTL", str(7 * 24 * 3600)))
+
+    # Офлайн-индекс статей (собирается build_offline_index.py)
+    OFFLINE_INDEX_PATH = os.getenv("OFFLINE_INDEX_PATH", "data/ruwiki_offline.idx")
+
+    # Исправление опечаток по локальному корпусу заголовков
+    FUZZY_ENABLED = os.getenv("FUZZY_ENABLED", "True").lower() == "true"
+    FUZZY_MAX_DISTANCE = int(os.getenv("FUZZY_MAX_DISTANCE", "1"))
+    FUZZY_PREFIX_LENGTH = int(os.getenv("FUZZY_PREFIX_LENGTH", "7"))
+    # Кандидатов на один ключ индекса (остальные, менее популярные, не проверяются)
+    FUZZY_MAX_CANDIDATES = int(os.getenv("FUZZY_MAX_CANDIDATES", "200"))
+    FUZZY_INCLUDE_OFFLINE_TITLES = os.getenv("FUZZY_INCLUDE_OFFLINE_TITLES", "False").lower() == "true"
+
+    # Инлайн-режим: подсказки заголовков
+    INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "300"))
+    INLINE_RESULTS = int(os.getenv("INLINE_RESULTS", "10"))
+    INLINE_POPULAR_TERMS = int(os.getenv("INLINE_POPULAR_TERMS", "1000"))
+
+    # Фоновый прогрев кэша популярных статей
+    CACHE_WARMER_ENABLED = os.getenv("CACHE_WARMER_ENABLED", "True").lower() == "true"
+    CACHE_WARMER_INTERVAL = float(os.getenv("CACHE_WARMER_INTERVAL", "1800"))
+    CACHE_WARMER_TOP_N = int(os.getenv("CACHE_WARMER_TOP_N", "50"))
+    CACHE_WARMER_TRENDING_HOURS = int(os.getenv("CACHE_WARMER_TRENDING_HOURS", "24"))
+    CACHE_WARMER_RATE = float(os.getenv("CACHE_WARMER_RATE", "2"))
+    CACHE_WARMER_BUDGET = float(os.getenv("CACHE_WARMER_BUDGET", "120"))
+    CACHE_WARMER_REFRESH_AHEAD = float(os.getenv("CACHE_WARMER_REFRESH_AHEAD", "3600"))
 
     # Настройки
     DEBUG = os.getenv("DEBUG", "False").lower() == "true"
@@ -19,6 +162,10 @@ class Config:
     def is_sqlite(self):
         return self.DATABASE_URL.startswith("sqlite")
 
+    @property
+    def database_path(self):
+        return self.DATABASE_URL.replace("sqlite:///", "", 1)
+
 
 config = Config()
 
@@ -1,4 +1,4 @@
-from .models import User, SearchHistory, BotStats
-from .repository import db
+from .models import User, SearchHistory, BotStats, Broadcast
+from .repository import db, start_db_call_count
 
-__all__ = ['User', 'SearchHistory', 'BotStats', 'db']
\ No newline at end of file
+__all__ = ['User', 'SearchHistory', 'BotStats', 'Broadcast', 'db', 'start_db_call_count']
\ No newline at end of file
@@ -17,6 +17,7 @@ class User:
     registration_date: Optional[datetime] = None
     last_activity: Optional[datetime] = None
     search_count: int = 0
+    language: str = "ru"
 
     def __post_init__(self):
         """Парсинг дат после инициализации"""
@@ -110,4 +111,18 @@ class BotStats:
 
     def __post_init__(self):
         if self.popular_terms is None:
-            self.popular_terms = []
\ No newline at end of file
+            self.popular_terms = []
+
+
+@dataclass
+class Broadcast:
+    """Модель рассылки всем пользователям"""
+    id: Optional[int] = None
+    text: str = ""
+    created_by: int = 0
+    status: str = "draft"  # draft, running, done, cancelled
+    last_user_id: int = 0  # Курсор: id последнего обработанного пользователя
+    delivered: int = 0
+    failed: int = 0
+    blocked: int = 0
+    report_message_id: Optional[int] = None
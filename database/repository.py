@@ -7,7 +7,21 @@ from datetime import datetime, timedelta
 from typing import List, Optional, Tuple, Any
 from dataclasses import asdict
 import json
-from .models import User, SearchHistory, BotStats
+from contextvars import ContextVar
+from config import config
+from .models import User, SearchHistory, BotStats, Broadcast
+
+
+# Счетчик обращений к БД в текущем контексте (например, за время обработки
+# одного обновления); None — не считаем
+db_calls: ContextVar[Optional[List[int]]] = ContextVar("db_calls", default=None)
+
+
+def start_db_call_count() -> List[int]:
+    """Начать подсчет обращений к БД в текущем контексте"""
+    counter = [0]
+    db_calls.set(counter)
+    return counter
 
 
 class Database:
@@ -15,11 +29,20 @@ class Database:
         self.db_path = db_path
         self.init_db_lock = asyncio.Lock()
 
+    def _connect(self):
+        """Соединение с БД (каждое учитывается в счетчике db_calls)"""
+        counter = db_calls.get()
+        if counter is not None:
+            counter[0] += 1
+        return aiosqlite.connect(self.db_path)
+
     async def init_db(self):
         """Инициализация базы данных"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect() as db:
             # Включаем поддержку внешних ключей
             await db.execute("PRAGMA foreign_keys = ON")
+            # WAL: читатели не блокируют запись, в том числе из других процессов
+            await db.execute("PRAGMA journal_mode = WAL")
 
             # Создаем таблицу пользователей
             await db.execute('''
@@ -34,10 +57,17 @@ class Database:
                     is_registered BOOLEAN DEFAULT FALSE,
                     registration_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    search_count INTEGER DEFAULT 0
+                    search_count INTEGER DEFAULT 0,
+                    language TEXT DEFAULT 'ru'
                 )
             ''')
 
+            # Миграция: язык поиска в старых базах
+            cursor = await db.execute("PRAGMA table_info(users)")
+            columns = [row[1] for row in await cursor.fetchall()]
+            if 'language' not in columns:
+                await db.execute("ALTER TABLE users ADD COLUMN language TEXT DEFAULT 'ru'")
+
             # Создаем таблицу истории поиска
             await db.execute('''
                 CREATE TABLE IF NOT EXISTS search_history (
@@ -52,11 +82,38 @@ class Database:
                 )
             ''')
 
+            # Создаем таблицу file_id загруженных в Telegram изображений
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS image_file_ids (
+                    url TEXT PRIMARY KEY,
+                    file_id TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # Создаем таблицу рассылок (с курсором для продолжения после перезапуска)
+            await db.execute('''
+                CREATE TABLE IF NOT EXISTS broadcasts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    text TEXT NOT NULL,
+                    created_by INTEGER NOT NULL,
+                    status TEXT DEFAULT 'draft',
+                    last_user_id INTEGER DEFAULT 0,
+                    delivered INTEGER DEFAULT 0,
+                    failed INTEGER DEFAULT 0,
+                    blocked INTEGER DEFAULT 0,
+                    report_message_id INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    finished_at TIMESTAMP
+                )
+            ''')
+
             # Индексы для ускорения запросов
             await db.execute('CREATE INDEX IF NOT EXISTS idx_user_id ON users(telegram_id)')
             await db.execute('CREATE INDEX IF NOT EXISTS idx_search_user_id ON search_history(user_id)')
             await db.execute('CREATE INDEX IF NOT EXISTS idx_search_timestamp ON search_history(timestamp)')
             await db.execute('CREATE INDEX IF NOT EXISTS idx_search_term ON search_history(search_term)')
+            await db.execute('CREATE INDEX IF NOT EXISTS idx_search_result_title ON search_history(result_title)')
 
             await db.commit()
 
@@ -77,7 +134,8 @@ class Database:
                 is_registered=bool(row[7]),
                 registration_date=row[8],  # Оставляем как есть, парсим в модели
                 last_activity=row[9],  # Оставляем как есть, парсим в моделях
-                search_count=row[10]
+                search_count=row[10],
+                language=row[11] or 'ru'
             )
         except Exception as e:
             print(f"Ошибка парсинга пользователя: {e}")
@@ -105,7 +163,7 @@ class Database:
     async def get_or_create_user(self, telegram_id: int, username: str = None,
                                  first_name: str = None, last_name: str = None) -> User:
         """Получить или создать пользователя"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect() as db:
             # Ищем пользователя
             cursor = await db.execute(
                 'SELECT * FROM users WHERE telegram_id = ?',
@@ -184,22 +242,7 @@ class Database:
                                   age: int = None, first_name: str = None,
                                   last_name: str = None) -> bool:
         """Обновить профиль пользователя"""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Сначала получаем текущие данные
-            cursor = await db.execute(
-                'SELECT * FROM users WHERE telegram_id = ?',
-                (telegram_id,)
-            )
-            row = await cursor.fetchone()
-
-            if not row:
-                return False
-
-            user = await self._parse_user_row(row)
-
-            if not user:
-                return False
-
+        async with self._connect() as db:
             # Обновляем только переданные поля
             update_fields = []
             params = []
@@ -233,16 +276,27 @@ class Database:
             params.append(telegram_id)
 
             query = f"UPDATE users SET {', '.join(update_fields)} WHERE telegram_id = ?"
-            await db.execute(query, params)
+            cursor = await db.execute(query, params)
             await db.commit()
 
-            return True
+            # Пользователя нет — ничего не обновлено
+            return cursor.rowcount > 0
+
+    async def update_user_language(self, telegram_id: int, language: str) -> bool:
+        """Сохранить язык поиска пользователя"""
+        async with self._connect() as db:
+            cursor = await db.execute(
+                'UPDATE users SET language = ? WHERE telegram_id = ?',
+                (language, telegram_id)
+            )
+            await db.commit()
+            return cursor.rowcount > 0
 
     async def add_search_history(self, telegram_id: int, search_term: str,
                                  result_title: str = None, result_url: str = None,
                                  success: bool = True) -> bool:
         """Добавить запись в историю поиска"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect() as db:
             # Получаем ID пользователя
             cursor = await db.execute(
                 'SELECT id FROM users WHERE telegram_id = ?',
@@ -271,9 +325,50 @@ class Database:
             await db.commit()
             return True
 
+    async def add_search_history_batch(self, telegram_id: int,
+                                       rows: List[Tuple[str, Optional[str], Optional[str], bool]]) -> bool:
+        """
+        Добавить несколько записей в историю поиска одной транзакцией
+
+        Args:
+            rows: Кортежи (search_term, result_title, result_url, success)
+        """
+        if not rows:
+            return True
+
+        async with self._connect() as db:
+            cursor = await db.execute(
+                'SELECT id FROM users WHERE telegram_id = ?',
+                (telegram_id,)
+            )
+            row = await cursor.fetchone()
+
+            if not row:
+                return False
+
+            user_id = row[0]
+            timestamp = datetime.now().isoformat()
+
+            await db.executemany('''
+                INSERT INTO search_history 
+                (user_id, search_term, result_title, result_url, timestamp, success)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [
+                (user_id, term, title, url, timestamp, success)
+                for term, title, url, success in rows
+            ])
+
+            await db.execute(
+                'UPDATE users SET search_count = search_count + ?, last_activity = ? WHERE id = ?',
+                (len(rows), timestamp, user_id)
+            )
+
+            await db.commit()
+            return True
+
     async def get_user_search_history(self, telegram_id: int, limit: int = 10) -> List[SearchHistory]:
         """Получить историю поиска пользователя"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect() as db:
             # Получаем ID пользователя
             cursor = await db.execute(
                 'SELECT id FROM users WHERE telegram_id = ?',
@@ -305,7 +400,7 @@ class Database:
 
     async def get_user_profile(self, telegram_id: int) -> Optional[User]:
         """Получить профиль пользователя"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect() as db:
             cursor = await db.execute(
                 'SELECT * FROM users WHERE telegram_id = ?',
                 (telegram_id,)
@@ -318,7 +413,7 @@ class Database:
 
     async def get_bot_stats(self) -> BotStats:
         """Получить статистику бота"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect() as db:
             # Общее количество пользователей
             cursor = await db.execute('SELECT COUNT(*) FROM users')
             total_users = (await cursor.fetchone())[0]
@@ -357,9 +452,220 @@ class Database:
                 popular_terms=popular_terms
             )
 
+    async def estimate_totals(self) -> Tuple[int, int]:
+        """
+        Примерное число пользователей и поисков без прохода по таблицам
+
+        Берется наибольший id (поиск по индексу первичного ключа), поэтому
+        удаленные записи не вычитаются.
+        """
+        async with self._connect() as db:
+            cursor = await db.execute(
+                'SELECT (SELECT MAX(id) FROM users), (SELECT MAX(id) FROM search_history)'
+            )
+            users, searches = await cursor.fetchone()
+            return users or 0, searches or 0
+
+    async def count_users(self) -> int:
+        """Количество пользователей"""
+        async with self._connect() as db:
+            cursor = await db.execute('SELECT COUNT(*) FROM users')
+            return (await cursor.fetchone())[0]
+
+    async def create_broadcast(self, text: str, created_by: int) -> Broadcast:
+        """Создать черновик рассылки"""
+        async with self._connect() as db:
+            cursor = await db.execute(
+                'INSERT INTO broadcasts (text, created_by) VALUES (?, ?)',
+                (text, created_by)
+            )
+            await db.commit()
+            return Broadcast(id=cursor.lastrowid, text=text, created_by=created_by)
+
+    async def get_broadcast(self, broadcast_id: int) -> Optional[Broadcast]:
+        """Получить рассылку"""
+        async with self._connect() as db:
+            cursor = await db.execute('''
+                SELECT id, text, created_by, status, last_user_id, delivered, failed, blocked, report_message_id
+                FROM broadcasts WHERE id = ?
+            ''', (broadcast_id,))
+            row = await cursor.fetchone()
+            return Broadcast(*row) if row else None
+
+    async def get_running_broadcasts(self) -> List[Broadcast]:
+        """Рассылки, прерванные перезапуском"""
+        async with self._connect() as db:
+            cursor = await db.execute('''
+                SELECT id, text, created_by, status, last_user_id, delivered, failed, blocked, report_message_id
+                FROM broadcasts WHERE status = 'running' ORDER BY id
+            ''')
+            return [Broadcast(*row) for row in await cursor.fetchall()]
+
+    async def get_broadcast_recipients(self, after_id: int, limit: int) -> List[Tuple[int, int]]:
+        """
+        Следующая пачка получателей (id, telegram_id) после курсора after_id
+
+        Постраничный обход по первичному ключу: каждая пачка читается по
+        индексу с нужного места, без OFFSET и без загрузки всей таблицы.
+        """
+        async with self._connect() as db:
+            cursor = await db.execute(
+                'SELECT id, telegram_id FROM users WHERE id > ? ORDER BY id LIMIT ?',
+                (after_id, limit)
+            )
+            return [(row[0], row[1]) for row in await cursor.fetchall()]
+
+    async def save_broadcast(self, broadcast: Broadcast, expected_status: Optional[str] = None) -> bool:
+        """
+        Сохранить состояние и курсор рассылки
+
+        Если указан expected_status, строка обновляется, только пока
+        рассылка в этом статусе: так ход рассылки не затирает отмену,
+        сделанную в другом процессе.
+
+        Returns:
+            True, если строка обновлена
+        """
+        query = '''
+            UPDATE broadcasts
+            SET status = ?, last_user_id = ?, delivered = ?, failed = ?, blocked = ?,
+                report_message_id = ?,
+                finished_at = CASE WHEN ? IN ('done', 'cancelled') THEN CURRENT_TIMESTAMP END
+            WHERE id = ?
+        '''
+        params = [broadcast.status, broadcast.last_user_id, broadcast.delivered, broadcast.failed,
+                  broadcast.blocked, broadcast.report_message_id, broadcast.status, broadcast.id]
+        if expected_status is not None:
+            query += ' AND status = ?'
+            params.append(expected_status)
+
+        async with self._connect() as db:
+            cursor = await db.execute(query, params)
+            await db.commit()
+            return cursor.rowcount > 0
+
+    async def cancel_broadcast(self, broadcast_id: int) -> bool:
+        """Отменить черновик или идущую рассылку, не трогая ее счетчики"""
+        async with self._connect() as db:
+            cursor = await db.execute('''
+                UPDATE broadcasts SET status = 'cancelled', finished_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND status IN ('draft', 'running')
+            ''', (broadcast_id,))
+            await db.commit()
+            return cursor.rowcount > 0
+
+    async def get_popular_terms(self, limit: int = 10, hours: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Получить самые частые успешные запросы (за последние hours часов, если указано)"""
+        async with self._connect() as db:
+            if hours is not None:
+                time_threshold = (datetime.now() - timedelta(hours=hours)).isoformat()
+                cursor = await db.execute('''
+                    SELECT search_term, COUNT(*) as count 
+                    FROM search_history 
+                    WHERE success = TRUE AND timestamp > ?
+                    GROUP BY search_term 
+                    ORDER BY count DESC 
+                    LIMIT ?
+                ''', (time_threshold, limit))
+            else:
+                cursor = await db.execute('''
+                    SELECT search_term, COUNT(*) as count 
+                    FROM search_history 
+                    WHERE success = TRUE
+                    GROUP BY search_term 
+                    ORDER BY count DESC 
+                    LIMIT ?
+                ''', (limit,))
+
+            return [(row[0], row[1]) for row in await cursor.fetchall()]
+
+    async def get_image_file_id(self, url: str) -> Optional[str]:
+        """Получить file_id изображения, уже загруженного в Telegram"""
+        async with self._connect() as db:
+            cursor = await db.execute(
+                'SELECT file_id FROM image_file_ids WHERE url = ?',
+                (url,)
+            )
+            row = await cursor.fetchone()
+            return row[0] if row else None
+
+    async def save_image_file_id(self, url: str, file_id: str) -> None:
+        """Сохранить file_id изображения"""
+        async with self._connect() as db:
+            await db.execute(
+                'INSERT OR REPLACE INTO image_file_ids (url, file_id, created_at) VALUES (?, ?, ?)',
+                (url, file_id, datetime.now().isoformat())
+            )
+            await db.commit()
+
+    async def delete_image_file_id(self, url: str) -> None:
+        """Удалить устаревший file_id изображения"""
+        async with self._connect() as db:
+            await db.execute('DELETE FROM image_file_ids WHERE url = ?', (url,))
+            await db.commit()
+
+    async def get_related_titles(self, title: str, window: int = 3600, sample: int = 500,
+                                 limit: int = 20) -> List[Tuple[str, int]]:
+        """
+        Статьи, которые пользователи находили в течение window секунд после
+        статьи title (по последним sample ее поискам), с числом таких пользователей
+        """
+        async with self._connect() as db:
+            cursor = await db.execute('''
+                SELECT h2.result_title, COUNT(DISTINCT h2.user_id) as score
+                FROM (
+                    SELECT id, user_id, timestamp
+                    FROM search_history
+                    WHERE result_title = ? AND success = TRUE
+                    ORDER BY id DESC
+                    LIMIT ?
+                ) AS h1
+                JOIN search_history h2 ON h2.user_id = h1.user_id AND h2.id > h1.id
+                WHERE h2.success = TRUE
+                  AND h2.result_title IS NOT NULL
+                  AND h2.result_title != ?
+                  AND julianday(h2.timestamp) - julianday(h1.timestamp) <= ?
+                GROUP BY h2.result_title
+                ORDER BY score DESC
+                LIMIT ?
+            ''', (title, sample, title, window / 86400.0, limit))
+
+            return [(row[0], row[1]) for row in await cursor.fetchall()]
+
+    async def iter_result_titles(self, batch_size: int = 1000):
+        """Потоково перебрать заголовки успешно найденных статей с числом поисков"""
+        async with self._connect() as db:
+            cursor = await db.execute('''
+                SELECT result_title, COUNT(*) as count 
+                FROM search_history 
+                WHERE success = TRUE AND result_title IS NOT NULL
+                GROUP BY result_title
+            ''')
+
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row[0], row[1]
+
+    async def iter_registered_ids(self, batch_size: int = 10000):
+        """Потоково перебрать telegram_id зарегистрированных пользователей по возрастанию (пачками)"""
+        async with self._connect() as db:
+            # Обход по уникальному индексу telegram_id — без сортировки
+            cursor = await db.execute(
+                'SELECT telegram_id FROM users WHERE is_registered = TRUE ORDER BY telegram_id'
+            )
+
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [row[0] for row in rows]
+
     async def get_user_stats(self, telegram_id: int) -> dict:
         """Получить статистику пользователя"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect() as db:
             # Получаем пользователя
             cursor = await db.execute(
                 'SELECT * FROM users WHERE telegram_id = ?',
@@ -473,7 +779,7 @@ class Database:
 
     async def get_all_users(self, limit: int = 100) -> List[User]:
         """Получить всех пользователей"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect() as db:
             cursor = await db.execute('''
                 SELECT * FROM users 
                 ORDER BY last_activity DESC 
@@ -491,7 +797,7 @@ class Database:
 
     async def delete_user_data(self, telegram_id: int) -> bool:
         """Удалить данные пользователя (GDPR compliance)"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect() as db:
             try:
                 # Получаем ID пользователя
                 cursor = await db.execute(
@@ -525,7 +831,7 @@ class Database:
 
     async def get_user_by_id(self, user_id: int) -> Optional[User]:
         """Получить пользователя по ID"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect() as db:
             cursor = await db.execute(
                 'SELECT * FROM users WHERE id = ?',
                 (user_id,)
@@ -538,7 +844,7 @@ class Database:
 
     async def update_last_activity(self, telegram_id: int) -> bool:
         """Обновить время последней активности пользователя"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect() as db:
             try:
                 await db.execute(
                     'UPDATE users SET last_activity = ? WHERE telegram_id = ?',
@@ -552,7 +858,7 @@ class Database:
 
     async def get_recent_searches(self, hours: int = 24, limit: int = 50) -> List[SearchHistory]:
         """Получить последние поиски за указанное количество часов"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect() as db:
             time_threshold = (datetime.now() - timedelta(hours=hours)).isoformat()
 
             cursor = await db.execute('''
@@ -572,9 +878,21 @@ class Database:
 
             return searches
 
+    async def checkpoint(self) -> bool:
+        """
+        Перенести журнал WAL в основной файл и обрезать его (при выключении)
+
+        Returns:
+            False, если перенос не завершен: БД занята другим соединением
+        """
+        async with self._connect() as db:
+            cursor = await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            busy, _, _ = await cursor.fetchone()
+            return not busy
+
     async def cleanup_old_data(self, days: int = 365) -> int:
         """Очистка старых данных (истории поиска старше указанного количества дней)"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._connect() as db:
             time_threshold = (datetime.now() - timedelta(days=days)).isoformat()
 
             cursor = await db.execute(
@@ -589,4 +907,4 @@ class Database:
 
 
 # Создаем глобальный экземпляр базы данных
-db = Database()
\ No newline at end of file
+db = Database(config.database_path)
\ No newline at end of file
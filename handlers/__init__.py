@@ -1,7 +1,9 @@
 from .commands import router as commands_router
 from .callbacks import router as callbacks_router
 from .registration import router as registration_router
+from .inline import router as inline_router
+from .broadcast import router as broadcast_router
 
-routers = [commands_router, callbacks_router, registration_router]
+routers = [commands_router, broadcast_router, callbacks_router, registration_router, inline_router]
 
 __all__ = ['routers']
@@ -0,0 +1,86 @@
+from aiogram import Router, F
+from aiogram.filters import Command
+from aiogram.types import Message, CallbackQuery
+from aiogram.enums import ParseMode
+
+from keyboards import broadcast_keyboard
+from utils import get_broadcast_preview, get_broadcast_progress
+from database import db
+from services.broadcast import broadcaster
+from config import config
+
+router = Router()
+
+
+@router.message(Command("broadcast"))
+async def command_broadcast_handler(message: Message) -> None:
+    """Обработка команды /broadcast - рассылка всем пользователям (админы)"""
+    if message.from_user.id not in config.ADMIN_IDS:
+        await message.answer(
+            "⛔ <b>Доступ запрещен!</b>\n\n"
+            "Эта команда доступна только администраторам.",
+            parse_mode=ParseMode.HTML
+        )
+        return
+
+    # Текст после команды с сохранением форматирования
+    parts = message.html_text.split(maxsplit=1)
+    if len(parts) < 2:
+        await message.answer(
+            "❌ <b>Не указан текст рассылки.</b>\n\n"
+            "Используйте: <code>/broadcast ТЕКСТ</code>\n"
+            "Форматирование текста сохраняется.",
+            parse_mode=ParseMode.HTML
+        )
+        return
+
+    broadcast = await db.create_broadcast(parts[1], message.from_user.id)
+    recipients = await db.count_users()
+
+    await message.answer(
+        get_broadcast_preview(broadcast.text, recipients),
+        parse_mode=ParseMode.HTML,
+        reply_markup=broadcast_keyboard(broadcast.id)
+    )
+
+
+@router.callback_query(F.data.startswith("broadcast_confirm:"))
+async def broadcast_confirm_handler(callback: CallbackQuery) -> None:
+    """Подтверждение рассылки"""
+    if callback.from_user.id not in config.ADMIN_IDS:
+        await callback.answer("⛔ Доступ запрещен!", show_alert=True)
+        return
+
+    broadcast = await db.get_broadcast(int(callback.data.split(":")[1]))
+    if broadcast is None or broadcast.status != "draft":
+        await callback.answer("Рассылка уже запущена или отменена")
+        return
+
+    # Отчет о ходе рассылки обновляется в этом же сообщении
+    broadcast.status = "running"
+    broadcast.report_message_id = callback.message.message_id
+    await db.save_broadcast(broadcast)
+    broadcaster.start(callback.bot, broadcast)
+
+    await callback.message.edit_text(
+        get_broadcast_progress(broadcast),
+        parse_mode=ParseMode.HTML,
+        reply_markup=broadcast_keyboard(broadcast.id, confirm=False)
+    )
+    await callback.answer("Рассылка запущена")
+
+
+@router.callback_query(F.data.startswith("broadcast_cancel:"))
+async def broadcast_cancel_handler(callback: CallbackQuery) -> None:
+    """Отмена черновика или остановка идущей рассылки"""
+    if callback.from_user.id not in config.ADMIN_IDS:
+        await callback.answer("⛔ Доступ запрещен!", show_alert=True)
+        return
+
+    broadcast = await broadcaster.cancel(int(callback.data.split(":")[1]))
+    if broadcast is None:
+        await callback.answer("Рассылка не найдена")
+        return
+
+    await callback.message.edit_text(get_broadcast_progress(broadcast), parse_mode=ParseMode.HTML)
+    await callback.answer()
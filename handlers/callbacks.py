@@ -1,14 +1,20 @@
+import asyncio
+import logging
+import secrets
+from contextlib import suppress
+from typing import Optional
+
 from aiogram import Router, F
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
 from aiogram.types import CallbackQuery, Message
 from aiogram.filters import StateFilter
 from aiogram.enums import ParseMode
 from aiogram.fsm.context import FSMContext
-import wikipedia
-import asyncio
 
 from keyboards import (
-    main_menu, back_keyboard, term_result_keyboard,
-    settings_menu, profile_keyboard, back_to_profile_keyboard
+    main_menu, back_keyboard, term_result_keyboard, disambiguation_keyboard,
+    reader_keyboard,
+    settings_menu, language_menu, profile_keyboard, back_to_profile_keyboard
 )
 
 from utils import (
@@ -16,14 +22,25 @@ from utils import (
     get_search_prompt,
     get_search_started,
     get_search_result,
+    get_reader_page,
+    get_bulk_started,
+    get_bulk_item,
+    get_bulk_page,
     get_search_not_found,
     get_search_error,
+    get_search_busy_message,
+    get_search_unavailable_message,
+    get_stale_result_notice,
+    get_fallback_language_notice,
     get_disambiguation_message,
+    get_choice_expired_message,
     get_about_message,
     get_contacts_message,
     get_faq_message,
     get_settings_message,
     get_settings_option_message,
+    get_language_name,
+    get_language_settings_message,
     get_cancel_search_message,
     get_empty_term_message,
     format_user_profile,
@@ -31,29 +48,84 @@ from utils import (
     SearchStates
 )
 
-from database import db
+from config import config
+from database import db, User
+from services import (
+    wiki, Article, ArticleCache, ArticleNotFound, AmbiguousTerm, UpstreamUnavailable, LookupRejected
+)
+from services.images import image_file_cache
+from services.prefetch import link_prefetcher
+from services.searches import CANCEL_WORDS, search_registry
+
+logger = logging.getLogger(__name__)
 
 router = Router()
 
-# Устанавливаем язык для Википедии
-wikipedia.set_lang("ru")
+# Страницы сводных ответов на поиск нескольких терминов
+bulk_results = ArticleCache(
+    max_size=1000,
+    ttl=config.BULK_RESULTS_TTL,
+    stale_ttl=0,
+    name="bulk_results"
+)
 
-# ---------- Обработчик поиска термина (ОБНОВЛЕН с сохранением в БД) ----------
-@router.message(StateFilter(SearchStates.waiting_for_term))
-async def process_term(message: Message, state: FSMContext) -> None:
-    """Обработка введенного пользователем термина"""
-    # Проверяем регистрацию пользователя
-    user = await db.get_user_profile(message.from_user.id)
 
-    if not user or not user.is_registered:
-        await message.answer(
-            "⚠️ <b>Сначала нужно завершить регистрацию!</b>\n\n"
-            "Используйте команду /start для регистрации.",
-            parse_mode=ParseMode.HTML,
-            reply_markup=back_keyboard()
-        )
+def _format_article(article, language: str) -> str:
+    """Текст ответа со статьей (с пометками об устаревшей версии и другом языке)"""
+    response_text = get_search_result(article.title, article.summary)
+    if article.stale:
+        response_text += get_stale_result_notice()
+    if article.lang != language:
+        response_text += get_fallback_language_notice(get_language_name(article.lang))
+
+    # Обрезаем, если слишком длинный
+    if len(response_text) > 4000:
+        response_text = response_text[:4000] + "..."
+    return response_text
+
+
+async def _send_lead_image(message: Message, article) -> None:
+    """Отправить главное изображение статьи (по file_id, если оно уже отправлялось)"""
+    if not config.LEAD_IMAGE_ENABLED or not article.image_url:
+        return
+
+    from utils import bold
+
+    file_id = await image_file_cache.get(article.image_url)
+    photos = [file_id, article.image_url] if file_id else [article.image_url]
+
+    for photo in photos:
+        try:
+            sent = await message.answer_photo(
+                photo=photo,
+                caption=bold(f"🖼 {article.title}"),
+                parse_mode=ParseMode.HTML
+            )
+        except TelegramBadRequest as e:
+            if photo == file_id:
+                # file_id больше не действует — загружаем заново по ссылке
+                await image_file_cache.forget(article.image_url)
+                continue
+            logger.warning(f"Не удалось отправить изображение {article.image_url}: {e}")
+            return
+        except TelegramAPIError as e:
+            # Изображение необязательно: статья уже показана
+            logger.warning(f"Не удалось отправить изображение {article.image_url}: {e}")
+            return
+
+        if photo != file_id and sent.photo:
+            await image_file_cache.remember(article.image_url, sent.photo[-1].file_id)
         return
 
+
+# ---------- Обработчик поиска термина (ОБНОВЛЕН с сохранением в БД) ----------
+@router.message(
+    StateFilter(SearchStates.waiting_for_term),
+    ~F.text.lower().in_(CANCEL_WORDS),
+    flags={"registration_required": True}
+)
+async def process_term(message: Message, state: FSMContext, user: User) -> None:
+    """Обработка введенного пользователем термина"""
     term = message.text.strip()
 
     if not term:
@@ -64,127 +136,105 @@ async def process_term(message: Message, state: FSMContext) -> None:
         )
         return
 
+    # Несколько терминов, по одному в строке — ищем все сразу
+    terms = _split_terms(term)
+    if len(terms) > 1:
+        try:
+            await _process_bulk(message, terms, user.language)
+        finally:
+            await state.clear()
+        return
+
     # Отправляем сообщение о начале поиска
     search_msg = await message.answer(
         get_search_started(term),
         parse_mode=ParseMode.HTML
     )
 
-    try:
-        loop = asyncio.get_event_loop()
-
-        # Поиск страницы в Википедии
-        search_results = await loop.run_in_executor(
-            None,
-            lambda: wikipedia.search(term, results=3)
-        )
+    # Поиск статьи на языке пользователя (кэш, выключатель, повторы
+    # и запасные языки внутри сервиса); предыдущий поиск пользователя отменяется
+    search = await search_registry.start(
+        message.from_user.id,
+        lambda: wiki.lookup_with_fallback(term, lang=user.language)
+    )
 
-        if not search_results:
-            # Сохраняем неудачный поиск в историю
-            await db.add_search_history(
-                telegram_id=message.from_user.id,
-                search_term=term,
-                success=False
-            )
+    try:
+        article = await search
 
-            await search_msg.edit_text(
-                get_search_not_found(term),
-                parse_mode=ParseMode.HTML,
-                reply_markup=back_keyboard()
-            )
-            await state.clear()
-            return
+        # Формируем ответ
+        response_text = _format_article(article, user.language)
 
-        # Берем первый результат
-        page_title = search_results[0]
+        # Сохраняем успешный поиск в историю
+        await db.add_search_history(
+            telegram_id=message.from_user.id,
+            search_term=term,
+            result_title=article.title,
+            result_url=article.url,
+            success=True
+        )
 
-        # Получаем информацию о странице
-        try:
-            page = await loop.run_in_executor(
-                None,
-                lambda: wikipedia.page(page_title, auto_suggest=False)
-            )
+        await search_msg.edit_text(
+            response_text,
+            parse_mode=ParseMode.HTML,
+            reply_markup=term_result_keyboard(article.url, wiki.reader_token(article))
+        )
 
-            summary = page.summary[:1500]
-            url = page.url
-
-            # Если summary слишком короткий
-            if len(summary) < 100:
-                try:
-                    page_content = await loop.run_in_executor(
-                        None,
-                        lambda: wikipedia.page(page_title, auto_suggest=True)
-                    )
-                    summary = page_content.summary[:1500]
-                except:
-                    pass
-
-            # Формируем ответ
-            response_text = get_search_result(page_title, summary)
-
-            # Обрезаем, если слишком длинный
-            if len(response_text) > 4000:
-                response_text = response_text[:4000] + "..."
-
-            # Сохраняем успешный поиск в историю
-            await db.add_search_history(
-                telegram_id=message.from_user.id,
-                search_term=term,
-                result_title=page_title,
-                result_url=url,
-                success=True
-            )
+        await _send_lead_image(message, article)
 
-            await search_msg.edit_text(
-                response_text,
-                parse_mode=ParseMode.HTML,
-                reply_markup=term_result_keyboard(url)
-            )
+        # Пока пользователь читает, загружаем вероятные следующие статьи
+        link_prefetcher.schedule(article, message.from_user.id)
 
-        except wikipedia.exceptions.DisambiguationError as e:
-            # Если термин неоднозначный
-            options = e.options[:5]
+    except asyncio.CancelledError:
+        if not search_registry.superseded(search):
+            raise
+        # Поиск заменен новым или отменен — сообщение о нем больше не нужно
+        await _delete_message(search_msg)
 
-            # Сохраняем неудачный поиск в историю (неоднозначность)
-            await db.add_search_history(
-                telegram_id=message.from_user.id,
-                search_term=term,
-                success=False
-            )
+    except AmbiguousTerm as e:
+        # Сохраняем неудачный поиск в историю (неоднозначность)
+        await db.add_search_history(
+            telegram_id=message.from_user.id,
+            search_term=term,
+            success=False
+        )
 
-            await search_msg.edit_text(
-                get_disambiguation_message(term, options),
-                parse_mode=ParseMode.HTML,
-                reply_markup=back_keyboard()
-            )
+        # Варианты — кнопками, их вступления загружаются в кэш заранее
+        token = wiki.remember_choices(e)
+        await search_msg.edit_text(
+            get_disambiguation_message(term, e.options),
+            parse_mode=ParseMode.HTML,
+            reply_markup=disambiguation_keyboard(token, e.options)
+        )
 
-        except wikipedia.exceptions.PageError:
-            # Сохраняем неудачный поиск в историю
-            await db.add_search_history(
-                telegram_id=message.from_user.id,
-                search_term=term,
-                success=False
-            )
+    except ArticleNotFound:
+        # Сохраняем неудачный поиск в историю
+        await db.add_search_history(
+            telegram_id=message.from_user.id,
+            search_term=term,
+            success=False
+        )
 
-            await search_msg.edit_text(
-                get_search_not_found(term),
-                parse_mode=ParseMode.HTML,
-                reply_markup=back_keyboard()
-            )
+        await search_msg.edit_text(
+            get_search_not_found(term),
+            parse_mode=ParseMode.HTML,
+            reply_markup=back_keyboard()
+        )
 
-        except Exception as e:
-            # Сохраняем неудачный поиск в историю
-            await db.add_search_history(
-                telegram_id=message.from_user.id,
-                search_term=term,
-                success=False
-            )
+    except LookupRejected:
+        # Планировщик перегружен — это не ошибка пользователя, историю не пишем
+        await search_msg.edit_text(
+            get_search_busy_message(),
+            parse_mode=ParseMode.HTML,
+            reply_markup=back_keyboard()
+        )
 
-            await search_msg.edit_text(
-                get_search_error(term, str(e)),
-                parse_mode=ParseMode.HTML,
-                reply_markup=back_keyboard()
-            )
+    except UpstreamUnavailable:
+        # Википедия недоступна, а в кэше ничего нет — отвечаем сразу, историю не пишем
+        await search_msg.edit_text(
+            get_search_unavailable_message(),
+            parse_mode=ParseMode.HTML,
+            reply_markup=back_keyboard()
+        )
 
     except Exception as e:
         # Сохраняем неудачный поиск в историю
@@ -201,9 +251,240 @@ async def process_term(message: Message, state: FSMContext) -> None:
         )
 
     finally:
+        search_registry.finish(message.from_user.id, search)
         await state.clear()
 
 
+async def _delete_message(message: Message) -> None:
+    """Удалить сообщение, если это еще возможно"""
+    with suppress(TelegramAPIError):
+        await message.delete()
+
+
+def _split_terms(text: str) -> list:
+    """Термины по строкам без пустых строк и повторов (не больше BULK_MAX_TERMS)"""
+    terms = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            terms.setdefault(ArticleCache.make_key(line), line)
+    return list(terms.values())[:config.BULK_MAX_TERMS]
+
+
+def _pack_pages(items: list, limit: int) -> list:
+    """Сгруппировать результаты в страницы не длиннее limit символов"""
+    pages, current, size = [], [], 0
+    for item in items:
+        if current and size + len(item) > limit:
+            pages.append(current)
+            current, size = [], 0
+        current.append(item)
+        size += len(item) + 2
+    if current:
+        pages.append(current)
+    return pages
+
+
+async def _process_bulk(message: Message, terms: list, language: str) -> None:
+    """Поиск нескольких терминов с одним сводным ответом"""
+    search_msg = await message.answer(
+        get_bulk_started(len(terms)),
+        parse_mode=ParseMode.HTML
+    )
+
+    search = await search_registry.start(
+        message.from_user.id,
+        lambda: wiki.lookup_many(terms, lang=language, concurrency=config.BULK_CONCURRENCY)
+    )
+    try:
+        results = await search
+    except asyncio.CancelledError:
+        if not search_registry.superseded(search):
+            raise
+        await _delete_message(search_msg)
+        return
+    finally:
+        search_registry.finish(message.from_user.id, search)
+
+    items, history = [], []
+    found = 0
+    for term, result in results:
+        if isinstance(result, Article):
+            found += 1
+            items.append(get_bulk_item(term, title=result.title, summary=result.summary))
+            history.append((term, result.title, result.url, True))
+        elif isinstance(result, AmbiguousTerm):
+            items.append(get_bulk_item(term, error="несколько значений, уточните запрос"))
+            history.append((term, None, None, False))
+        elif isinstance(result, ArticleNotFound):
+            items.append(get_bulk_item(term))
+            history.append((term, None, None, False))
+        elif isinstance(result, (LookupRejected, UpstreamUnavailable)):
+            # Как и при обычном поиске, в историю не пишем
+            items.append(get_bulk_item(term, error="Википедия недоступна, попробуйте позже"))
+        else:
+            items.append(get_bulk_item(term, error="ошибка поиска"))
+            history.append((term, None, None, False))
+
+    # Вся история — одной транзакцией
+    await db.add_search_history_batch(message.from_user.id, history)
+
+    pages = _pack_pages(items, config.BULK_PAGE_SIZE)
+    texts = [
+        get_bulk_page(page_items, found, len(terms), i, len(pages))
+        for i, page_items in enumerate(pages)
+    ]
+
+    if len(texts) == 1:
+        await search_msg.edit_text(texts[0], parse_mode=ParseMode.HTML, reply_markup=back_keyboard())
+        return
+
+    token = secrets.token_urlsafe(6)
+    bulk_results.set(token, texts)
+    await search_msg.edit_text(
+        texts[0],
+        parse_mode=ParseMode.HTML,
+        reply_markup=reader_keyboard(token, 0, len(texts), prefix="bulk")
+    )
+
+
+@router.callback_query(F.data.startswith("bulk:"))
+async def bulk_page_handler(callback: CallbackQuery) -> None:
+    """Обработка перелистывания сводного ответа"""
+    _, token, page = callback.data.split(":", 2)
+    texts = bulk_results.get(token)
+
+    if texts is None:
+        await callback.answer("Результаты устарели, повторите поиск", show_alert=True)
+        return
+
+    page = min(int(page), len(texts) - 1) if page.isdigit() else 0
+    await callback.message.edit_text(
+        texts[page],
+        parse_mode=ParseMode.HTML,
+        reply_markup=reader_keyboard(token, page, len(texts), prefix="bulk")
+    )
+    await callback.answer()
+
+
+# ---------- Выбор варианта неоднозначного термина ----------
+@router.callback_query(F.data.startswith("pick:"))
+async def disambiguation_pick_handler(callback: CallbackQuery) -> None:
+    """Обработка нажатия на вариант неоднозначного термина"""
+    _, token, index = callback.data.split(":", 2)
+    choice = wiki.get_choice(token, int(index)) if index.isdigit() else None
+
+    if choice is None:
+        await callback.answer(get_choice_expired_message(), show_alert=True)
+        return
+
+    term, lang, title = choice
+    await callback.answer()
+
+    # Обычно статья уже в кэше: вступления вариантов загружены заранее
+    search = await search_registry.start(
+        callback.from_user.id,
+        lambda: wiki.lookup_title(title, lang=lang)
+    )
+
+    try:
+        article = await search
+
+    except asyncio.CancelledError:
+        if not search_registry.superseded(search):
+            raise
+        # Пользователь уже ищет другое
+        return
+
+    except AmbiguousTerm as e:
+        token = wiki.remember_choices(e)
+        await callback.message.edit_text(
+            get_disambiguation_message(title, e.options),
+            parse_mode=ParseMode.HTML,
+            reply_markup=disambiguation_keyboard(token, e.options)
+        )
+        return
+
+    except ArticleNotFound:
+        await callback.message.edit_text(
+            get_search_not_found(title),
+            parse_mode=ParseMode.HTML,
+            reply_markup=back_keyboard()
+        )
+        return
+
+    except LookupRejected:
+        await callback.message.edit_text(
+            get_search_busy_message(),
+            parse_mode=ParseMode.HTML,
+            reply_markup=back_keyboard()
+        )
+        return
+
+    except UpstreamUnavailable:
+        await callback.message.edit_text(
+            get_search_unavailable_message(),
+            parse_mode=ParseMode.HTML,
+            reply_markup=back_keyboard()
+        )
+        return
+
+    finally:
+        search_registry.finish(callback.from_user.id, search)
+
+    # Уточненный поиск засчитываем исходному термину
+    await db.add_search_history(
+        telegram_id=callback.from_user.id,
+        search_term=term,
+        result_title=article.title,
+        result_url=article.url,
+        success=True
+    )
+
+    await callback.message.edit_text(
+        _format_article(article, lang),
+        parse_mode=ParseMode.HTML,
+        reply_markup=term_result_keyboard(article.url, wiki.reader_token(article))
+    )
+    await _send_lead_image(callback.message, article)
+    link_prefetcher.schedule(article, callback.from_user.id)
+
+
+# ---------- Чтение полной статьи в чате ----------
+@router.callback_query(F.data.startswith("read:"))
+async def read_page_handler(callback: CallbackQuery) -> None:
+    """Обработка перелистывания страниц статьи"""
+    _, token, page = callback.data.split(":", 2)
+
+    try:
+        # Текст загружается один раз, дальше страницы берутся из кэша
+        result = await wiki.read_page(token, int(page) if page.isdigit() else 0)
+    except ArticleNotFound:
+        await callback.answer("Полный текст статьи недоступен", show_alert=True)
+        return
+    except (LookupRejected, UpstreamUnavailable):
+        await callback.answer("Википедия сейчас недоступна, попробуйте позже", show_alert=True)
+        return
+
+    if result is None:
+        await callback.answer("Статья устарела, повторите поиск", show_alert=True)
+        return
+
+    title, url, text, page, total = result
+    await callback.message.edit_text(
+        get_reader_page(title, text, page, total),
+        parse_mode=ParseMode.HTML,
+        reply_markup=reader_keyboard(token, page, total, url)
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data == "read_position")
+async def read_position_handler(callback: CallbackQuery) -> None:
+    """Нажатие на номер страницы ничего не делает"""
+    await callback.answer()
+
+
 # ---------- Новые обработчики для профиля и истории ----------
 @router.callback_query(F.data == "history")
 async def history_handler(callback: CallbackQuery) -> None:
@@ -297,22 +578,9 @@ async def back_main_handler(callback: CallbackQuery, state: FSMContext) -> None:
     await callback.answer()
 
 
-@router.callback_query(F.data == "term_search")
+@router.callback_query(F.data == "term_search", flags={"registration_required": True})
 async def term_search_handler(callback: CallbackQuery, state: FSMContext) -> None:
     """Обработка кнопки 'Термин' - запрашиваем ввод термина"""
-    # Проверяем регистрацию пользователя
-    user = await db.get_user_profile(callback.from_user.id)
-
-    if not user or not user.is_registered:
-        await callback.message.edit_text(
-            "⚠️ <b>Сначала нужно завершить регистрацию!</b>\n\n"
-            "Используйте команду /start для регистрации.",
-            parse_mode=ParseMode.HTML,
-            reply_markup=back_keyboard()
-        )
-        await callback.answer("Требуется регистрация")
-        return
-
     await callback.message.edit_text(
         get_search_prompt(),
         parse_mode=ParseMode.HTML,
@@ -379,22 +647,9 @@ async def faq_handler(callback: CallbackQuery) -> None:
 
 
 # ---------- Обработчик кнопки "Профиль" ----------
-@router.callback_query(F.data == "profile")
-async def profile_handler(callback: CallbackQuery) -> None:
+@router.callback_query(F.data == "profile", flags={"registration_required": True})
+async def profile_handler(callback: CallbackQuery, user: User) -> None:
     """Обработка кнопки 'Профиль' в главном меню"""
-    # Проверяем регистрацию пользователя
-    user = await db.get_user_profile(callback.from_user.id)
-
-    if not user or not user.is_registered:
-        await callback.message.edit_text(
-            "⚠️ <b>Сначала нужно завершить регистрацию!</b>\n\n"
-            "Используйте команду /start для регистрации.",
-            parse_mode=ParseMode.HTML,
-            reply_markup=back_keyboard()
-        )
-        await callback.answer("Требуется регистрация")
-        return
-
     # Показываем профиль пользователя
     profile_text = format_user_profile(user)
 
@@ -407,7 +662,7 @@ async def profile_handler(callback: CallbackQuery) -> None:
 
 
 # ---------- Настройки ----------
-@router.callback_query(F.data.in_(["notifications", "language", "theme"]))
+@router.callback_query(F.data.in_(["notifications", "theme"]))
 async def settings_options_handler(callback: CallbackQuery) -> None:
     """Обработка опций настроек"""
     from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
@@ -425,13 +680,62 @@ async def settings_options_handler(callback: CallbackQuery) -> None:
     await callback.answer()
 
 
+def _language_options() -> list:
+    """Доступные языки поиска: пары (код, название)"""
+    return [(lang, get_language_name(lang)) for lang in config.WIKI_LANGUAGES]
+
+
+@router.callback_query(F.data == "language")
+async def language_handler(callback: CallbackQuery, user: Optional[User]) -> None:
+    """Обработка выбора языка поиска"""
+    current = user.language if user else config.WIKI_DEFAULT_LANGUAGE
+
+    await callback.message.edit_text(
+        get_language_settings_message(current),
+        parse_mode=ParseMode.HTML,
+        reply_markup=language_menu(_language_options(), current)
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("set_language:"))
+async def set_language_handler(callback: CallbackQuery, user: Optional[User]) -> None:
+    """Сохранение языка поиска"""
+    lang = callback.data.split(":", 1)[1]
+
+    if lang not in config.WIKI_LANGUAGES:
+        await callback.answer("Язык недоступен")
+        return
+
+    if not user:
+        await callback.answer("Сначала завершите регистрацию: /start")
+        return
+
+    if user.language == lang:
+        # Повторное нажатие: сообщение не изменится, Telegram вернул бы ошибку
+        await callback.answer()
+        return
+
+    await db.update_user_language(callback.from_user.id, lang)
+
+    await callback.message.edit_text(
+        get_language_settings_message(lang),
+        parse_mode=ParseMode.HTML,
+        reply_markup=language_menu(_language_options(), lang)
+    )
+    await callback.answer(f"Язык поиска: {get_language_name(lang)}")
+
+
 # ---------- Отмена поиска ----------
-@router.message(F.text.lower().in_(["отмена", "cancel", "стоп"]))
+@router.message(F.text.lower().in_(CANCEL_WORDS))
 async def cancel_search_handler(message: Message, state: FSMContext) -> None:
     """Обработка команды отмены поиска"""
     current_state = await state.get_state()
 
-    if current_state == SearchStates.waiting_for_term:
+    # Выполняющийся поиск прерываем, даже если термин уже введен
+    cancelled = await search_registry.cancel(message.from_user.id)
+
+    if current_state == SearchStates.waiting_for_term or cancelled:
         await state.clear()
         await message.answer(
             get_cancel_search_message(),
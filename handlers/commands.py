@@ -1,8 +1,9 @@
-from aiogram import Router
+from aiogram import Bot, Router
 from aiogram.filters import Command, CommandStart
 from aiogram.types import Message, ReplyKeyboardRemove
 from aiogram.enums import ParseMode
 from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import BaseStorage
 
 from keyboards import main_menu, back_keyboard, back_to_profile_keyboard, profile_keyboard
 from utils import (
@@ -11,7 +12,7 @@ from utils import (
     format_user_profile,
     RegistrationStates,
 )
-from database import db
+from database import db, User
 from config import config
 
 router = Router()
@@ -51,147 +52,100 @@ async def command_start_handler(message: Message, state: FSMContext) -> None:
         await state.set_state(RegistrationStates.waiting_for_first_name)
 
 
-@router.message(Command("menu"))
+@router.message(Command("menu"), flags={"registration_required": True})
 async def command_menu_handler(message: Message) -> None:
     """Обработка команды /menu"""
-    # Проверяем регистрацию
-    user = await db.get_user_profile(message.from_user.id)
+    from utils import get_main_menu_text
 
-    if user and user.is_registered:
-        from utils import get_main_menu_text
-
-        await message.answer(
-            get_main_menu_text(),
-            parse_mode=ParseMode.HTML,
-            reply_markup=main_menu()
-        )
-    else:
-        await message.answer(
-            "⚠️ <b>Сначала нужно завершить регистрацию!</b>\n\n"
-            "Используйте команду /start для регистрации.",
-            parse_mode=ParseMode.HTML
-        )
+    await message.answer(
+        get_main_menu_text(),
+        parse_mode=ParseMode.HTML,
+        reply_markup=main_menu()
+    )
 
 
-@router.message(Command("help"))
+@router.message(Command("help"), flags={"registration_required": True})
 async def command_help_handler(message: Message) -> None:
     """Обработка команды /help"""
-    # Проверяем регистрацию
-    user = await db.get_user_profile(message.from_user.id)
-
-    if user and user.is_registered:
-        await message.answer(
-            get_help_message(),
-            parse_mode=ParseMode.HTML,
-            reply_markup=back_keyboard()
-        )
-    else:
-        await message.answer(
-            "⚠️ <b>Сначала нужно завершить регистрацию!</b>\n\n"
-            "Используйте команду /start для регистрации.",
-            parse_mode=ParseMode.HTML
-        )
+    await message.answer(
+        get_help_message(),
+        parse_mode=ParseMode.HTML,
+        reply_markup=back_keyboard()
+    )
 
 
-@router.message(Command("profile"))
-async def command_profile_handler(message: Message) -> None:
+@router.message(Command("profile"), flags={"registration_required": True})
+async def command_profile_handler(message: Message, user: User) -> None:
     """Обработка команды /profile - просмотр профиля"""
-    user = await db.get_user_profile(message.from_user.id)
-
-    if user and user.is_registered:
-        profile_text = format_user_profile(user)
+    profile_text = format_user_profile(user)
 
-        await message.answer(
-            profile_text,
-            parse_mode=ParseMode.HTML,
-            reply_markup=profile_keyboard()
-        )
-    else:
-        await message.answer(
-            "⚠️ <b>Профиль не найден!</b>\n\n"
-            "Используйте команду /start для регистрации.",
-            parse_mode=ParseMode.HTML
-        )
+    await message.answer(
+        profile_text,
+        parse_mode=ParseMode.HTML,
+        reply_markup=profile_keyboard()
+    )
 
 
-@router.message(Command("history"))
+@router.message(Command("history"), flags={"registration_required": True})
 async def command_history_handler(message: Message) -> None:
     """Обработка команды /history - история поиска"""
-    user = await db.get_user_profile(message.from_user.id)
-
-    if user and user.is_registered:
-        history = await db.get_user_search_history(message.from_user.id, limit=5)
+    history = await db.get_user_search_history(message.from_user.id, limit=5)
 
-        if history:
-            from utils import format_search_history_item
+    if history:
+        from utils import format_search_history_item
 
-            history_text = "<b>📜 История ваших поисков:</b>\n\n"
-            for i, item in enumerate(history, 1):
-                history_text += f"<b>{i}.</b>\n{format_search_history_item(item)}\n\n"
+        history_text = "<b>📜 История ваших поисков:</b>\n\n"
+        for i, item in enumerate(history, 1):
+            history_text += f"<b>{i}.</b>\n{format_search_history_item(item)}\n\n"
 
-            await message.answer(
-                history_text,
-                parse_mode=ParseMode.HTML,
-                reply_markup=back_to_profile_keyboard()  # Меняем на back_to_profile
-            )
-        else:
-            await message.answer(
-                "📭 <b>История поиска пуста</b>\n\n"
-                "Вы еще не выполняли поиск терминов.",
-                parse_mode=ParseMode.HTML,
-                reply_markup=back_to_profile_keyboard()  # Меняем на back_to_profile
-            )
+        await message.answer(
+            history_text,
+            parse_mode=ParseMode.HTML,
+            reply_markup=back_to_profile_keyboard()  # Меняем на back_to_profile
+        )
     else:
         await message.answer(
-            "⚠️ <b>Сначала нужно завершить регистрацию!</b>\n\n"
-            "Используйте команду /start для регистрации.",
-            parse_mode=ParseMode.HTML
+            "📭 <b>История поиска пуста</b>\n\n"
+            "Вы еще не выполняли поиск терминов.",
+            parse_mode=ParseMode.HTML,
+            reply_markup=back_to_profile_keyboard()  # Меняем на back_to_profile
         )
 
 
-@router.message(Command("stats"))
-async def command_stats_handler(message: Message) -> None:
+@router.message(Command("stats"), flags={"registration_required": True})
+async def command_stats_handler(message: Message, user: User) -> None:
     """Обработка команды /stats - статистика пользователя"""
-    user = await db.get_user_profile(message.from_user.id)
-
-    if user and user.is_registered:
-        user_stats = await db.get_user_stats(message.from_user.id)
+    user_stats = await db.get_user_stats(message.from_user.id)
 
-        if user_stats:
-            from utils import bold, code
+    if user_stats:
+        from utils import bold, code
 
-            stats_text = f"{bold('📊 Ваша статистика:')}\n\n"
-            stats_text += f"{bold('👤 Пользователь:')} {user.first_name or 'Не указано'}\n"
-            stats_text += f"{bold('🔍 Всего поисков:')} {user_stats['total_searches']}\n"
-            stats_text += f"{bold('✅ Успешных:')} {user_stats['successful_searches']}\n"
+        stats_text = f"{bold('📊 Ваша статистика:')}\n\n"
+        stats_text += f"{bold('👤 Пользователь:')} {user.first_name or 'Не указано'}\n"
+        stats_text += f"{bold('🔍 Всего поисков:')} {user_stats['total_searches']}\n"
+        stats_text += f"{bold('✅ Успешных:')} {user_stats['successful_searches']}\n"
 
-            # Даты уже отформатированы в базе данных
-            if user_stats.get('first_search'):
-                stats_text += f"{bold('📅 Первый поиск:')} {user_stats['first_search']}\n"
+        # Даты уже отформатированы в базе данных
+        if user_stats.get('first_search'):
+            stats_text += f"{bold('📅 Первый поиск:')} {user_stats['first_search']}\n"
 
-            if user_stats.get('last_search'):
-                stats_text += f"{bold('⏰ Последний поиск:')} {user_stats['last_search']}\n"
+        if user_stats.get('last_search'):
+            stats_text += f"{bold('⏰ Последний поиск:')} {user_stats['last_search']}\n"
 
-            if user_stats.get('popular_terms'):
-                stats_text += f"\n{bold('🏆 Ваши популярные запросы:')}\n"
-                for i, (term, count) in enumerate(user_stats['popular_terms'], 1):
-                    stats_text += f"{i}. {code(term)} — {count}\n"
+        if user_stats.get('popular_terms'):
+            stats_text += f"\n{bold('🏆 Ваши популярные запросы:')}\n"
+            for i, (term, count) in enumerate(user_stats['popular_terms'], 1):
+                stats_text += f"{i}. {code(term)} — {count}\n"
 
-            await message.answer(
-                stats_text,
-                parse_mode=ParseMode.HTML,
-                reply_markup=back_to_profile_keyboard()
-            )
-    else:
         await message.answer(
-            "⚠️ <b>Сначала нужно завершить регистрацию!</b>\n\n"
-            "Используйте команду /start для регистрации.",
-            parse_mode=ParseMode.HTML
+            stats_text,
+            parse_mode=ParseMode.HTML,
+            reply_markup=back_to_profile_keyboard()
         )
 
 
 @router.message(Command("admin_stats"))
-async def command_admin_stats_handler(message: Message) -> None:
+async def command_admin_stats_handler(message: Message, bot: Bot, fsm_storage: BaseStorage) -> None:
     """Обработка команды /admin_stats - статистика бота (только для админов)"""
     if message.from_user.id not in config.ADMIN_IDS:
         await message.answer(
@@ -202,10 +156,17 @@ async def command_admin_stats_handler(message: Message) -> None:
         return
 
     stats = await db.get_bot_stats()
-    from utils import format_bot_stats
+    from utils import format_bot_stats, format_fsm_stats, format_lookup_stats, format_outbound_stats
+    from services import wiki
+
+    text = format_bot_stats(stats) + "\n\n" + format_lookup_stats(wiki.stats())
+    if hasattr(fsm_storage, "stats"):
+        text += "\n\n" + format_fsm_stats(fsm_storage.stats())
+    if hasattr(bot.session, "stats"):
+        text += "\n\n" + format_outbound_stats(bot.session.stats())
 
     await message.answer(
-        format_bot_stats(stats),
+        text,
         parse_mode=ParseMode.HTML,
         reply_markup=back_keyboard()
     )
@@ -0,0 +1,40 @@
+"""
+Инлайн-режим: подсказки заголовков статей по мере ввода
+
+Подсказки берутся из индекса префиксов в памяти, поэтому ответ не
+требует запросов ни к Википедии, ни к базе данных. Инлайн-режим нужно
+включить у @BotFather (/setinline).
+"""
+import hashlib
+
+from aiogram import Router
+from aiogram.enums import ParseMode
+from aiogram.types import InlineQuery, InlineQueryResultArticle, InputTextMessageContent
+
+from config import config
+from services import wiki
+from utils import get_inline_result_text
+
+router = Router()
+
+
+@router.inline_query()
+async def inline_query_handler(inline_query: InlineQuery) -> None:
+    """Подсказки заголовков для инлайн-запроса"""
+    suggestions = wiki.suggest(inline_query.query, limit=config.INLINE_RESULTS)
+
+    results = [
+        InlineQueryResultArticle(
+            id=hashlib.md5(article.title.encode("utf-8")).hexdigest(),
+            title=article.title,
+            description=article.summary[:100] if article.summary else None,
+            url=article.url,
+            input_message_content=InputTextMessageContent(
+                message_text=get_inline_result_text(article.title, article.summary, article.url),
+                parse_mode=ParseMode.HTML
+            )
+        )
+        for article in suggestions
+    ]
+
+    await inline_query.answer(results, cache_time=config.INLINE_CACHE_TIME, is_personal=False)
@@ -1,6 +1,9 @@
 """
 Обработчики регистрации и профиля пользователя
 """
+from datetime import datetime
+from typing import Optional
+
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.filters import StateFilter
@@ -16,11 +19,24 @@ from utils import (
     validate_email,
     validate_age
 )
-from database import db
+from database import db, User
+from services.registered import registered_users
 from config import config
 
 router = Router()
 
+
+def _apply_profile_update(user: User, **fields) -> User:
+    """Отразить в загруженном профиле изменения, сохраненные update_user_profile"""
+    for name, value in fields.items():
+        if value is not None:
+            setattr(user, name, value)
+    user.is_registered = True
+    user.last_activity = datetime.now()
+    registered_users.add(user.telegram_id)
+    return user
+
+
 # ---------- Обработчики регистрации ----------
 @router.message(StateFilter(RegistrationStates.waiting_for_first_name))
 async def process_first_name(message: Message, state: FSMContext) -> None:
@@ -102,7 +118,7 @@ async def process_email(message: Message, state: FSMContext) -> None:
     await state.set_state(RegistrationStates.waiting_for_age)
 
 @router.message(StateFilter(RegistrationStates.waiting_for_age))
-async def process_age(message: Message, state: FSMContext) -> None:
+async def process_age(message: Message, state: FSMContext, user: Optional[User]) -> None:
     """Обработка ввода возраста и завершение регистрации"""
     age = None
     if message.text.lower() != "пропустить":
@@ -118,16 +134,16 @@ async def process_age(message: Message, state: FSMContext) -> None:
     user_data = await state.get_data()
 
     # Сохраняем профиль в базу данных
-    success = await db.update_user_profile(
-        telegram_id=message.from_user.id,
+    profile = dict(
         email=user_data.get('email'),
         age=age,
         first_name=user_data.get('first_name'),
         last_name=user_data.get('last_name')
     )
+    success = user is not None and await db.update_user_profile(telegram_id=message.from_user.id, **profile)
 
     if success:
-        user = await db.get_user_profile(message.from_user.id)
+        _apply_profile_update(user, **profile)
 
         await message.answer(
             "✅ <b>Регистрация завершена!</b>\n\n"
@@ -213,10 +229,9 @@ async def edit_age_handler(callback: CallbackQuery, state: FSMContext) -> None:
     await callback.answer()
 
 @router.callback_query(F.data == "back_to_profile")
-async def back_to_profile_handler(callback: CallbackQuery, state: FSMContext) -> None:
+async def back_to_profile_handler(callback: CallbackQuery, state: FSMContext, user: Optional[User]) -> None:
     """Возврат к профилю"""
     await state.clear()
-    user = await db.get_user_profile(callback.from_user.id)
 
     if user:
         profile_text = format_user_profile(user)
@@ -229,7 +244,7 @@ async def back_to_profile_handler(callback: CallbackQuery, state: FSMContext) ->
 
 # ---------- Обработчики сохранения изменений профиля ----------
 @router.message(StateFilter(ProfileStates.editing_first_name))
-async def save_first_name(message: Message, state: FSMContext) -> None:
+async def save_first_name(message: Message, state: FSMContext, user: Optional[User]) -> None:
     """Сохранение нового имени"""
     if len(message.text.strip()) < 2:
         await message.answer(
@@ -238,13 +253,13 @@ async def save_first_name(message: Message, state: FSMContext) -> None:
         )
         return
 
-    success = await db.update_user_profile(
+    success = user is not None and await db.update_user_profile(
         telegram_id=message.from_user.id,
         first_name=message.text.strip()
     )
 
     if success:
-        user = await db.get_user_profile(message.from_user.id)
+        _apply_profile_update(user, first_name=message.text.strip())
         profile_text = format_user_profile(user)
 
         await message.answer(
@@ -265,15 +280,15 @@ async def save_first_name(message: Message, state: FSMContext) -> None:
     await state.clear()
 
 @router.message(StateFilter(ProfileStates.editing_last_name))
-async def save_last_name(message: Message, state: FSMContext) -> None:
+async def save_last_name(message: Message, state: FSMContext, user: Optional[User]) -> None:
     """Сохранение новой фамилии"""
-    success = await db.update_user_profile(
+    success = user is not None and await db.update_user_profile(
         telegram_id=message.from_user.id,
         last_name=message.text.strip()
     )
 
     if success:
-        user = await db.get_user_profile(message.from_user.id)
+        _apply_profile_update(user, last_name=message.text.strip())
         profile_text = format_user_profile(user)
 
         await message.answer(
@@ -294,7 +309,7 @@ async def save_last_name(message: Message, state: FSMContext) -> None:
     await state.clear()
 
 @router.message(StateFilter(ProfileStates.editing_email))
-async def save_email(message: Message, state: FSMContext) -> None:
+async def save_email(message: Message, state: FSMContext, user: Optional[User]) -> None:
     """Сохранение нового email"""
     email = message.text.strip()
     if not validate_email(email):
@@ -304,13 +319,13 @@ async def save_email(message: Message, state: FSMContext) -> None:
         )
         return
 
-    success = await db.update_user_profile(
+    success = user is not None and await db.update_user_profile(
         telegram_id=message.from_user.id,
         email=email
     )
 
     if success:
-        user = await db.get_user_profile(message.from_user.id)
+        _apply_profile_update(user, email=email)
         profile_text = format_user_profile(user)
 
         await message.answer(
@@ -331,7 +346,7 @@ async def save_email(message: Message, state: FSMContext) -> None:
     await state.clear()
 
 @router.message(StateFilter(ProfileStates.editing_age))
-async def save_age(message: Message, state: FSMContext) -> None:
+async def save_age(message: Message, state: FSMContext, user: Optional[User]) -> None:
     """Сохранение нового возраста"""
     age = validate_age(message.text.strip())
     if age is None:
@@ -341,13 +356,13 @@ async def save_age(message: Message, state: FSMContext) -> None:
         )
         return
 
-    success = await db.update_user_profile(
+    success = user is not None and await db.update_user_profile(
         telegram_id=message.from_user.id,
         age=age
     )
 
     if success:
-        user = await db.get_user_profile(message.from_user.id)
+        _apply_profile_update(user, age=age)
         profile_text = format_user_profile(user)
 
         await message.answer(
@@ -422,6 +437,8 @@ async def admin_confirm_delete_handler(callback: CallbackQuery) -> None:
 
     # Выполняем удаление данных
     success = await db.delete_user_data(target_user_id)
+    if success:
+        registered_users.discard(target_user_id)
 
     if success:
         # Получаем статистику для обновления информации
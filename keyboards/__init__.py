@@ -1,5 +1,5 @@
-from .main_menu import main_menu, back_keyboard, term_result_keyboard
-from .inline_navigation import settings_menu, pagination_menu
+from .main_menu import main_menu, back_keyboard, term_result_keyboard, disambiguation_keyboard, reader_keyboard, broadcast_keyboard
+from .inline_navigation import settings_menu, language_menu, pagination_menu
 from .registration import (
     registration_keyboard,
     profile_keyboard,
@@ -12,7 +12,11 @@ __all__ = [
     'main_menu',
     'back_keyboard',
     'term_result_keyboard',
+    'disambiguation_keyboard',
+    'reader_keyboard',
+    'broadcast_keyboard',
     'settings_menu',
+    'language_menu',
     'pagination_menu',
     'registration_keyboard',
     'profile_keyboard',
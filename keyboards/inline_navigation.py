@@ -1,3 +1,5 @@
+from typing import List, Tuple
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 def settings_menu() -> InlineKeyboardMarkup:
@@ -11,6 +13,19 @@ def settings_menu() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
+def language_menu(languages: List[Tuple[str, str]], current: str) -> InlineKeyboardMarkup:
+    """Выбор языка поиска: пары (код, название), текущий отмечен галочкой"""
+    keyboard = [
+        [InlineKeyboardButton(
+            text=f"✅ {name}" if code == current else name,
+            callback_data=f"set_language:{code}"
+        )]
+        for code, name in languages
+    ]
+    keyboard.append([InlineKeyboardButton(text="⚙️ Назад к настройкам", callback_data="settings")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
 def pagination_menu(page: int = 1) -> InlineKeyboardMarkup:
     """Меню с пагинацией (пример)"""
     items_per_page = 5
@@ -28,7 +28,7 @@ def back_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def term_result_keyboard(wikipedia_url: str = None) -> InlineKeyboardMarkup:
+def term_result_keyboard(wikipedia_url: str = None, read_token: str = None) -> InlineKeyboardMarkup:
     """Клавиатура для результата поиска термина"""
     keyboard = [
         [InlineKeyboardButton(text="🔙 Назад", callback_data="back_main")]
@@ -42,4 +42,57 @@ def term_result_keyboard(wikipedia_url: str = None) -> InlineKeyboardMarkup:
             )
         ])
 
-    return InlineKeyboardMarkup(inline_keyboard=keyboard)
\ No newline at end of file
+    if read_token:
+        keyboard.insert(0, [
+            InlineKeyboardButton(
+                text="📄 Читать в чате",
+                callback_data=f"read:{read_token}:0"
+            )
+        ])
+
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+def reader_keyboard(token: str, page: int, total: int, wikipedia_url: str = None,
+                    prefix: str = "read") -> InlineKeyboardMarkup:
+    """Клавиатура постраничного просмотра (prefix — префикс callback_data страниц)"""
+    navigation = []
+    if page > 0:
+        navigation.append(InlineKeyboardButton(text="⬅️", callback_data=f"{prefix}:{token}:{page - 1}"))
+
+    navigation.append(InlineKeyboardButton(text=f"{page + 1}/{total}", callback_data="read_position"))
+
+    if page < total - 1:
+        navigation.append(InlineKeyboardButton(text="➡️", callback_data=f"{prefix}:{token}:{page + 1}"))
+
+    keyboard = [navigation]
+    if wikipedia_url:
+        keyboard.append([InlineKeyboardButton(text="📖 Открыть в Википедии", url=wikipedia_url)])
+    keyboard.append([InlineKeyboardButton(text="🔙 Назад", callback_data="back_main")])
+
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+def disambiguation_keyboard(token: str, options: list) -> InlineKeyboardMarkup:
+    """Клавиатура с вариантами неоднозначного термина"""
+    keyboard = [
+        [InlineKeyboardButton(
+            text=option if len(option) <= 60 else option[:57] + "...",
+            callback_data=f"pick:{token}:{i}"
+        )]
+        for i, option in enumerate(options)
+    ]
+    keyboard.append([InlineKeyboardButton(text="🔙 Назад", callback_data="back_main")])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+def broadcast_keyboard(broadcast_id: int, confirm: bool = True) -> InlineKeyboardMarkup:
+    """Клавиатура рассылки: подтверждение черновика или остановка идущей"""
+    keyboard = []
+    if confirm:
+        keyboard.append([InlineKeyboardButton(text="✅ Отправить", callback_data=f"broadcast_confirm:{broadcast_id}")])
+    keyboard.append([InlineKeyboardButton(
+        text="❌ Отмена" if confirm else "⏹ Остановить",
+        callback_data=f"broadcast_cancel:{broadcast_id}"
+    )])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
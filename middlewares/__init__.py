@@ -0,0 +1,10 @@
+from .in_flight import InFlightMiddleware
+from .event_isolation import EventIsolationMiddleware
+from .boot_timing import BootTimingMiddleware
+from .user_context import UserContextMiddleware, UserMiddleware
+from .registration_gate import RegistrationGateMiddleware
+
+__all__ = [
+    'InFlightMiddleware', 'EventIsolationMiddleware', 'BootTimingMiddleware',
+    'UserContextMiddleware', 'UserMiddleware', 'RegistrationGateMiddleware'
+]
@@ -0,0 +1,30 @@
+"""
+Время до первого обновления после запуска
+"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from services.boot import boot_timer
+
+
+class BootTimingMiddleware(BaseMiddleware):
+    """Внешний middleware обновлений: отмечает получение и обработку первого обновления"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        if boot_timer.first_update_seen:
+            return await handler(event, data)
+
+        boot_timer.first_update_seen = True
+        boot_timer.mark("ожидание первого обновления")
+        try:
+            return await handler(event, data)
+        finally:
+            boot_timer.mark("обработка первого обновления")
+            boot_timer.report()
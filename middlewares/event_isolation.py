@@ -0,0 +1,44 @@
+"""
+Блокировка обработки событий одного пользователя между процессами
+"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.fsm.storage.base import BaseEventIsolation
+from aiogram.types import TelegramObject, Update
+
+from services.metrics import metrics
+from services.searches import interrupts_search
+
+
+class EventIsolationMiddleware(BaseMiddleware):
+    """
+    Внешний middleware обновлений: события пользователя обрабатываются по одному
+
+    В отличие от events_isolation диспетчера, отмена поиска и новый термин
+    проходят без блокировки: блокировку держит текущий поиск, а такие
+    сообщения должны его прервать.
+    """
+
+    def __init__(self, isolation: BaseEventIsolation):
+        self.isolation = isolation
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        state = data.get("state")
+        if state is None:
+            return await handler(event, data)
+
+        message = event.message if isinstance(event, Update) else None
+        if message is not None and interrupts_search(message.text, data.get("raw_state")):
+            metrics.inc("event_isolation_bypassed")
+            return await handler(event, data)
+
+        async with self.isolation.lock(key=state.key):
+            # Пока ждали блокировку, состояние мог изменить другой процесс
+            data["raw_state"] = await state.get_state()
+            return await handler(event, data)
@@ -0,0 +1,25 @@
+"""
+Учет обрабатываемых обновлений для плавного выключения
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from services.shutdown import in_flight
+
+
+class InFlightMiddleware(BaseMiddleware):
+    """Внешний middleware обновлений: задачу обработки дождутся при выключении"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        task = asyncio.current_task()
+        if task is not None:
+            in_flight.track(task)
+        return await handler(event, data)
@@ -0,0 +1,66 @@
+"""
+Проверка регистрации для обработчиков с флагом registration_required
+"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.enums import ParseMode
+from aiogram.types import CallbackQuery, TelegramObject
+
+from database import db
+from keyboards import back_keyboard
+from services.metrics import metrics
+from services.registered import registered_users
+from utils import get_registration_required_message
+
+
+class RegistrationGateMiddleware(BaseMiddleware):
+    """
+    Внутренний middleware событий: незарегистрированный пользователь
+    получает просьбу пройти регистрацию, обработчик не вызывается
+
+    Ответ берется из множества registered_users (без обращения к БД).
+    Если профиль уже загружен для обработчика (аргумент user), решает
+    он — заодно исправляя множество, если регистрация изменилась в
+    другом процессе.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        from_user = data.get("event_from_user")
+        if not get_flag(data, "registration_required") or from_user is None:
+            return await handler(event, data)
+
+        if "user" in data:
+            user = data["user"]
+            registered = bool(user and user.is_registered)
+            if registered:
+                registered_users.add(from_user.id)
+            else:
+                registered_users.forget(from_user.id)
+        else:
+            registered = registered_users.contains(from_user.id)
+            if registered is None:
+                # Множество еще загружается
+                metrics.inc("registration_gate_db_fallback")
+                user = await db.get_user_profile(from_user.id)
+                registered = bool(user and user.is_registered)
+
+        if registered:
+            return await handler(event, data)
+
+        metrics.inc("registration_gate_rejected")
+        if isinstance(event, CallbackQuery):
+            await event.message.edit_text(
+                get_registration_required_message(),
+                parse_mode=ParseMode.HTML,
+                reply_markup=back_keyboard()
+            )
+            await event.answer("Требуется регистрация")
+        else:
+            await event.answer(get_registration_required_message(), parse_mode=ParseMode.HTML)
@@ -0,0 +1,72 @@
+"""
+Профиль пользователя для обработчиков: загружается не больше одного раза
+на обновление и только для обработчиков, которым он нужен
+"""
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from config import config
+from database import db, start_db_call_count
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class UserContextMiddleware(BaseMiddleware):
+    """
+    Внешний middleware обновлений: область одного обновления
+
+    Считает обращения к БД за время обработки (метрика
+    db_calls_per_update, при DEBUG — в лог) и хранит загруженный профиль,
+    чтобы повторно его не запрашивать.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: Dict[str, Any]
+    ) -> Any:
+        counter = start_db_call_count()
+        data["user_context"] = {}
+
+        try:
+            return await handler(event, data)
+        finally:
+            metrics.observe("db_calls_per_update", counter[0])
+            logger.log(
+                logging.INFO if config.DEBUG else logging.DEBUG,
+                f"Обновление {event.update_id} ({event.event_type}): запросов к БД — {counter[0]}"
+            )
+
+
+class UserMiddleware(BaseMiddleware):
+    """
+    Внутренний middleware событий: передает аргумент user (User или None,
+    если пользователя нет в БД) обработчикам, которые его объявляют
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        handler_object = data.get("handler")
+        wants_user = handler_object is not None and (
+            "user" in handler_object.params or handler_object.varkw
+        )
+        from_user = data.get("event_from_user")
+
+        if wants_user and from_user is not None:
+            context = data.setdefault("user_context", {})
+            if "user" not in context:
+                context["user"] = await db.get_user_profile(from_user.id)
+            data["user"] = context["user"]
+        elif wants_user:
+            data["user"] = None
+
+        return await handler(event, data)
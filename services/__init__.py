@@ -0,0 +1,24 @@
+from .metrics import Metrics, metrics
+from .scheduler import LookupScheduler, LookupRejected, lookup_scheduler
+from .breaker import CircuitBreaker
+from .cache import ArticleCache
+from .singleflight import SingleFlight
+from .lookup import (
+    Article,
+    WikiError,
+    ArticleNotFound,
+    AmbiguousTerm,
+    UpstreamUnavailable,
+    WikiService,
+    wiki
+)
+
+__all__ = [
+    'Metrics', 'metrics',
+    'LookupScheduler', 'LookupRejected', 'lookup_scheduler',
+    'CircuitBreaker',
+    'ArticleCache',
+    'SingleFlight',
+    'Article', 'WikiError', 'ArticleNotFound', 'AmbiguousTerm', 'UpstreamUnavailable',
+    'WikiService', 'wiki'
+]
@@ -0,0 +1,45 @@
+"""
+Время запуска бота по этапам: от импорта модулей до первого обработанного обновления
+"""
+import logging
+import time
+from typing import List, Tuple
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class BootTimer:
+    """Отметки этапов запуска; разбивка пишется в лог после первого обновления"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self._last = self.started
+        self.phases: List[Tuple[str, float]] = []
+        self.first_update_seen = False
+
+    def start(self, started: float) -> None:
+        """Вести отсчет с момента started (по time.monotonic)"""
+        self.started = self._last = started
+        self.phases.clear()
+
+    def mark(self, phase: str) -> None:
+        """Завершить этап phase (длительность — с предыдущей отметки)"""
+        now = time.monotonic()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self) -> float:
+        """Записать в лог и в метрики время до первого обновления"""
+        total = self._last - self.started
+        metrics.set_gauge("boot_time_to_first_update", total)
+        logger.info(
+            f"Первое обновление обработано через {total:.2f} с после запуска: "
+            + ", ".join(f"{phase} {duration:.2f} с" for phase, duration in self.phases)
+        )
+        return total
+
+
+# Создаем глобальный учет этапов запуска
+boot_timer = BootTimer()
@@ -0,0 +1,96 @@
+"""
+Автоматический выключатель (circuit breaker) для внешних запросов
+"""
+import time
+
+from .metrics import metrics
+
+
+class CircuitBreaker:
+    """
+    Выключатель с тремя состояниями:
+
+    closed    — запросы идут как обычно, ошибки подсчитываются
+    open      — после failure_threshold ошибок подряд запросы сразу отклоняются
+    half_open — через reset_timeout пропускается пробный запрос;
+                успех замыкает выключатель, ошибка снова размыкает
+
+    Каждый разрешенный запрос должен закончиться record_success,
+    record_failure или release (исход неизвестен), иначе пробный
+    слот останется занятым и выключатель не выйдет из half_open.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    _STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._publish()
+
+    def _publish(self) -> None:
+        metrics.set_gauge(f"{self.name}_breaker_state", self._STATE_CODES[self._state])
+
+    def _transition(self, state: str) -> None:
+        if state == self._state:
+            return
+        self._state = state
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+            metrics.inc(f"{self.name}_breaker_opened")
+        if state == self.HALF_OPEN:
+            self._half_open_calls = 0
+        self._publish()
+
+    @property
+    def state(self) -> str:
+        """Текущее состояние с учетом истекшего reset_timeout"""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._transition(self.HALF_OPEN)
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Можно ли выполнить запрос сейчас"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+            self._half_open_calls += 1
+            return True
+        metrics.inc(f"{self.name}_breaker_rejected")
+        return False
+
+    def record_success(self) -> None:
+        """Зафиксировать успешный запрос"""
+        self._failures = 0
+        self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        """Зафиксировать ошибку запроса"""
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._transition(self.OPEN)
+
+    def release(self) -> None:
+        """Освободить слот пробного запроса без исхода (запрос отменен или не начинался)"""
+        if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def stats(self) -> dict:
+        """Состояние выключателя для статистики"""
+        return {
+            'state': self.state,
+            'failures': self._failures,
+            'opened': int(metrics.get(f"{self.name}_breaker_opened")),
+        }
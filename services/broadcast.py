@@ -0,0 +1,187 @@
+"""
+Рассылка сообщения всем пользователям бота
+
+Получатели читаются из БД пачками по курсору (id пользователя), пачка
+отправляется несколькими параллельными отправителями с общим лимитом
+скорости и с приоритетом ниже ответов пользователям. После каждой
+пачки курсор и счетчики сохраняются: после перезапуска рассылка
+продолжается со следующей пачки (недосланная пачка отправляется
+заново целиком).
+
+Кнопка остановки попадает в процесс администратора, а рассылка может
+идти в другом: поэтому перед каждой пачкой статус перечитывается из
+БД, а ход рассылки сохраняется, только пока она в статусе running.
+"""
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from typing import Dict, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError, TelegramRetryAfter
+
+from config import config
+from database import Broadcast, db
+from .metrics import metrics
+from .outbound import bulk_priority
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+DELIVERED = "delivered"
+FAILED = "failed"
+BLOCKED = "blocked"
+
+
+class Broadcaster:
+    """Фоновые рассылки с продолжением после перезапуска"""
+
+    def __init__(self, concurrency: int = 8, rate: float = 20.0, batch_size: int = 200,
+                 progress_interval: float = 5.0):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.progress_interval = progress_interval
+        self.budget = TokenBucket(rate, rate)
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def start(self, bot: Bot, broadcast: Broadcast) -> None:
+        """Запустить рассылку в фоне"""
+        if broadcast.id in self._tasks:
+            return
+        task = asyncio.create_task(self._run(bot, broadcast))
+        self._tasks[broadcast.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(broadcast.id, None))
+
+    async def resume(self, bot: Bot) -> None:
+        """Продолжить рассылки, прерванные перезапуском"""
+        for broadcast in await db.get_running_broadcasts():
+            logger.info(f"Продолжение рассылки #{broadcast.id} после пользователя {broadcast.last_user_id}")
+            self.start(bot, broadcast)
+
+    def is_running(self, broadcast_id: int) -> bool:
+        return broadcast_id in self._tasks
+
+    async def cancel(self, broadcast_id: int) -> Optional[Broadcast]:
+        """Остановить рассылку (она не будет продолжена после перезапуска)"""
+        task = self._tasks.get(broadcast_id)
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+        await db.cancel_broadcast(broadcast_id)
+        return await db.get_broadcast(broadcast_id)
+
+    async def stop(self) -> None:
+        """Прервать рассылки при выключении; они продолжатся после запуска"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+
+    async def _send(self, bot: Bot, chat_id: int, text: str) -> str:
+        """Отправить сообщение одному получателю"""
+        while not self.budget.try_acquire():
+            await asyncio.sleep(self.budget.delay())
+        try:
+            with bulk_priority():
+                await bot.send_message(chat_id, text)
+            return DELIVERED
+        except TelegramForbiddenError:
+            # Бот заблокирован или аккаунт удален
+            return BLOCKED
+        except TelegramRetryAfter as e:
+            logger.warning(f"Рассылка: flood control не снят повторами ({chat_id}): {e}")
+            return FAILED
+        except (TelegramAPIError, asyncio.TimeoutError) as e:
+            logger.warning(f"Рассылка: не удалось отправить {chat_id}: {e}")
+            return FAILED
+
+    async def _send_batch(self, bot: Bot, broadcast: Broadcast, recipients) -> None:
+        """Отправить пачку параллельно (не больше concurrency одновременно)"""
+        queue = asyncio.Queue()
+        for _, telegram_id in recipients:
+            queue.put_nowait(telegram_id)
+
+        async def sender() -> None:
+            while not queue.empty():
+                result = await self._send(bot, queue.get_nowait(), broadcast.text)
+                setattr(broadcast, result, getattr(broadcast, result) + 1)
+                metrics.inc(f"broadcast_{result}")
+
+        await asyncio.gather(*(sender() for _ in range(min(self.concurrency, len(recipients)))))
+
+    async def _report(self, bot: Bot, broadcast: Broadcast) -> None:
+        """Показать ход рассылки администратору"""
+        from keyboards import broadcast_keyboard
+        from utils import get_broadcast_progress
+
+        text = get_broadcast_progress(broadcast)
+        keyboard = broadcast_keyboard(broadcast.id, confirm=False) if broadcast.status == "running" else None
+        try:
+            if broadcast.report_message_id:
+                await bot.edit_message_text(text, chat_id=broadcast.created_by,
+                                            message_id=broadcast.report_message_id, reply_markup=keyboard)
+            else:
+                message = await bot.send_message(broadcast.created_by, text, reply_markup=keyboard)
+                broadcast.report_message_id = message.message_id
+        except TelegramAPIError as e:
+            # Сообщение не изменилось или удалено — рассылка продолжается
+            logger.debug(f"Отчет о рассылке #{broadcast.id} не обновлен: {e}")
+
+    @staticmethod
+    def _stopped_elsewhere(broadcast: Broadcast) -> None:
+        logger.info(f"Рассылка #{broadcast.id} остановлена: ее отменили (возможно, в другом процессе)")
+
+    async def _run(self, bot: Bot, broadcast: Broadcast) -> None:
+        if broadcast.status != "running":
+            broadcast.status = "running"
+            await db.save_broadcast(broadcast)
+
+        reported_at = 0.0
+        try:
+            while True:
+                current = await db.get_broadcast(broadcast.id)
+                if current is None or current.status != "running":
+                    self._stopped_elsewhere(broadcast)
+                    return
+
+                recipients = await db.get_broadcast_recipients(broadcast.last_user_id, self.batch_size)
+                if not recipients:
+                    break
+
+                await self._send_batch(bot, broadcast, recipients)
+                broadcast.last_user_id = recipients[-1][0]
+                if not await db.save_broadcast(broadcast, expected_status="running"):
+                    self._stopped_elsewhere(broadcast)
+                    return
+
+                if time.monotonic() - reported_at >= self.progress_interval:
+                    await self._report(bot, broadcast)
+                    reported_at = time.monotonic()
+
+            broadcast.status = "done"
+            if not await db.save_broadcast(broadcast, expected_status="running"):
+                self._stopped_elsewhere(broadcast)
+                return
+            logger.info(
+                f"Рассылка #{broadcast.id} завершена: доставлено {broadcast.delivered}, "
+                f"заблокировали {broadcast.blocked}, ошибок {broadcast.failed}"
+            )
+            await self._report(bot, broadcast)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Курсор сохранен — рассылка продолжится после перезапуска
+            logger.error(f"Рассылка #{broadcast.id} прервана: {e}", exc_info=True)
+
+
+broadcaster = Broadcaster(
+    concurrency=config.BROADCAST_CONCURRENCY,
+    rate=config.BROADCAST_RATE,
+    batch_size=config.BROADCAST_BATCH_SIZE,
+    progress_interval=config.BROADCAST_PROGRESS_INTERVAL
+)
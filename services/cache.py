@@ -0,0 +1,90 @@
+"""
+Кэш статей в памяти с TTL, LRU-вытеснением и выдачей устаревших записей
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from .metrics import metrics
+
+
+class ArticleCache:
+    """
+    LRU-кэш со сроком жизни записей
+
+    Запись считается свежей в течение ttl секунд. После этого она еще
+    stale_ttl секунд может быть выдана по запросу allow_stale=True —
+    например, когда Википедия недоступна.
+    """
+
+    def __init__(self, max_size: int = 2000, ttl: float = 6 * 3600,
+                 stale_ttl: float = 7 * 24 * 3600, name: str = "article_cache"):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(term: str) -> str:
+        """Нормализация ключа кэша"""
+        return " ".join(term.lower().split())
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Any]:
+        """Получить значение из кэша"""
+        entry = self._entries.get(key)
+        if entry is None:
+            metrics.inc(f"{self.name}_misses")
+            return None
+
+        stored_at, value = entry
+        age = time.monotonic() - stored_at
+
+        if age > self.ttl + self.stale_ttl:
+            del self._entries[key]
+            metrics.inc(f"{self.name}_misses")
+            return None
+
+        if age > self.ttl and not allow_stale:
+            metrics.inc(f"{self.name}_misses")
+            return None
+
+        self._entries.move_to_end(key)
+        metrics.inc(f"{self.name}_hits")
+        return value
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Значение без учета в метриках и без обновления порядка LRU"""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl + self.stale_ttl:
+            return None
+        return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Сохранить значение в кэш"""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            metrics.inc(f"{self.name}_evictions")
+
+        metrics.set_gauge(f"{self.name}_size", len(self._entries))
+
+    def expires_in(self, key: str) -> float:
+        """Сколько секунд запись еще будет свежей (отрицательное значение — уже устарела)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return float("-inf")
+        return self.ttl - (time.monotonic() - entry[0])
+
+    def is_fresh(self, key: str) -> bool:
+        """Есть ли в кэше свежая запись"""
+        entry = self._entries.get(key)
+        return entry is not None and time.monotonic() - entry[0] <= self.ttl
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,229 @@
+"""
+Исправление опечаток в терминах по локальному корпусу заголовков
+
+Используется индекс симметричного удаления (SymSpell): для префикса
+каждого заголовка заранее вычисляются варианты с удалением до
+max_distance символов. Для запроса вычисляются такие же варианты,
+их общие ключи дают кандидатов, которые затем проверяются точным
+расстоянием Дамерау — Левенштейна по всей строке.
+
+Чтобы индекс на миллион заголовков помещался в память, пары
+(хеш варианта, номер заголовка) хранятся одним отсортированным
+array('Q'), а поиск по нему идет через bisect.
+"""
+import heapq
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .metrics import metrics
+from .offline_index import normalize_title
+
+HASH_MASK = 0xFFFFFFFF
+BUILD_CHUNK = 1_000_000
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """Все варианты слова с удалением до max_distance символов"""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for item in frontier:
+            for i in range(len(item)):
+                next_frontier.add(item[:i] + item[i + 1:])
+        result |= next_frontier
+        frontier = next_frontier
+    return result
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Расстояние Дамерау — Левенштейна (перестановки соседних символов)
+    с ранним выходом: возвращает max_distance + 1, если больше порога
+
+    Общие начало и конец строк отбрасываются, а матрица считается только
+    в полосе шириной 2 * max_distance + 1 вокруг диагонали: для опечатки
+    в длинном заголовке остается несколько клеток вместо сотен.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if a == b:
+        return 0
+
+    # Общие начало и конец на расстояние не влияют
+    start = 0
+    shortest = min(len(a), len(b))
+    while start < shortest and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < shortest - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a = a[start:len(a) - end]
+    b = b[start:len(b) - end]
+    if not a or not b:
+        return len(a) + len(b)
+
+    over = max_distance + 1
+    previous_previous = None
+    previous = [j if j <= max_distance else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= max_distance:
+            current[0] = i
+        row_min = current[0]
+        char = a[i - 1]
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            value = previous[j - 1] if char == b[j - 1] else previous[j - 1] + 1
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (previous_previous is not None and j > 1
+                    and char == b[j - 2] and a[i - 2] == b[j - 1]
+                    and previous_previous[j - 2] + 1 < value):
+                value = previous_previous[j - 2] + 1
+            if value > over:
+                value = over
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return over
+        previous_previous, previous = previous, current
+
+    return previous[-1]
+
+
+class FuzzyMatcher:
+    """Поиск похожих заголовков в корпусе"""
+
+    def __init__(self, max_distance: int = 1, prefix_length: int = 7, max_candidates: int = 200):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.max_candidates = max_candidates
+
+        self._titles: List[str] = []
+        self._weights = array('I')
+        self._index = array('Q')
+        # Заголовки, добавленные после построения индекса
+        self._pending: Dict[int, List[int]] = {}
+
+    def _hashes(self, key: str, max_distance: int) -> Set[int]:
+        return {hash(item) & HASH_MASK for item in _deletes(key[:self.prefix_length], max_distance)}
+
+    def build(self, titles: Iterable[Tuple[str, int]]) -> None:
+        """
+        Построить индекс по (заголовок, вес) заново
+
+        Заголовки лучше передавать по убыванию веса: внутри ключа пары
+        лежат по номеру заголовка, и ограничение max_candidates отсекает
+        последние. Пары сортируются порциями по BUILD_CHUNK и сливаются,
+        чтобы не держать в памяти список из десятков миллионов чисел.
+        """
+        seen = set()
+        self._titles = []
+        self._weights = array('I')
+        self._pending = {}
+
+        chunks = []
+        chunk = []
+        for title, weight in titles:
+            key = normalize_title(title)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+
+            number = len(self._titles)
+            self._titles.append(title)
+            self._weights.append(min(int(weight), HASH_MASK))
+
+            chunk.extend((h << 32) | number for h in self._hashes(key, self.max_distance))
+            if len(chunk) >= BUILD_CHUNK:
+                chunk.sort()
+                chunks.append(array('Q', chunk))
+                chunk = []
+
+        chunk.sort()
+        chunks.append(array('Q', chunk))
+        del seen
+
+        self._index = array('Q', heapq.merge(*chunks)) if len(chunks) > 1 else chunks[0]
+        metrics.set_gauge("fuzzy_titles", len(self._titles))
+
+    def add(self, title: str, weight: int = 1) -> None:
+        """Добавить заголовок без перестройки индекса"""
+        key = normalize_title(title)
+        if not key or self.best(title, max_distance=0) is not None:
+            return
+
+        number = len(self._titles)
+        self._titles.append(title)
+        self._weights.append(min(int(weight), HASH_MASK))
+        for h in self._hashes(key, self.max_distance):
+            self._pending.setdefault(h, []).append(number)
+        metrics.set_gauge("fuzzy_titles", len(self._titles))
+
+    def _candidates(self, key: str, max_distance: int) -> Set[int]:
+        # У заголовков в индексе есть все варианты до self.max_distance удалений,
+        # поэтому запросу с меньшим порогом хватает своих вариантов до него
+        candidates = set()
+        for h in self._hashes(key, min(max_distance, self.max_distance)):
+            low = bisect_left(self._index, h << 32)
+            high = min(bisect_left(self._index, (h + 1) << 32), low + self.max_candidates)
+            for position in range(low, high):
+                candidates.add(self._index[position] & HASH_MASK)
+            candidates.update(self._pending.get(h, ()))
+        return candidates
+
+    def lookup(self, term: str, limit: int = 5, max_distance: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Похожие заголовки, отсортированные по расстоянию и популярности
+
+        Returns:
+            Список (заголовок, расстояние)
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        key = normalize_title(term)
+        if not key:
+            return []
+
+        matches = []
+        for number in self._candidates(key, max_distance):
+            title_key = normalize_title(self._titles[number])
+            distance = edit_distance(key, title_key, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, -self._weights[number], self._titles[number]))
+
+        matches.sort()
+        return [(title, distance) for distance, _weight, title in matches[:limit]]
+
+    def allowed_distance(self, term: str) -> int:
+        """Допустимое число опечаток в зависимости от длины термина"""
+        length = len(normalize_title(term))
+        if length <= 4:
+            return 0
+        if length <= 8:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def best(self, term: str, max_distance: Optional[int] = None) -> Optional[Tuple[str, int]]:
+        """Лучший заголовок для термина или None"""
+        if max_distance is None:
+            max_distance = self.allowed_distance(term)
+        matches = self.lookup(term, limit=1, max_distance=max_distance)
+        return matches[0] if matches else None
+
+    def memory_usage(self) -> int:
+        """Примерный объем памяти индекса в байтах"""
+        import sys
+        return (
+            sys.getsizeof(self._titles)
+            + sum(sys.getsizeof(title) for title in self._titles)
+            + self._weights.buffer_info()[1] * self._weights.itemsize
+            + self._index.buffer_info()[1] * self._index.itemsize
+        )
+
+    def __len__(self) -> int:
+        return len(self._titles)
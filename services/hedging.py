@@ -0,0 +1,76 @@
+"""
+Хеджированные запросы: дублирование медленного запроса на альтернативную точку доступа
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Tuple
+
+from .metrics import metrics
+
+
+async def hedged(name: str, primary: Callable[[], Awaitable[Any]],
+                 alternate: Callable[[], Awaitable[Any]], delay: float) -> Tuple[Any, bool]:
+    """
+    Выполнить primary; если ответа нет через delay секунд, параллельно
+    запустить alternate и вернуть первый успешный результат.
+
+    Проигравший запрос отменяется: медленный основной запрос не должен
+    занимать слот планировщика и повторять вызовы, пока Википедия и так
+    тормозит. Отмененный пробный запрос освобождает слот выключателя.
+
+    Метрики: {name}_hedge_total, {name}_hedge_fired, {name}_hedge_won
+    и скользящее окно длительностей {name}_latency — каждой попытки
+    primary, включая ошибки и таймауты; для отмененной попытки
+    записывается время до отмены (по окну выбирается delay).
+
+    Returns:
+        (результат, выиграл ли альтернативный запрос)
+    """
+    started = time.monotonic()
+    metrics.inc(f"{name}_hedge_total")
+
+    def observe(task: asyncio.Future) -> None:
+        metrics.observe(f"{name}_latency", time.monotonic() - started)
+        if not task.cancelled():
+            # Ошибку проигравшего запроса никто не ждет — помечаем ее полученной
+            task.exception()
+
+    primary_task = asyncio.ensure_future(primary())
+    primary_task.add_done_callback(observe)
+    alternate_task = None
+
+    try:
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if done:
+            return primary_task.result(), False
+
+        metrics.inc(f"{name}_hedge_fired")
+        alternate_task = asyncio.ensure_future(alternate())
+
+        pending = {primary_task, alternate_task}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    won = task is alternate_task
+                    if won:
+                        metrics.inc(f"{name}_hedge_won")
+                    return task.result(), won
+
+        # Оба запроса завершились ошибкой — отдаем ошибку основного
+        raise primary_task.exception()
+    finally:
+        for task in (primary_task, alternate_task):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+def hedge_stats(name: str) -> dict:
+    """Доля хеджированных запросов и доля побед альтернативы"""
+    total = metrics.get(f"{name}_hedge_total")
+    fired = metrics.get(f"{name}_hedge_fired")
+    won = metrics.get(f"{name}_hedge_won")
+    return {
+        'hedge_rate': fired / total if total else 0.0,
+        'win_rate': won / fired if fired else 0.0,
+    }
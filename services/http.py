@@ -0,0 +1,31 @@
+"""
+Общая HTTP-сессия aiohttp для асинхронных запросов к Википедии
+"""
+from typing import Optional
+
+import aiohttp
+
+from config import config
+
+USER_AGENT = "TerminWikiBot/2.0 (https://t.me; aiohttp)"
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Получить (или создать при первом вызове) общую сессию"""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            headers={"User-Agent": USER_AGENT},
+            timeout=aiohttp.ClientTimeout(total=config.WIKI_CALL_TIMEOUT)
+        )
+    return _session
+
+
+async def close_session() -> None:
+    """Закрыть общую сессию"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
@@ -0,0 +1,61 @@
+"""
+Соответствие ссылок на изображения и file_id, выданных Telegram
+
+После первой отправки изображение хранится на серверах Telegram, и
+дальше его можно отправлять по file_id — без повторного скачивания
+и загрузки.
+"""
+from collections import OrderedDict
+from typing import Optional
+
+from config import config
+from database import db
+from .metrics import metrics
+
+
+class ImageFileCache:
+    """file_id изображений: LRU в памяти поверх таблицы в БД"""
+
+    def __init__(self, max_size: int = 5000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+
+    def _store(self, url: str, file_id: str) -> None:
+        self._entries[url] = file_id
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get(self, url: str) -> Optional[str]:
+        """file_id изображения или None, если оно еще не отправлялось"""
+        file_id = self._entries.get(url)
+        if file_id is not None:
+            self._entries.move_to_end(url)
+            metrics.inc("image_file_id_hits")
+            return file_id
+
+        file_id = await db.get_image_file_id(url)
+        if file_id is not None:
+            self._store(url, file_id)
+            metrics.inc("image_file_id_hits")
+            return file_id
+
+        metrics.inc("image_file_id_misses")
+        return None
+
+    async def remember(self, url: str, file_id: str) -> None:
+        """Запомнить file_id после первой отправки"""
+        self._store(url, file_id)
+        await db.save_image_file_id(url, file_id)
+
+    async def forget(self, url: str) -> None:
+        """Забыть file_id, который Telegram больше не принимает"""
+        self._entries.pop(url, None)
+        await db.delete_image_file_id(url)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Создаем глобальный кэш file_id
+image_file_cache = ImageFileCache(max_size=config.IMAGE_FILE_ID_CACHE_SIZE)
@@ -0,0 +1,750 @@
+"""
+Слой поиска статей в Википедии
+
+Объединяет планировщик запросов, выключатель, таймауты с повторами,
+кэш статей и объединение одинаковых запросов. Обработчики работают
+только с WikiService.lookup и не ходят в Википедию напрямую.
+
+У каждого языкового раздела свой клиент с пулом соединений, свой кэш
+и свои выключатели, поэтому поиски на разных языках не мешают друг другу.
+"""
+import asyncio
+import dataclasses
+import functools
+import hashlib
+import logging
+import random
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import aiohttp
+
+from config import config
+from database import db
+from .breaker import CircuitBreaker
+from .cache import ArticleCache
+from .fuzzy import FuzzyMatcher
+from .hedging import hedged, hedge_stats
+from .metrics import metrics
+from .offline_index import OfflineIndex, article_url
+from .prefix_index import PrefixIndex
+from .reader import split_pages
+from .scheduler import LookupRejected, lookup_scheduler
+from .shutdown import cancel_tasks
+from .singleflight import SingleFlight
+from .wiki_client import PageAmbiguous, PageMissing, WikiClient, WikiRequestError
+from .wiki_rest import AlternateNotFound, AlternateUnusable, mobile_search, rest_summary
+
+logger = logging.getLogger(__name__)
+
+# Ошибки сети, при которых запрос имеет смысл повторить
+TRANSIENT_ERRORS = (
+    asyncio.TimeoutError,
+    WikiRequestError,
+    ConnectionError,
+)
+
+
+@dataclass
+class Article:
+    """Краткая информация о статье"""
+    title: str
+    summary: str
+    url: str
+    stale: bool = False
+    lang: str = "ru"
+    # Загружена упреждающе и еще не была показана
+    prefetched: bool = False
+    # Миниатюра главного изображения статьи
+    image_url: Optional[str] = None
+
+
+class WikiError(Exception):
+    """Базовая ошибка поиска в Википедии"""
+
+
+class ArticleNotFound(WikiError):
+    """Статья не найдена"""
+
+
+class AmbiguousTerm(WikiError):
+    """Термин неоднозначен"""
+
+    def __init__(self, term: str, options: List[str], lang: str = "ru"):
+        super().__init__(term)
+        self.term = term
+        self.options = options
+        self.lang = lang
+
+
+class UpstreamUnavailable(WikiError):
+    """Википедия недоступна (таймауты, ошибки сети или разомкнут выключатель)"""
+
+
+class LanguageBackend:
+    """Клиент, кэш и выключатели одного языкового раздела"""
+
+    def __init__(self, lang: str, default: bool = False):
+        self.lang = lang
+        # Имена метрик языка по умолчанию сохраняем прежними
+        suffix = "" if default else f"_{lang}"
+
+        self.client = WikiClient(
+            lang,
+            pool_size=config.LOOKUP_WORKERS,
+            timeout=config.WIKI_CALL_TIMEOUT,
+            thumb_size=config.LEAD_IMAGE_SIZE
+        )
+        self.cache = ArticleCache(
+            max_size=config.ARTICLE_CACHE_SIZE,
+            ttl=config.ARTICLE_CACHE_TTL,
+            stale_ttl=config.ARTICLE_CACHE_STALE_TTL,
+            name=f"article_cache{suffix}"
+        )
+        self.breaker = CircuitBreaker(
+            f"wiki{suffix}",
+            failure_threshold=config.BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=config.BREAKER_RESET_TIMEOUT
+        )
+        self.alt_breaker = CircuitBreaker(
+            f"wiki_alt{suffix}",
+            failure_threshold=config.BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=config.BREAKER_RESET_TIMEOUT
+        )
+
+
+class WikiService:
+    """Поиск статей с кэшем и защитой от сбоев Википедии"""
+
+    def __init__(self):
+        self.default_lang = config.WIKI_DEFAULT_LANGUAGE
+        languages = dict.fromkeys([self.default_lang, *config.WIKI_LANGUAGES])
+        self.backends: Dict[str, LanguageBackend] = {
+            lang: LanguageBackend(lang, default=lang == self.default_lang)
+            for lang in languages
+        }
+        self.flights = SingleFlight("wiki_lookup")
+        self._offline_index: Optional[OfflineIndex] = None
+        self._offline_loaded = False
+        self.fuzzy = FuzzyMatcher(
+            max_distance=config.FUZZY_MAX_DISTANCE,
+            prefix_length=config.FUZZY_PREFIX_LENGTH,
+            max_candidates=config.FUZZY_MAX_CANDIDATES
+        )
+        self.titles = PrefixIndex()
+        # Варианты неоднозначных терминов по коротким токенам для кнопок
+        self.choices = ArticleCache(
+            max_size=config.DISAMBIGUATION_CHOICES,
+            ttl=config.DISAMBIGUATION_TTL,
+            stale_ttl=0,
+            name="disambiguation_choices"
+        )
+        # Полные тексты статей, разбитые на страницы, и ссылки на них по токенам
+        self.texts = ArticleCache(
+            max_size=config.READER_CACHE_SIZE,
+            ttl=config.READER_CACHE_TTL,
+            stale_ttl=0,
+            name="reader_cache"
+        )
+        self.read_refs = ArticleCache(
+            max_size=config.READER_CACHE_SIZE * 50,
+            ttl=config.ARTICLE_CACHE_STALE_TTL,
+            stale_ttl=0,
+            name="reader_refs"
+        )
+        self._prefetch_slots: Optional[asyncio.Semaphore] = None
+        self._background: set = set()
+
+    def backend(self, lang: Optional[str] = None) -> LanguageBackend:
+        """Языковой раздел (неизвестный язык — раздел по умолчанию)"""
+        return self.backends.get(lang or self.default_lang) or self.backends[self.default_lang]
+
+    @property
+    def cache(self) -> ArticleCache:
+        """Кэш раздела по умолчанию"""
+        return self.backends[self.default_lang].cache
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """Выключатель раздела по умолчанию"""
+        return self.backends[self.default_lang].breaker
+
+    async def load_title_corpus(self) -> int:
+        """
+        Построить индексы заголовков: опечаток — по найденным ранее статьям
+        (и офлайн-индексу), префиксов — по ним же и популярным запросам
+        """
+        titles = [item async for item in db.iter_result_titles()]
+        popular_terms = await db.get_popular_terms(limit=config.INLINE_POPULAR_TERMS)
+
+        index = self.offline_index
+        fuzzy_titles = list(titles)
+        if config.FUZZY_INCLUDE_OFFLINE_TITLES and index is not None:
+            fuzzy_titles.extend((title, 0) for title in index.iter_titles())
+
+        # Построение индексов — чистый CPU, выносим из цикла событий
+        loop = asyncio.get_running_loop()
+        if config.FUZZY_ENABLED:
+            # Популярные заголовки первыми: они проверяются и в переполненных ключах
+            await loop.run_in_executor(None, functools.partial(fuzzy_titles.sort, key=lambda item: -item[1]))
+            await loop.run_in_executor(None, self.fuzzy.build, fuzzy_titles)
+        await loop.run_in_executor(None, self.titles.build, titles + popular_terms)
+
+        logger.info(
+            f"Индексы заголовков построены: опечатки — {len(self.fuzzy)}, "
+            f"подсказки — {len(self.titles)}"
+        )
+        return len(self.titles)
+
+    @property
+    def offline_index(self) -> Optional[OfflineIndex]:
+        """Офлайн-индекс открывается при первом обращении"""
+        if not self._offline_loaded:
+            self._offline_loaded = True
+            try:
+                self._offline_index = OfflineIndex.load(config.OFFLINE_INDEX_PATH)
+            except Exception as e:
+                logger.error(f"Не удалось открыть офлайн-индекс {config.OFFLINE_INDEX_PATH}: {e}")
+            if self._offline_index is not None:
+                logger.info(f"Офлайн-индекс загружен: {len(self._offline_index)} статей")
+        return self._offline_index
+
+    def _offline_lookup(self, term: str) -> Optional[Article]:
+        """Поиск статьи в офлайн-индексе без обращения к сети"""
+        index = self.offline_index
+        if index is None:
+            return None
+
+        entry = index.lookup(term)
+        if entry is None:
+            metrics.inc("offline_index_misses")
+            return None
+
+        metrics.inc("offline_index_hits")
+        return Article(title=entry.title, summary=entry.summary, url=entry.url, lang=self.default_lang)
+
+    def _backoff(self, attempt: int) -> float:
+        """Экспоненциальная задержка с полным джиттером"""
+        return random.uniform(0, config.WIKI_RETRY_BACKOFF * (2 ** attempt))
+
+    async def _call(self, backend: LanguageBackend, deadline: float,
+                    func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Блокирующий вызов клиента с таймаутом, повторами и учетом выключателя"""
+        last_error: Optional[BaseException] = None
+
+        for attempt in range(config.WIKI_RETRIES + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            if not backend.breaker.allow_request():
+                raise UpstreamUnavailable("Википедия временно недоступна")
+
+            try:
+                result = await asyncio.wait_for(
+                    lookup_scheduler.run(func, *args, **kwargs),
+                    timeout=min(config.WIKI_CALL_TIMEOUT, remaining)
+                )
+            except (LookupRejected, asyncio.CancelledError):
+                # Запрос не дошел до Википедии или его исход неизвестен
+                backend.breaker.release()
+                raise
+            except TRANSIENT_ERRORS as e:
+                last_error = e
+                backend.breaker.record_failure()
+                metrics.inc("wiki_upstream_errors")
+                logger.warning(
+                    f"Ошибка запроса к Википедии ({backend.lang}, попытка {attempt + 1}): {e!r}"
+                )
+
+                if attempt < config.WIKI_RETRIES:
+                    await asyncio.sleep(min(self._backoff(attempt), max(deadline - time.monotonic(), 0)))
+                continue
+            except (PageAmbiguous, PageMissing):
+                # Это нормальные ответы Википедии, а не сбой
+                backend.breaker.record_success()
+                raise
+            except Exception:
+                backend.breaker.record_failure()
+                raise
+
+            backend.breaker.record_success()
+            return result
+
+        raise UpstreamUnavailable(str(last_error) if last_error else "превышен срок ожидания ответа")
+
+    async def _alt_call(self, backend: LanguageBackend, deadline: float,
+                        func: Callable[..., Any], *args) -> Any:
+        """Запрос к альтернативной точке доступа (без повторов — это уже дубль)"""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not backend.alt_breaker.allow_request():
+            raise UpstreamUnavailable("альтернативная точка доступа недоступна")
+
+        try:
+            result = await asyncio.wait_for(
+                func(*args, lang=backend.lang),
+                timeout=min(config.WIKI_CALL_TIMEOUT, remaining)
+            )
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            backend.alt_breaker.record_failure()
+            raise UpstreamUnavailable(str(e) or repr(e)) from e
+        except (AlternateNotFound, AlternateUnusable):
+            # Точка доступа ответила, просто ответ не подходит
+            backend.alt_breaker.record_success()
+            raise
+        except asyncio.CancelledError:
+            backend.alt_breaker.release()
+            raise
+        except Exception:
+            backend.alt_breaker.record_failure()
+            raise
+
+        backend.alt_breaker.record_success()
+        return result
+
+    def _hedge_delay(self, name: str) -> float:
+        """Задержка перед дублирующим запросом: перцентиль недавних длительностей"""
+        delay = metrics.percentile(f"{name}_latency", config.HEDGE_PERCENTILE)
+        if delay is None:
+            delay = config.HEDGE_DEFAULT_DELAY
+        return min(max(delay, config.HEDGE_MIN_DELAY), config.HEDGE_MAX_DELAY)
+
+    async def _hedged(self, name: str, primary: Callable[[], Any], alternate: Callable[[], Any]) -> Any:
+        """Выполнить запрос с хеджированием, если оно включено"""
+        if not config.HEDGE_ENABLED:
+            return await primary()
+
+        result, _ = await hedged(name, primary, alternate, self._hedge_delay(name))
+        return result
+
+    async def _fetch_page(self, backend: LanguageBackend, deadline: float,
+                          term: str, page_title: str) -> Article:
+        """Загрузка вступления статьи через MediaWiki API"""
+        try:
+            page = await self._call(backend, deadline, backend.client.page, page_title)
+        except PageAmbiguous as e:
+            raise AmbiguousTerm(term, e.options[:config.DISAMBIGUATION_OPTIONS], lang=backend.lang)
+        except PageMissing:
+            raise ArticleNotFound(term)
+
+        return Article(
+            title=page["title"],
+            summary=page["summary"][:1500],
+            url=page["url"] or article_url(page["title"], backend.lang),
+            lang=backend.lang,
+            image_url=page["image_url"]
+        )
+
+    async def _fetch_page_alt(self, backend: LanguageBackend, deadline: float,
+                              term: str, page_title: str) -> Article:
+        """Загрузка краткого описания статьи через REST API"""
+        try:
+            data = await self._alt_call(backend, deadline, rest_summary, page_title)
+        except AlternateNotFound:
+            raise ArticleNotFound(term)
+
+        return Article(
+            title=data["title"],
+            summary=data["summary"][:1500],
+            url=data["url"] or article_url(data["title"], backend.lang),
+            lang=backend.lang,
+            image_url=data["image_url"]
+        )
+
+    async def _fetch(self, backend: LanguageBackend, term: str,
+                     page_title: Optional[str] = None) -> Article:
+        """
+        Поиск и загрузка статьи из Википедии
+
+        Если заголовок уже известен (например, исправлен по индексу
+        опечаток), запрос поиска пропускается, а промах по заголовку
+        сразу дает ArticleNotFound.
+        """
+        deadline = time.monotonic() + config.WIKI_LOOKUP_DEADLINE
+
+        if page_title is None:
+            search_results = await self._hedged(
+                "wiki_search",
+                lambda: self._call(backend, deadline, backend.client.search, term, 3),
+                lambda: self._alt_call(backend, deadline, mobile_search, term)
+            )
+            if not search_results:
+                raise ArticleNotFound(term)
+
+            # Берем первый результат
+            page_title = search_results[0]
+
+        return await self._hedged(
+            "wiki_page",
+            lambda: self._fetch_page(backend, deadline, term, page_title),
+            lambda: self._fetch_page_alt(backend, deadline, term, page_title)
+        )
+
+    async def lookup(self, term: str, lang: Optional[str] = None) -> Article:
+        """
+        Найти статью по термину в разделе Википедии на языке lang
+
+        Raises:
+            ArticleNotFound: статья не найдена
+            AmbiguousTerm: термин неоднозначен
+            UpstreamUnavailable: Википедия недоступна и в кэше ничего нет
+            LookupRejected: планировщик перегружен и в кэше ничего нет
+        """
+        backend = self.backend(lang)
+        cache = backend.cache
+        key = cache.make_key(term)
+
+        article = self._from_cache(cache, key)
+        if article is not None:
+            return article
+
+        # Локальные индексы собраны по разделу по умолчанию
+        local = backend.lang == self.default_lang
+        if local:
+            article = self._offline_lookup(term)
+            if article is not None:
+                cache.set(key, article)
+                return article
+
+            # Уверенно исправленная опечатка: отвечаем локально или идем
+            # сразу за статьей, без запроса поиска
+            corrected = self._correct(term) if config.FUZZY_ENABLED else None
+            if corrected is not None:
+                article = cache.get(cache.make_key(corrected)) or self._offline_lookup(corrected)
+                if article is not None:
+                    metrics.inc("fuzzy_local_hits")
+                else:
+                    try:
+                        article = await self._load(backend, corrected, page_title=corrected)
+                    except ArticleNotFound:
+                        raise ArticleNotFound(term) from None
+                cache.set(key, article)
+                return article
+
+        return await self._load(backend, term)
+
+    async def lookup_many(self, terms: List[str], lang: Optional[str] = None,
+                          concurrency: int = 4) -> List[Tuple[str, Union[Article, Exception]]]:
+        """
+        Найти статьи для нескольких терминов параллельно (не больше concurrency сразу)
+
+        Кэш и объединение одинаковых запросов работают как при обычном поиске.
+        Ошибка одного термина не прерывает остальные: вместо статьи
+        возвращается исключение.
+        """
+        slots = asyncio.Semaphore(concurrency)
+
+        async def lookup_one(term: str) -> Tuple[str, Union[Article, Exception]]:
+            async with slots:
+                try:
+                    return term, await self.lookup(term, lang)
+                except Exception as e:
+                    return term, e
+
+        return list(await asyncio.gather(*(lookup_one(term) for term in terms)))
+
+    async def lookup_title(self, title: str, lang: Optional[str] = None) -> Article:
+        """Загрузить статью по точному заголовку (без поиска и исправления опечаток)"""
+        backend = self.backend(lang)
+        article = self._from_cache(backend.cache, backend.cache.make_key(title))
+        if article is not None:
+            return article
+        return await self._load(backend, title, page_title=title)
+
+    def _from_cache(self, cache: ArticleCache, key: str) -> Optional[Article]:
+        """Свежая статья из кэша с учетом попаданий в упреждающе загруженные"""
+        article = cache.get(key)
+        if article is not None and article.prefetched:
+            article.prefetched = False
+            metrics.inc("prefetch_hits")
+        return article
+
+    async def article_links(self, title: str, lang: Optional[str] = None) -> List[str]:
+        """Заголовки статей, на которые ссылается статья title"""
+        backend = self.backend(lang)
+        deadline = time.monotonic() + config.WIKI_LOOKUP_DEADLINE
+        try:
+            return await self._call(backend, deadline, backend.client.links, title, 500)
+        except PageMissing:
+            return []
+
+    async def _load(self, backend: LanguageBackend, term: str,
+                    page_title: Optional[str] = None) -> Article:
+        """Загрузка из Википедии с объединением запросов, выдачей устаревшего и кэшированием"""
+        cache = backend.cache
+        key = cache.make_key(term)
+
+        try:
+            article = await self.flights.do(
+                f"{backend.lang}:{key}",
+                lambda: self._fetch(backend, term, page_title=page_title)
+            )
+        except (UpstreamUnavailable, LookupRejected):
+            stale = cache.get(key, allow_stale=True)
+            if stale is None:
+                raise
+            metrics.inc("wiki_stale_served")
+            return dataclasses.replace(stale, stale=True)
+
+        cache.set(key, article)
+        cache.set(cache.make_key(article.title), article)
+        if backend.lang == self.default_lang:
+            self._remember(article)
+        return article
+
+    def remember_choices(self, error: AmbiguousTerm) -> str:
+        """
+        Сохранить варианты неоднозначного термина и начать фоновую
+        загрузку их вступлений
+
+        Returns:
+            Короткий токен для callback_data кнопок
+        """
+        token = secrets.token_urlsafe(6)
+        self.choices.set(token, (error.term, error.lang, list(error.options)))
+        if config.DISAMBIGUATION_PREFETCH:
+            self._run_in_background(self._prefetch(error.options, error.lang))
+        return token
+
+    def get_choice(self, token: str, index: int) -> Optional[Tuple[str, str, str]]:
+        """Вариант по токену и номеру: (исходный термин, язык, заголовок) или None"""
+        choice = self.choices.get(token)
+        if choice is None:
+            return None
+
+        term, lang, options = choice
+        if not 0 <= index < len(options):
+            return None
+        return term, lang, options[index]
+
+    def reader_token(self, article: Article) -> str:
+        """Короткий токен статьи для кнопок постраничного чтения"""
+        token = hashlib.md5(f"{article.lang}:{article.title}".encode()).hexdigest()[:12]
+        self.read_refs.set(token, (article.lang, article.title, article.url))
+        return token
+
+    async def read_page(self, token: str, page: int) -> Optional[Tuple[str, str, str, int, int]]:
+        """
+        Страница полного текста статьи
+
+        Текст загружается один раз и хранится в кэше уже разбитым на страницы.
+
+        Returns:
+            (заголовок, ссылка, текст страницы, номер страницы, всего страниц)
+            или None, если токен неизвестен
+        """
+        ref = self.read_refs.get(token)
+        if ref is None:
+            return None
+
+        lang, title, url = ref
+        pages = self.texts.get(token)
+        if pages is None:
+            backend = self.backend(lang)
+            pages = await self.flights.do(f"text:{token}", lambda: self._fetch_pages(backend, title))
+            self.texts.set(token, pages)
+
+        page = min(max(page, 0), len(pages) - 1)
+        return title, url, pages[page], page, len(pages)
+
+    async def _fetch_pages(self, backend: LanguageBackend, title: str) -> List[str]:
+        """Загрузка полного текста статьи с разбиением на страницы"""
+        deadline = time.monotonic() + config.WIKI_LOOKUP_DEADLINE
+        try:
+            text = await self._call(backend, deadline, backend.client.extract, title)
+        except PageMissing:
+            raise ArticleNotFound(title)
+
+        pages = split_pages(text, config.READER_PAGE_SIZE)
+        if not pages:
+            raise ArticleNotFound(title)
+        return pages
+
+    def _run_in_background(self, coro) -> None:
+        """Запустить фоновую задачу, удерживая ссылку до ее завершения"""
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _prefetch(self, titles: List[str], lang: str) -> None:
+        """Параллельная (с ограничением) загрузка статей в кэш"""
+        if self._prefetch_slots is None:
+            self._prefetch_slots = asyncio.Semaphore(config.DISAMBIGUATION_CONCURRENCY)
+
+        cache = self.backend(lang).cache
+
+        async def fetch(title: str) -> None:
+            if cache.is_fresh(cache.make_key(title)):
+                return
+            async with self._prefetch_slots:
+                try:
+                    await self.lookup_title(title, lang)
+                    metrics.inc("disambiguation_prefetched")
+                except Exception as e:
+                    # Фоновая загрузка не должна мешать основным запросам
+                    logger.debug(f"Не удалось заранее загрузить «{title}»: {e!r}")
+
+        await asyncio.gather(*(fetch(title) for title in titles))
+
+    async def lookup_with_fallback(self, term: str, lang: Optional[str] = None) -> Article:
+        """
+        Найти статью, при необходимости — в запасных языках
+
+        Если в основном языке статьи нет или он не ответил за FALLBACK_DELAY,
+        запасные языки опрашиваются параллельно (вместе с еще идущим основным
+        запросом). Возвращается первый найденный результат, остальные
+        запросы отменяются. Язык результата — в Article.lang.
+        """
+        primary_lang = self.backend(lang).lang
+        secondary = [
+            item for item in dict.fromkeys(config.FALLBACK_LANGUAGES)
+            if item != primary_lang and item in self.backends
+        ][:config.FALLBACK_MAX_LANGUAGES]
+
+        if not config.FALLBACK_ENABLED or not secondary:
+            return await self.lookup(term, primary_lang)
+
+        primary = asyncio.ensure_future(self.lookup(term, primary_lang))
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=config.FALLBACK_DELAY)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+
+        if done:
+            try:
+                return primary.result()
+            except ArticleNotFound:
+                pass
+
+        metrics.inc("fallback_started")
+        tasks = [] if primary.done() else [primary]
+        tasks.extend(asyncio.ensure_future(self.lookup(term, item)) for item in secondary)
+        return await self._first_found(term, primary, tasks)
+
+    async def _first_found(self, term: str, primary: asyncio.Future, tasks: List[asyncio.Future]) -> Article:
+        """Первая найденная статья среди параллельных запросов; остальные отменяются"""
+        pending = set(tasks)
+        primary_error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                winner = None
+                # Основной язык важнее, если ответы пришли одновременно
+                for task in sorted(done, key=lambda item: item is not primary):
+                    error = task.exception()
+                    if error is None:
+                        winner = winner or task
+                    elif task is primary:
+                        primary_error = error
+
+                if winner is not None:
+                    if winner is not primary:
+                        metrics.inc("fallback_won")
+                    return winner.result()
+
+                if isinstance(primary_error, AmbiguousTerm):
+                    # Неоднозначность в основном языке — это ответ, а не промах
+                    raise primary_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise primary_error or ArticleNotFound(term)
+
+    def _remember(self, article: Article) -> None:
+        """Добавить заголовок найденной статьи в локальные индексы"""
+        if config.FUZZY_ENABLED:
+            self.fuzzy.add(article.title)
+        self.titles.add(article.title)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Article]:
+        """
+        Подсказки заголовков для инлайн-режима без обращения к сети и БД
+
+        Для статей из кэша возвращается краткое описание, для остальных — пустое.
+        """
+        suggestions = []
+        for title in self.titles.suggest(prefix, limit=limit):
+            article = self.cache.peek(self.cache.make_key(title))
+            if article is None:
+                article = Article(
+                    title=title, summary="", url=article_url(title, self.default_lang), lang=self.default_lang
+                )
+            suggestions.append(article)
+        return suggestions
+
+    def _correct(self, term: str) -> Optional[str]:
+        """
+        Исправить термин по индексу опечаток (None — исправлять нечего)
+
+        Исправление уверенное, только если термин сам не известен как
+        заголовок или запрос: иначе верный термин («Химик») подменялся бы
+        похожим популярным заголовком («Химия»). Допустимое расстояние
+        зависит от длины термина, короткие термины не исправляются.
+        """
+        if term in self.titles:
+            return None
+        match = self.fuzzy.best(term)
+        if match is None:
+            return None
+
+        title, distance = match
+        if distance == 0:
+            return None
+        metrics.inc("fuzzy_corrections")
+        return title
+
+    async def refresh(self, term: str, lang: Optional[str] = None) -> Article:
+        """Загрузить статью заново, не глядя на кэш, и обновить кэш"""
+        backend = self.backend(lang)
+        key = backend.cache.make_key(term)
+        article = await self.flights.do(f"{backend.lang}:{key}", lambda: self._fetch(backend, term))
+        backend.cache.set(key, article)
+        backend.cache.set(backend.cache.make_key(article.title), article)
+        return article
+
+    def stats(self) -> dict:
+        """Состояние слоя поиска для статистики"""
+        result = lookup_scheduler.stats()
+        result['breaker'] = self.breaker.state
+        result['cache_size'] = sum(len(backend.cache) for backend in self.backends.values())
+        result['stale_served'] = int(metrics.get("wiki_stale_served"))
+        if config.FUZZY_ENABLED:
+            result['fuzzy_titles'] = len(self.fuzzy)
+            result['fuzzy_corrections'] = int(metrics.get("fuzzy_corrections"))
+        if self._offline_index is not None:
+            result['offline_hits'] = int(metrics.get("offline_index_hits"))
+        if metrics.get("warmer_runs"):
+            result['warmer_last_warmed'] = int(metrics.get("warmer_last_warmed"))
+            result['warmer_last_duration'] = metrics.get("warmer_last_duration")
+        if config.DISAMBIGUATION_PREFETCH:
+            result['disambiguation_prefetched'] = int(metrics.get("disambiguation_prefetched"))
+        if config.PREFETCH_ENABLED:
+            result['prefetch_fetched'] = int(metrics.get("prefetch_fetched"))
+            result['prefetch_hits'] = int(metrics.get("prefetch_hits"))
+        if config.FALLBACK_ENABLED:
+            result['fallback_started'] = int(metrics.get("fallback_started"))
+            result['fallback_won'] = int(metrics.get("fallback_won"))
+        if config.HEDGE_ENABLED:
+            result['hedge_search'] = hedge_stats("wiki_search")
+            result['hedge_page'] = hedge_stats("wiki_page")
+        return result
+
+    async def close(self) -> int:
+        """Остановить фоновые загрузки и закрыть пулы соединений; возвращает число отмененных задач"""
+        cancelled = await cancel_tasks(self._background)
+        for backend in self.backends.values():
+            backend.client.close()
+        if self._offline_index is not None:
+            self._offline_index.close()
+            self._offline_index = None
+        return cancelled
+
+
+# Создаем глобальный сервис поиска
+wiki = WikiService()
@@ -0,0 +1,63 @@
+"""
+Простые внутрипроцессные метрики (счетчики и gauge-значения)
+"""
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+
+class Metrics:
+    """Реестр метрик бота"""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._gauges: Dict[str, float] = {}
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def inc(self, name: str, value: int = 1) -> None:
+        """Увеличить счетчик"""
+        self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Установить текущее значение gauge"""
+        self._gauges[name] = value
+
+    def add_gauge(self, name: str, delta: float) -> None:
+        """Изменить gauge на delta"""
+        self._gauges[name] = self._gauges.get(name, 0) + delta
+
+    def observe(self, name: str, value: float) -> None:
+        """Добавить наблюдение (например, длительность запроса) в скользящее окно"""
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.window)
+        samples.append(value)
+
+    def percentile(self, name: str, q: float, min_samples: int = 20) -> Optional[float]:
+        """Перцентиль q (0..1) по последним наблюдениям или None, если их мало"""
+        samples = self._samples.get(name)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def get(self, name: str, default: float = 0) -> float:
+        """Получить значение метрики по имени"""
+        if name in self._gauges:
+            return self._gauges[name]
+        return self._counters.get(name, default)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Снимок всех метрик"""
+        result = dict(self._counters)
+        result.update(self._gauges)
+        for name in self._samples:
+            for q in (0.5, 0.95, 0.99):
+                value = self.percentile(name, q, min_samples=1)
+                if value is not None:
+                    result[f"{name}_p{int(q * 100)}"] = round(value, 4)
+        return result
+
+
+# Создаем глобальный экземпляр метрик
+metrics = Metrics()
@@ -0,0 +1,209 @@
+"""
+Офлайн-индекс заголовков и кратких описаний статей Википедии
+
+Формат файла (все числа little-endian):
+
+    заголовок    HEADER: magic, версия, язык, число статей, число ключей,
+                 смещения таблицы статей, таблицы ключей и блоба ключей
+    записи       для каждой статьи: <H длина заголовка, заголовок,
+                 <I длина описания, описание (UTF-8)
+    статьи       <Q смещение записи для каждой статьи
+    блоб ключей  нормализованные заголовки и редиректы (UTF-8)
+    ключи        <IHI (смещение в блобе, длина, номер статьи),
+                 отсортированы по байтам ключа
+
+Файл открывается через mmap, поэтому загрузка не зависит от размера
+индекса, а поиск — это двоичный поиск по таблице ключей без чтения
+всего файла в память. Индекс собирается скриптом build_offline_index.py.
+"""
+import mmap
+import os
+import struct
+from typing import NamedTuple, Optional
+from urllib.parse import quote
+
+MAGIC = b"TWIKIDX\x00"
+VERSION = 1
+
+HEADER = struct.Struct("<8sI8sIIQQQ")
+KEY_ENTRY = struct.Struct("<IHI")
+ARTICLE_ENTRY = struct.Struct("<Q")
+TITLE_LEN = struct.Struct("<H")
+SUMMARY_LEN = struct.Struct("<I")
+
+
+class OfflineEntry(NamedTuple):
+    """Статья из офлайн-индекса"""
+    title: str
+    summary: str
+    url: str
+
+
+def normalize_title(title: str) -> str:
+    """Нормализация заголовка для поиска в индексе"""
+    return " ".join(title.lower().replace("ё", "е").split())
+
+
+def article_url(title: str, lang: str = "ru") -> str:
+    """Ссылка на статью по заголовку"""
+    return f"https://{lang}.wikipedia.org/wiki/{quote(title.replace(' ', '_'))}"
+
+
+class OfflineIndex:
+    """Поиск статей в офлайн-индексе, отображенном в память"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        (magic, version, lang, self.article_count, self.key_count,
+         self._articles_offset, self._keys_offset, self._blob_offset) = HEADER.unpack_from(self._mm, 0)
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Неверный формат офлайн-индекса: {path}")
+
+        self.lang = lang.rstrip(b"\x00").decode("ascii")
+
+    @classmethod
+    def load(cls, path: str) -> Optional["OfflineIndex"]:
+        """Открыть индекс, если файл существует"""
+        if not path or not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def _key_at(self, position: int) -> tuple:
+        offset, length, article = KEY_ENTRY.unpack_from(
+            self._mm, self._keys_offset + position * KEY_ENTRY.size
+        )
+        start = self._blob_offset + offset
+        return self._mm[start:start + length], article
+
+    def _find(self, key: bytes) -> Optional[int]:
+        """Двоичный поиск ключа, возвращает номер статьи"""
+        low, high = 0, self.key_count
+        while low < high:
+            middle = (low + high) // 2
+            middle_key, article = self._key_at(middle)
+            if middle_key < key:
+                low = middle + 1
+            elif middle_key > key:
+                high = middle
+            else:
+                return article
+        return None
+
+    def _read_article(self, number: int) -> OfflineEntry:
+        (offset,) = ARTICLE_ENTRY.unpack_from(self._mm, self._articles_offset + number * ARTICLE_ENTRY.size)
+
+        (title_length,) = TITLE_LEN.unpack_from(self._mm, offset)
+        offset += TITLE_LEN.size
+        title = self._mm[offset:offset + title_length].decode("utf-8")
+        offset += title_length
+
+        (summary_length,) = SUMMARY_LEN.unpack_from(self._mm, offset)
+        offset += SUMMARY_LEN.size
+        summary = self._mm[offset:offset + summary_length].decode("utf-8")
+
+        return OfflineEntry(title=title, summary=summary, url=article_url(title, self.lang))
+
+    def iter_titles(self):
+        """Перебрать заголовки всех статей индекса"""
+        for number in range(self.article_count):
+            (offset,) = ARTICLE_ENTRY.unpack_from(self._mm, self._articles_offset + number * ARTICLE_ENTRY.size)
+            (title_length,) = TITLE_LEN.unpack_from(self._mm, offset)
+            start = offset + TITLE_LEN.size
+            yield self._mm[start:start + title_length].decode("utf-8")
+
+    def lookup(self, term: str) -> Optional[OfflineEntry]:
+        """Найти статью по точному заголовку или редиректу"""
+        number = self._find(normalize_title(term).encode("utf-8"))
+        if number is None:
+            return None
+        return self._read_article(number)
+
+    def __len__(self) -> int:
+        return self.article_count
+
+    def close(self) -> None:
+        """Закрыть файл индекса"""
+        self._mm.close()
+        self._file.close()
+
+
+class OfflineIndexWriter:
+    """Потоковая запись офлайн-индекса"""
+
+    def __init__(self, path: str, lang: str = "ru"):
+        self.path = path
+        self.lang = lang
+        self._tmp_path = path + ".tmp"
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(b"\x00" * HEADER.size)
+
+        self._record_offsets = []
+        self._keys = {}
+        self._redirects = []
+
+    def add_article(self, title: str, summary: str) -> None:
+        """Добавить статью (записывается на диск сразу)"""
+        key = normalize_title(title)
+        if not key or key in self._keys:
+            return
+
+        title_bytes = title.encode("utf-8")[:0xFFFF]
+        summary_bytes = summary.encode("utf-8")
+
+        self._record_offsets.append(self._file.tell())
+        self._file.write(TITLE_LEN.pack(len(title_bytes)))
+        self._file.write(title_bytes)
+        self._file.write(SUMMARY_LEN.pack(len(summary_bytes)))
+        self._file.write(summary_bytes)
+
+        self._keys[key] = len(self._record_offsets) - 1
+
+    def add_redirect(self, source: str, target: str) -> None:
+        """Добавить редирект (разрешается при завершении записи)"""
+        self._redirects.append((normalize_title(source), normalize_title(target)))
+
+    def finish(self) -> dict:
+        """Дописать таблицы и заголовок, атомарно заменить файл индекса"""
+        redirects = 0
+        for source, target in self._redirects:
+            if source and source not in self._keys and target in self._keys:
+                self._keys[source] = self._keys[target]
+                redirects += 1
+
+        articles_offset = self._file.tell()
+        for offset in self._record_offsets:
+            self._file.write(ARTICLE_ENTRY.pack(offset))
+
+        entries = sorted((key.encode("utf-8")[:0xFFFF], number) for key, number in self._keys.items())
+
+        blob_offset = self._file.tell()
+        key_offsets = []
+        position = 0
+        for key, _number in entries:
+            key_offsets.append(position)
+            self._file.write(key)
+            position += len(key)
+
+        keys_offset = self._file.tell()
+        for (key, number), offset in zip(entries, key_offsets):
+            self._file.write(KEY_ENTRY.pack(offset, len(key), number))
+
+        self._file.seek(0)
+        self._file.write(HEADER.pack(
+            MAGIC, VERSION, self.lang.encode("ascii")[:8],
+            len(self._record_offsets), len(entries),
+            articles_offset, keys_offset, blob_offset
+        ))
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+        return {'articles': len(self._record_offsets), 'redirects': redirects, 'keys': len(entries)}
@@ -0,0 +1,175 @@
+"""
+Планировщик исходящих запросов к Bot API
+
+Все отправки и правки сообщений проходят через сессию бота, поэтому
+ограничения Telegram соблюдаются здесь, а не в обработчиках:
+- общий лимит сообщений в секунду на бота (при нескольких процессах-
+  обработчиках каждый получает свою долю, см. create_bot);
+- лимит на чат (для групп — строже), сообщения одного чата уходят
+  строго по порядку;
+- ответы пользователям идут раньше массовых рассылок (приоритет
+  задается контекстом bulk_priority);
+- при TelegramRetryAfter запрос повторяется после указанной паузы.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from .metrics import metrics
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+send_priority: ContextVar[int] = ContextVar("send_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def bulk_priority():
+    """Отправки внутри блока уступают очередь ответам пользователям"""
+    token = send_priority.set(PRIORITY_BULK)
+    try:
+        yield
+    finally:
+        send_priority.reset(token)
+
+
+class OutboundSession(AiohttpSession):
+    """Сессия бота с очередью отправок по лимитам Telegram"""
+
+    def __init__(self, global_rate: float = 30.0, chat_rate: float = 1.0, chat_burst: int = 5,
+                 group_rate: float = 20 / 60, max_retries: int = 3, max_chats: int = 10000, **kwargs):
+        super().__init__(**kwargs)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        # Доля процесса в общем лимите может быть меньше одного сообщения в секунду
+        self.global_budget = TokenBucket(global_rate, max(global_rate, 1))
+
+        self._chat_budgets: "OrderedDict[int, TokenBucket]" = OrderedDict()
+        self._chat_locks: Dict[int, Tuple[asyncio.Lock, int]] = {}
+        self._waiters: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._turn: Optional[asyncio.Condition] = None
+        self._paused_until = 0.0
+
+    def _budget_for(self, chat_id: int) -> TokenBucket:
+        """Лимит чата (хранятся только недавние чаты)"""
+        bucket = self._chat_budgets.get(chat_id)
+        if bucket is None:
+            if chat_id < 0:
+                bucket = TokenBucket(self.group_rate, 1)
+            else:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chat_budgets[chat_id] = bucket
+            while len(self._chat_budgets) > self.max_chats:
+                self._chat_budgets.popitem(last=False)
+        else:
+            self._chat_budgets.move_to_end(chat_id)
+        return bucket
+
+    async def _acquire_global(self, priority: int) -> None:
+        """Дождаться своей очереди в общем лимите: сначала по приоритету, затем по времени"""
+        if self._turn is None:
+            self._turn = asyncio.Condition()
+
+        entry = (priority, next(self._seq))
+        async with self._turn:
+            heapq.heappush(self._waiters, entry)
+            metrics.set_gauge("outbound_queued", len(self._waiters))
+            try:
+                while True:
+                    if self._waiters[0] == entry:
+                        wait = max(self.global_budget.delay(), self._paused_until - time.monotonic())
+                        if wait <= 0 and self.global_budget.try_acquire():
+                            return
+                        # Первый в очереди ждет токен; пришедший позже с более
+                        # высоким приоритетом сам станет первым
+                        try:
+                            await asyncio.wait_for(self._turn.wait(), timeout=max(wait, 0.001))
+                        except asyncio.TimeoutError:
+                            pass
+                    else:
+                        await self._turn.wait()
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                metrics.set_gauge("outbound_queued", len(self._waiters))
+                self._turn.notify_all()
+
+    def _chat_lock(self, chat_id: int) -> asyncio.Lock:
+        lock, users = self._chat_locks.get(chat_id, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._chat_locks[chat_id] = (lock, users + 1)
+        return lock
+
+    def _release_chat_lock(self, chat_id: int) -> None:
+        lock, users = self._chat_locks[chat_id]
+        if users == 1:
+            del self._chat_locks[chat_id]
+        else:
+            self._chat_locks[chat_id] = (lock, users - 1)
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[TelegramType],
+                           timeout: Optional[int] = None) -> TelegramType:
+        chat_id = getattr(method, "chat_id", None)
+        if not isinstance(chat_id, int):
+            # Запросы не к чату (getUpdates, ответы на callback и инлайн-запросы)
+            # и отправки по @username идут без очереди
+            return await super().make_request(bot, method, timeout)
+
+        priority = send_priority.get()
+        enqueued = time.monotonic()
+        lock = self._chat_lock(chat_id)
+        try:
+            # Пока отправляется одно сообщение чата, следующие ждут — порядок сохраняется
+            async with lock:
+                budget = self._budget_for(chat_id)
+                for attempt in range(self.max_retries + 1):
+                    # Повтор после flood control — тоже отправка: снова расходует оба лимита
+                    while not budget.try_acquire():
+                        await asyncio.sleep(budget.delay())
+                    await self._acquire_global(priority)
+                    if attempt == 0:
+                        metrics.observe("outbound_queue_delay", time.monotonic() - enqueued)
+                        if priority == PRIORITY_BULK:
+                            metrics.observe("outbound_queue_delay_bulk", time.monotonic() - enqueued)
+
+                    try:
+                        return await super().make_request(bot, method, timeout)
+                    except TelegramRetryAfter as e:
+                        if attempt == self.max_retries:
+                            raise
+                        metrics.inc("outbound_retry_after")
+                        logger.warning(f"Flood control в чате {chat_id}: пауза {e.retry_after} с")
+                        # Превышение могло быть и общим — притормаживаем все отправки
+                        self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                        await asyncio.sleep(e.retry_after)
+        finally:
+            self._release_chat_lock(chat_id)
+
+    def stats(self) -> dict:
+        """Состояние очереди отправок"""
+        return {
+            'queued': len(self._waiters),
+            'queue_delay_p50': metrics.percentile("outbound_queue_delay", 0.5),
+            'queue_delay_p95': metrics.percentile("outbound_queue_delay", 0.95),
+            'retry_after': int(metrics.get("outbound_retry_after")),
+        }
@@ -0,0 +1,131 @@
+"""
+Упреждающая загрузка статей, на которые ссылается только что показанная
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+
+from config import config
+from database import db
+from .lookup import Article, WikiError, wiki
+from .metrics import metrics
+from .ratelimit import TokenBucket
+from .scheduler import LookupRejected, lookup_scheduler
+from .shutdown import cancel_tasks
+
+logger = logging.getLogger(__name__)
+
+
+class LinkPrefetcher:
+    """
+    Загружает в кэш статьи, которые пользователь вероятнее всего откроет следующими
+
+    Кандидаты — исходящие ссылки показанной статьи, отсортированные по тому,
+    как часто другие пользователи находили их вскоре после нее (история
+    поиска). Ссылки, которых никто не искал, не загружаются. Бюджеты:
+    user_budget статей на пользователя за user_window секунд и global_rate
+    запросов к Википедии в секунду (вместе с запросом ссылок).
+    """
+
+    def __init__(self, top_n: int = 3, user_budget: int = 5, user_window: float = 300,
+                 global_rate: float = 1.0, global_burst: int = 5, max_users: int = 10000):
+        self.top_n = top_n
+        self.user_budget = user_budget
+        self.user_window = user_window
+        self.max_users = max_users
+        self.global_budget = TokenBucket(global_rate, global_burst)
+        self._user_budgets: "OrderedDict[int, TokenBucket]" = OrderedDict()
+        self._tasks: set = set()
+
+    def schedule(self, article: Article, user_id: int) -> None:
+        """Запустить упреждающую загрузку в фоне (ответ пользователю не ждет)"""
+        if not config.PREFETCH_ENABLED:
+            return
+
+        task = asyncio.create_task(self._run(article, user_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def stop(self) -> int:
+        """Отменить начатые загрузки (при выключении); возвращает их число"""
+        return await cancel_tasks(self._tasks)
+
+    def _budget_for(self, user_id: int) -> TokenBucket:
+        """Бюджет пользователя (хранятся только недавние пользователи)"""
+        bucket = self._user_budgets.get(user_id)
+        if bucket is None:
+            bucket = TokenBucket(self.user_budget / self.user_window, self.user_budget)
+            self._user_budgets[user_id] = bucket
+            while len(self._user_budgets) > self.max_users:
+                self._user_budgets.popitem(last=False)
+        else:
+            self._user_budgets.move_to_end(user_id)
+        return bucket
+
+    async def _run(self, article: Article, user_id: int) -> None:
+        try:
+            await self.prefetch(article, user_id)
+        except Exception as e:
+            logger.debug(f"Упреждающая загрузка для «{article.title}» не удалась: {e!r}")
+
+    async def prefetch(self, article: Article, user_id: int) -> int:
+        """Загрузить наиболее вероятные следующие статьи; возвращает их число"""
+        # История поиска собрана по разделу по умолчанию
+        if article.lang != wiki.default_lang:
+            return 0
+
+        budget = self._budget_for(user_id)
+        if budget.available() < 1:
+            metrics.inc("prefetch_throttled")
+            return 0
+
+        # Не конкурируем с запросами пользователей
+        backend = wiki.backend(article.lang)
+        if backend.breaker.state != backend.breaker.CLOSED or lookup_scheduler.stats()['queued'] > 0:
+            return 0
+
+        related = await db.get_related_titles(
+            article.title,
+            window=config.PREFETCH_COOCCURRENCE_WINDOW,
+            limit=self.top_n * 5
+        )
+        if not related:
+            return 0
+
+        if not self.global_budget.try_acquire():
+            metrics.inc("prefetch_throttled")
+            return 0
+
+        links = set(await wiki.article_links(article.title, article.lang))
+        cache = backend.cache
+        candidates = [
+            title for title, _ in related
+            if title in links and not cache.is_fresh(cache.make_key(title))
+        ][:self.top_n]
+
+        fetched = 0
+        for title in candidates:
+            if not budget.try_acquire() or not self.global_budget.try_acquire():
+                metrics.inc("prefetch_throttled")
+                break
+
+            try:
+                prefetched = await wiki.lookup_title(title, article.lang)
+            except (WikiError, LookupRejected):
+                continue
+
+            prefetched.prefetched = True
+            fetched += 1
+            metrics.inc("prefetch_fetched")
+
+        return fetched
+
+
+# Создаем глобальный загрузчик
+link_prefetcher = LinkPrefetcher(
+    top_n=config.PREFETCH_TOP_N,
+    user_budget=config.PREFETCH_USER_BUDGET,
+    user_window=config.PREFETCH_USER_WINDOW,
+    global_rate=config.PREFETCH_GLOBAL_RATE,
+    global_burst=config.PREFETCH_GLOBAL_BURST
+)
@@ -0,0 +1,82 @@
+"""
+Индекс префиксов заголовков для автодополнения в инлайн-режиме
+"""
+from bisect import bisect_left, insort
+from typing import Iterable, List, Tuple
+
+from .offline_index import normalize_title
+
+
+class PrefixIndex:
+    """
+    Отсортированный массив нормализованных заголовков с двоичным поиском
+
+    Все заголовки с данным префиксом лежат подряд, поэтому подсказки
+    находятся двумя bisect без обхода всего корпуса.
+    """
+
+    def __init__(self, scan_limit: int = 500, top_size: int = 20):
+        self.scan_limit = scan_limit
+        self.top_size = top_size
+        self._keys: List[str] = []
+        self._titles: List[str] = []
+        self._weights: List[int] = []
+        self._top: List[str] = []
+
+    def build(self, items: Iterable[Tuple[str, int]]) -> None:
+        """Построить индекс по (заголовок, вес) заново"""
+        merged = {}
+        for title, weight in items:
+            key = normalize_title(title)
+            if not key:
+                continue
+            if key in merged:
+                merged[key] = (merged[key][0], merged[key][1] + weight)
+            else:
+                merged[key] = (title, weight)
+
+        entries = sorted((key, title, weight) for key, (title, weight) in merged.items())
+        self._keys = [entry[0] for entry in entries]
+        self._titles = [entry[1] for entry in entries]
+        self._weights = [entry[2] for entry in entries]
+        self._rebuild_top()
+
+    def _rebuild_top(self) -> None:
+        order = sorted(range(len(self._keys)), key=lambda i: -self._weights[i])[:self.top_size]
+        self._top = [self._titles[i] for i in order]
+
+    def add(self, title: str, weight: int = 1) -> None:
+        """Добавить заголовок или увеличить его вес"""
+        key = normalize_title(title)
+        if not key:
+            return
+
+        position = bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            self._weights[position] += weight
+            return
+
+        insort(self._keys, key)
+        self._titles.insert(position, title)
+        self._weights.insert(position, weight)
+        if len(self._top) < self.top_size:
+            self._top.append(title)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[str]:
+        """Самые популярные заголовки, начинающиеся с prefix"""
+        key = normalize_title(prefix)
+        if not key:
+            return self._top[:limit]
+
+        low = bisect_left(self._keys, key)
+        high = min(bisect_left(self._keys, key + "\uffff"), low + self.scan_limit)
+        order = sorted(range(low, high), key=lambda i: -self._weights[i])
+        return [self._titles[i] for i in order[:limit]]
+
+    def __contains__(self, title: str) -> bool:
+        key = normalize_title(title)
+        position = bisect_left(self._keys, key)
+        return position < len(self._keys) and self._keys[position] == key
+
+    def __len__(self) -> int:
+        return len(self._keys)
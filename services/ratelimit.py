@@ -0,0 +1,44 @@
+"""
+Ограничение частоты операций алгоритмом token bucket
+"""
+import time
+
+
+class TokenBucket:
+    """
+    Корзина токенов: пополняется со скоростью rate в секунду до capacity
+
+    Каждая операция забирает токены; если их не хватает, операцию
+    нужно пропустить или отложить.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """Забрать токены, если их достаточно"""
+        self._refill()
+        if self.tokens < tokens:
+            return False
+        self.tokens -= tokens
+        return True
+
+    def available(self) -> float:
+        """Сколько токенов доступно сейчас"""
+        self._refill()
+        return self.tokens
+
+    def delay(self, tokens: float = 1) -> float:
+        """Через сколько секунд накопится нужное число токенов"""
+        self._refill()
+        if self.tokens >= tokens:
+            return 0.0
+        return (tokens - self.tokens) / self.rate
@@ -0,0 +1,72 @@
+"""
+Разбиение полного текста статьи на страницы для чтения в чате
+"""
+from typing import List
+
+# Прирост длины при HTML-экранировании (как в utils.safe_html)
+_ESCAPE_EXTRA = {"&": 4, "<": 3, ">": 3, '"': 5}
+
+# Границы разреза: от самых крупных к самым мелким
+_SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+
+def message_size(text: str) -> int:
+    """
+    Длина текста так, как ее считает Telegram: в единицах UTF-16
+    и после HTML-экранирования
+    """
+    size = len(text.encode("utf-16-le")) // 2
+    for char, extra in _ESCAPE_EXTRA.items():
+        size += text.count(char) * extra
+    return size
+
+
+def _pieces(text: str, limit: int, level: int = 0) -> List[str]:
+    """Части текста не длиннее limit, разрезанные по самой крупной возможной границе"""
+    if message_size(text) <= limit:
+        return [text]
+
+    if level == len(_SEPARATORS):
+        # Слово длиннее страницы — режем по символам
+        pieces, current, size = [], [], 0
+        for char in text:
+            char_size = message_size(char)
+            if size + char_size > limit:
+                pieces.append("".join(current))
+                current, size = [], 0
+            current.append(char)
+            size += char_size
+        pieces.append("".join(current))
+        return pieces
+
+    separator = _SEPARATORS[level]
+    parts = text.split(separator)
+    pieces = []
+    for i, part in enumerate(parts):
+        if i < len(parts) - 1:
+            part += separator
+        pieces.extend(_pieces(part, limit, level + 1))
+    return pieces
+
+
+def split_pages(text: str, limit: int = 3500) -> List[str]:
+    """
+    Разбить текст на страницы не длиннее limit (по меркам Telegram)
+
+    Страницы заполняются целыми абзацами; абзац длиннее страницы
+    режется по строкам, затем по предложениям и пробелам.
+    """
+    pages = []
+    current, size = "", 0
+
+    for piece in _pieces(text.strip(), limit):
+        piece_size = message_size(piece)
+        if current and size + piece_size > limit:
+            pages.append(current.strip())
+            current, size = "", 0
+        current += piece
+        size += piece_size
+
+    if current.strip():
+        pages.append(current.strip())
+    return pages
@@ -0,0 +1,127 @@
+"""
+Множество зарегистрированных пользователей в памяти
+
+Проверка «пользователь зарегистрирован» нужна почти каждому обновлению,
+поэтому отвечаем на нее без обращения к БД. telegram_id хранятся в
+отсортированном массиве 64-битных чисел (8 байт на пользователя против
+~70 байт у set из int) с поиском делением пополам. Изменения после
+загрузки копятся в небольших множествах и время от времени вливаются
+в массив.
+
+При нескольких процессах-обработчиках каждый хранит только своих
+пользователей (telegram_id % WORKERS, как раздает обновления супервизор),
+а удаление пользователя пересылается процессу, в чьем множестве он есть.
+"""
+import logging
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from heapq import merge
+from typing import Callable, Optional
+
+from database import db
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RegisteredUsers:
+    """Компактное множество telegram_id зарегистрированных пользователей"""
+
+    def __init__(self, compact_min: int = 1024):
+        self.compact_min = compact_min
+        self.loaded = False
+        # Доля пользователей процесса: (номер процесса, число процессов)
+        self.shard = (0, 1)
+        # Пересылка удаления процессу пользователя (задает процесс-обработчик)
+        self.on_discard: Optional[Callable[[int], None]] = None
+        self._ids = array('q')
+        self._added = set()
+        self._removed = set()
+
+    def _in_array(self, telegram_id: int) -> bool:
+        i = bisect_left(self._ids, telegram_id)
+        return i < len(self._ids) and self._ids[i] == telegram_id
+
+    def contains(self, telegram_id: int) -> Optional[bool]:
+        """Зарегистрирован ли пользователь; None — множество еще не загружено"""
+        if telegram_id in self._added:
+            return True
+        if telegram_id in self._removed:
+            return False
+        if not self.loaded:
+            return None
+        return self._in_array(telegram_id)
+
+    def add(self, telegram_id: int) -> None:
+        """Отметить пользователя зарегистрированным"""
+        self._removed.discard(telegram_id)
+        if not self.loaded or not self._in_array(telegram_id):
+            self._added.add(telegram_id)
+            self._maybe_compact()
+
+    def discard(self, telegram_id: int) -> None:
+        """Убрать пользователя (удален) — здесь и в процессе, который его обслуживает"""
+        self.forget(telegram_id)
+        if self.on_discard is not None:
+            self.on_discard(telegram_id)
+
+    def forget(self, telegram_id: int) -> None:
+        """Убрать пользователя только из множества этого процесса"""
+        self._added.discard(telegram_id)
+        if not self.loaded or self._in_array(telegram_id):
+            self._removed.add(telegram_id)
+            self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        """Влить накопленные изменения в массив (амортизированно O(1) на изменение)"""
+        if not self.loaded:
+            return
+        if len(self._added) + len(self._removed) < max(self.compact_min, len(self._ids) // 16):
+            return
+
+        removed = self._removed
+        self._ids = array('q', (
+            telegram_id for telegram_id in merge(self._ids, sorted(self._added))
+            if telegram_id not in removed
+        ))
+        self._added, self._removed = set(), set()
+
+    async def load(self, batch_size: int = 10000) -> None:
+        """Загрузить множество из БД одним потоковым проходом (только свою долю)"""
+        started = time.monotonic()
+        index, count = self.shard
+        ids = array('q')
+        async for batch in db.iter_registered_ids(batch_size):
+            if count > 1:
+                ids.extend(telegram_id for telegram_id in batch if telegram_id % count == index)
+            else:
+                ids.extend(batch)
+
+        # Изменения, пришедшие во время загрузки, остаются в _added/_removed
+        self._ids = ids
+        self.loaded = True
+        self._added = {telegram_id for telegram_id in self._added if not self._in_array(telegram_id)}
+        self._removed = {telegram_id for telegram_id in self._removed if self._in_array(telegram_id)}
+        self._maybe_compact()
+
+        metrics.set_gauge("registered_users", len(self))
+        logger.info(
+            f"Зарегистрированных пользователей: {len(self)} "
+            f"({self.memory_bytes() / 1024:.0f} КБ, {time.monotonic() - started:.2f} с)"
+        )
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._added) - len(self._removed)
+
+    def memory_bytes(self) -> int:
+        """Приблизительный объем памяти, занимаемый множеством"""
+        return (
+            self._ids.buffer_info()[1] * self._ids.itemsize
+            + sys.getsizeof(self._added) + sys.getsizeof(self._removed)
+            + 32 * (len(self._added) + len(self._removed))
+        )
+
+
+registered_users = RegisteredUsers()
@@ -0,0 +1,129 @@
+"""
+Выделенный планировщик запросов к Википедии
+
+Блокирующие вызовы библиотеки выполняются в собственном пуле потоков,
+а число одновременных запросов ограничено семафором с ограниченной
+очередью ожидания. Так медленная Википедия не занимает общий executor
+и не блокирует остальную работу бота.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from config import config
+from .metrics import metrics
+
+
+class LookupRejected(Exception):
+    """Запрос отклонен: очередь переполнена или истек таймаут ожидания"""
+
+
+class LookupScheduler:
+    """Планировщик запросов к внешнему API с ограничением параллелизма"""
+
+    def __init__(self, max_workers: int = 4, max_concurrency: int = 4,
+                 max_queue: int = 50, queue_timeout: float = 10.0):
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._queued = 0
+        self._in_flight = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Пул потоков создается при первом запросе"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="wiki-lookup"
+            )
+        return self._executor
+
+    def _set_queued(self, value: int) -> None:
+        self._queued = value
+        metrics.set_gauge("lookup_queued", value)
+
+    def _set_in_flight(self, value: int) -> None:
+        self._in_flight = value
+        metrics.set_gauge("lookup_in_flight", value)
+
+    def _reject(self, reason: str) -> LookupRejected:
+        metrics.inc("lookup_rejected")
+        return LookupRejected(reason)
+
+    async def _acquire(self) -> None:
+        """Занять слот, ожидая в ограниченной очереди"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return
+
+        if self._queued >= self.max_queue:
+            raise self._reject("очередь запросов переполнена")
+
+        self._set_queued(self._queued + 1)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject("превышено время ожидания в очереди")
+        finally:
+            self._set_queued(self._queued - 1)
+
+    def _release(self, _future=None) -> None:
+        self._set_in_flight(self._in_flight - 1)
+        self._semaphore.release()
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Выполнить блокирующую функцию в пуле потоков планировщика"""
+        await self._acquire()
+        self._set_in_flight(self._in_flight + 1)
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = self.executor.submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+
+        # Слот освобождается, только когда поток действительно завершил работу,
+        # даже если ожидающая корутина была отменена
+        def on_done(f):
+            try:
+                loop.call_soon_threadsafe(self._release, f)
+            except RuntimeError:
+                # Цикл событий уже закрыт (выключение бота)
+                pass
+
+        future.add_done_callback(on_done)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        """Текущее состояние планировщика"""
+        return {
+            'workers': self.max_workers,
+            'in_flight': self._in_flight,
+            'queued': self._queued,
+            'rejected': int(metrics.get("lookup_rejected")),
+        }
+
+    def shutdown(self) -> None:
+        """Остановить пул потоков"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Создаем глобальный планировщик запросов к Википедии
+lookup_scheduler = LookupScheduler(
+    max_workers=config.LOOKUP_WORKERS,
+    max_concurrency=config.LOOKUP_MAX_CONCURRENCY,
+    max_queue=config.LOOKUP_QUEUE_SIZE,
+    queue_timeout=config.LOOKUP_QUEUE_TIMEOUT
+)
@@ -0,0 +1,157 @@
+"""
+Реестр выполняющихся поисков пользователей
+
+У каждого пользователя не больше одного активного поиска: новый термин
+или отмена прерывают предыдущий, чтобы он не тратил запросы к Википедии
+и не редактировал сообщение, которое уже никому не нужно.
+
+Если экземпляров бота несколько и у них общий Redis (FSM_STORAGE=redis),
+поиск пользователя может выполняться в другом процессе: отмена и новый
+поиск рассылаются остальным процессам через канал Redis.
+"""
+import asyncio
+import logging
+import uuid
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.states import SearchStates
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Слова отмены поиска
+CANCEL_WORDS = ["отмена", "cancel", "стоп"]
+
+# Канал Redis для отмены поисков в других процессах
+CANCEL_CHANNEL = "searches:cancel"
+
+
+def interrupts_search(text: Optional[str], state: Optional[str]) -> bool:
+    """
+    Прерывает ли сообщение текущий поиск пользователя
+
+    Это отмена поиска или новый термин (состояние ввода термина); такие
+    сообщения не должны ждать завершения текущего поиска.
+    """
+    if not text or text.startswith("/"):
+        return False
+    return text.lower() in CANCEL_WORDS or state == SearchStates.waiting_for_term.state
+
+
+class SearchRegistry:
+    """Текущие задачи поиска по пользователям"""
+
+    def __init__(self):
+        self._tasks: Dict[int, asyncio.Task] = {}
+        # Задачи, отмененные реестром (а не снаружи, например при остановке бота)
+        self._cancelled: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+        # Общий Redis экземпляров бота и подписка на отмены из других процессов
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+        self._origin = uuid.uuid4().hex
+
+    async def connect(self, redis) -> None:
+        """Рассылать отмены поисков другим процессам и получать их отмены"""
+        pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(CANCEL_CHANNEL)
+        self._redis = redis
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def disconnect(self) -> None:
+        """Отписаться от отмен других процессов"""
+        self._redis = None
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def _listen(self, pubsub) -> None:
+        try:
+            while True:
+                try:
+                    async for message in pubsub.listen():
+                        data = message["data"]
+                        if isinstance(data, bytes):
+                            data = data.decode()
+                        origin, _, user_id = data.partition(":")
+                        if origin != self._origin and self._cancel_local(int(user_id)):
+                            metrics.inc("searches_cancelled_remote")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Подписка на отмену поисков прервана: {e}")
+                    await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
+
+    async def _publish(self, user_id: int) -> None:
+        """Отменить поиск пользователя в других процессах"""
+        if self._redis is None:
+            return
+        try:
+            await self._redis.publish(CANCEL_CHANNEL, f"{self._origin}:{user_id}")
+        except Exception as e:
+            logger.warning(f"Не удалось разослать отмену поиска пользователя {user_id}: {e}")
+
+    async def start(self, user_id: int, factory: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """
+        Запустить поиск пользователя, отменив и дождавшись предыдущий
+
+        Returns:
+            Задача поиска; если ее отменят, await задачи выбросит CancelledError
+        """
+        previous = self._tasks.pop(user_id, None)
+        if previous is not None and not previous.done():
+            self._cancelled.add(previous)
+            previous.cancel()
+            metrics.inc("searches_superseded")
+            # Предыдущий поиск должен завершиться раньше, чем начнется новый
+            await asyncio.wait({previous})
+        # Поиск пользователя мог начаться и в другом процессе
+        await self._publish(user_id)
+
+        task = asyncio.ensure_future(factory())
+        self._tasks[user_id] = task
+        metrics.set_gauge("searches_active", len(self._tasks))
+        return task
+
+    def finish(self, user_id: int, task: asyncio.Task) -> None:
+        """Убрать завершенный поиск из реестра (если его еще не сменил новый)"""
+        if self._tasks.get(user_id) is task:
+            del self._tasks[user_id]
+            metrics.set_gauge("searches_active", len(self._tasks))
+
+    async def cancel(self, user_id: int) -> bool:
+        """
+        Отменить текущий поиск пользователя (и в других процессах)
+
+        Returns:
+            True — в этом процессе было что отменять
+        """
+        cancelled = self._cancel_local(user_id)
+        if cancelled:
+            metrics.inc("searches_cancelled")
+        await self._publish(user_id)
+        return cancelled
+
+    def _cancel_local(self, user_id: int) -> bool:
+        task = self._tasks.pop(user_id, None)
+        metrics.set_gauge("searches_active", len(self._tasks))
+        if task is None or task.done():
+            return False
+
+        self._cancelled.add(task)
+        task.cancel()
+        return True
+
+    def superseded(self, task: asyncio.Task) -> bool:
+        """Была ли задача отменена реестром (новым поиском или командой отмены)"""
+        return task in self._cancelled
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+
+# Создаем глобальный реестр поисков
+search_registry = SearchRegistry()
@@ -0,0 +1,63 @@
+"""
+Плавное выключение бота
+
+Обновления, принятые до остановки приема, дорабатываются не дольше
+SHUTDOWN_TIMEOUT; не успевшие к этому сроку отменяются и попадают в
+отчет как прерванные.
+"""
+import asyncio
+import time
+from typing import Iterable, Tuple
+
+
+async def cancel_tasks(tasks: Iterable[asyncio.Task]) -> int:
+    """Отменить задачи и дождаться их завершения; возвращает число отмененных"""
+    pending = [task for task in tasks if not task.done() and task is not asyncio.current_task()]
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    return len(pending)
+
+
+class InFlightTracker:
+    """Задачи обработки обновлений, которых нужно дождаться при выключении"""
+
+    def __init__(self):
+        self._tasks: set = set()
+
+    def track(self, task: asyncio.Task) -> None:
+        """Отметить задачу (повторная отметка ничего не меняет)"""
+        if task not in self._tasks:
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def drain(self, timeout: float) -> Tuple[int, int]:
+        """
+        Дождаться обработки принятых обновлений
+
+        Returns:
+            (число завершившихся, число прерванных по истечении timeout)
+        """
+        deadline = time.monotonic() + timeout
+        current = asyncio.current_task()
+        seen = set()
+
+        # Задачи, созданные перед остановкой приема, должны успеть начаться
+        await asyncio.sleep(0)
+        while True:
+            pending = self._tasks - {current}
+            seen |= pending
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                break
+            await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+
+        dropped = await cancel_tasks(pending)
+        return len(seen) - dropped, dropped
+
+
+# Создаем глобальный учет обрабатываемых обновлений
+in_flight = InFlightTracker()
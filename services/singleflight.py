@@ -0,0 +1,53 @@
+"""
+Объединение одновременных одинаковых запросов (single-flight)
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from .metrics import metrics
+
+
+class SingleFlight:
+    """
+    Одновременные вызовы с одинаковым ключом выполняются один раз,
+    остальные вызывающие ждут тот же результат. Если все ожидающие
+    отменены, общая задача тоже отменяется.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполнить factory() или присоединиться к уже идущему вызову"""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._tasks[key] = task
+            self._waiters[task] = 0
+            task.add_done_callback(lambda _t, k=key: self._forget(k, _t))
+        else:
+            metrics.inc(f"{self.name}_coalesced")
+
+        self._waiters[task] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters.get(task) == 1:
+                task.cancel()
+            raise
+        finally:
+            if task in self._waiters:
+                self._waiters[task] -= 1
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        self._waiters.pop(task, None)
+        if not task.cancelled():
+            # Исключение уже получено ожидающими, помечаем его обработанным
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._tasks)
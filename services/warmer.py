@@ -0,0 +1,133 @@
+"""
+Фоновый прогрев кэша статей по популярным и набирающим популярность запросам
+"""
+import asyncio
+import logging
+import time
+from itertools import zip_longest
+from typing import List, Optional
+
+from config import config
+from database import db
+from .lookup import WikiError, wiki
+from .metrics import metrics
+from .scheduler import LookupRejected
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """
+    Периодически обновляет статьи для top-N запросов, пока они не устарели
+
+    Берутся самые частые успешные запросы за все время и за последние
+    trending_hours часов. Обновляются только записи, которых нет в кэше
+    или которые истекают в ближайшие refresh_ahead секунд. Запросы идут
+    не чаще rate в секунду, а весь проход ограничен budget секундами.
+    """
+
+    def __init__(self, interval: float = 1800, top_n: int = 50, trending_hours: int = 24,
+                 rate: float = 2.0, budget: float = 120, refresh_ahead: float = 3600):
+        self.interval = interval
+        self.top_n = top_n
+        self.trending_hours = trending_hours
+        self.rate = rate
+        self.budget = budget
+        self.refresh_ahead = refresh_ahead
+        self._task: Optional[asyncio.Task] = None
+
+    async def _collect_terms(self) -> List[str]:
+        """Популярные и набирающие популярность запросы без повторов"""
+        popular = await db.get_popular_terms(limit=self.top_n)
+        trending = await db.get_popular_terms(limit=self.top_n, hours=self.trending_hours)
+
+        terms = []
+        seen = set()
+        # Чередуем списки, чтобы при нехватке бюджета прогрелись лучшие из обоих
+        for pair in zip_longest(trending, popular):
+            for item in pair:
+                if item is None:
+                    continue
+                key = wiki.cache.make_key(item[0])
+                if key not in seen:
+                    seen.add(key)
+                    terms.append(item[0])
+
+        return terms[:self.top_n]
+
+    async def run_once(self) -> dict:
+        """Один проход прогрева"""
+        started = time.monotonic()
+        warmed = skipped = failed = 0
+
+        terms = await self._collect_terms()
+        for term in terms:
+            if time.monotonic() - started >= self.budget:
+                break
+
+            if wiki.breaker.state != wiki.breaker.CLOSED:
+                # Википедия сбоит — не добавляем ей нагрузки
+                break
+
+            if wiki.cache.expires_in(wiki.cache.make_key(term)) > self.refresh_ahead:
+                skipped += 1
+                continue
+
+            try:
+                await wiki.refresh(term)
+                warmed += 1
+            except (WikiError, LookupRejected):
+                failed += 1
+            except Exception as e:
+                failed += 1
+                logger.warning(f"Ошибка прогрева кэша для '{term}': {e}")
+
+            await asyncio.sleep(1 / self.rate)
+
+        duration = time.monotonic() - started
+        metrics.inc("warmer_runs")
+        metrics.inc("warmer_warmed", warmed)
+        metrics.set_gauge("warmer_last_warmed", warmed)
+        metrics.set_gauge("warmer_last_duration", round(duration, 3))
+
+        logger.info(
+            f"Прогрев кэша: обновлено {warmed}, актуальных {skipped}, "
+            f"ошибок {failed} из {len(terms)} за {duration:.1f} с"
+        )
+        return {'warmed': warmed, 'skipped': skipped, 'failed': failed, 'duration': duration}
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка фонового прогрева кэша: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Запустить фоновую задачу прогрева"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Остановить фоновую задачу прогрева"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Создаем глобальный прогреватель кэша
+cache_warmer = CacheWarmer(
+    interval=config.CACHE_WARMER_INTERVAL,
+    top_n=config.CACHE_WARMER_TOP_N,
+    trending_hours=config.CACHE_WARMER_TRENDING_HOURS,
+    rate=config.CACHE_WARMER_RATE,
+    budget=config.CACHE_WARMER_BUDGET,
+    refresh_ahead=config.CACHE_WARMER_REFRESH_AHEAD
+)
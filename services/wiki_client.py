@@ -0,0 +1,145 @@
+"""
+Клиент MediaWiki API для одного языкового раздела Википедии
+
+Заменяет глобальный wikipedia.set_lang: у каждого языка свой клиент
+с собственным пулом соединений requests, поэтому параллельные поиски
+на разных языках не мешают друг другу. Методы блокирующие и
+вызываются в потоках планировщика запросов.
+
+requests импортируется при первом запросе, а не при запуске бота.
+"""
+import threading
+from typing import List
+
+from .http import USER_AGENT
+
+API_URL = "https://{lang}.wikipedia.org/w/api.php"
+
+
+class WikiRequestError(Exception):
+    """Сетевая ошибка или ошибка HTTP при запросе к API (запрос можно повторить)"""
+
+
+class PageMissing(Exception):
+    """Статьи с таким заголовком нет"""
+
+
+class PageAmbiguous(Exception):
+    """Заголовок ведет на страницу неоднозначности"""
+
+    def __init__(self, title: str, options: List[str]):
+        super().__init__(title)
+        self.title = title
+        self.options = options
+
+
+class WikiClient:
+    """Синхронный клиент одного языкового раздела с пулом соединений"""
+
+    def __init__(self, lang: str, pool_size: int = 4, timeout: float = 5.0, thumb_size: int = 640):
+        self.lang = lang
+        self.thumb_size = thumb_size
+        self.api_url = API_URL.format(lang=lang)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Пул соединений requests (создается при первом запросе)"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    session.headers["User-Agent"] = USER_AGENT
+                    # Потоков планировщика не больше pool_size — столько соединений и держим
+                    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size))
+                    self._session = session
+        return self._session
+
+    def _query(self, **params) -> dict:
+        """Запрос action=query к API"""
+        import requests
+
+        params.update(action="query", format="json", formatversion=2)
+        try:
+            response = self.session.get(self.api_url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException as e:
+            raise WikiRequestError(str(e) or repr(e)) from e
+
+    def search(self, term: str, limit: int = 3) -> List[str]:
+        """Поиск заголовков статей"""
+        data = self._query(list="search", srsearch=term, srlimit=limit, srprop="")
+        return [item["title"] for item in data.get("query", {}).get("search", [])]
+
+    def page(self, title: str) -> dict:
+        """
+        Вступление статьи одним запросом (с переходом по перенаправлениям)
+
+        Returns:
+            Словарь с ключами title, summary, url, image_url
+            (миниатюра главного изображения или None)
+
+        Raises:
+            PageMissing: статьи нет
+            PageAmbiguous: страница неоднозначности
+        """
+        data = self._query(
+            titles=title,
+            prop="extracts|info|pageprops|pageimages",
+            exintro=1,
+            explaintext=1,
+            inprop="url",
+            ppprop="disambiguation",
+            piprop="thumbnail",
+            pithumbsize=self.thumb_size,
+            redirects=1
+        )
+        pages = data.get("query", {}).get("pages", [])
+        if not pages or pages[0].get("missing") or pages[0].get("invalid"):
+            raise PageMissing(title)
+
+        page = pages[0]
+        if "disambiguation" in page.get("pageprops", {}):
+            raise PageAmbiguous(page["title"], self.links(page["title"]))
+
+        return {
+            "title": page["title"],
+            "summary": page.get("extract", ""),
+            "url": page.get("fullurl", ""),
+            "image_url": page.get("thumbnail", {}).get("source"),
+        }
+
+    def extract(self, title: str) -> str:
+        """Полный текст статьи без разметки"""
+        data = self._query(
+            titles=title,
+            prop="extracts",
+            explaintext=1,
+            exsectionformat="plain",
+            redirects=1
+        )
+        pages = data.get("query", {}).get("pages", [])
+        if not pages or pages[0].get("missing") or pages[0].get("invalid"):
+            raise PageMissing(title)
+        return pages[0].get("extract", "")
+
+    def links(self, title: str, limit: int = 20) -> List[str]:
+        """Ссылки страницы на статьи (варианты для неоднозначности)"""
+        data = self._query(titles=title, prop="links", plnamespace=0, pllimit=limit, redirects=1)
+        pages = data.get("query", {}).get("pages", [])
+        if not pages:
+            return []
+        return [link["title"] for link in pages[0].get("links", [])]
+
+    def close(self) -> None:
+        """Закрыть пул соединений"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
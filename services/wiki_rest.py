@@ -0,0 +1,69 @@
+"""
+Альтернативные точки доступа Википедии для хеджированных запросов
+
+Поиск идет через API мобильного зеркала, краткое описание статьи —
+через REST API (page/summary). Оба запроса асинхронные и
+полностью отменяемые, в отличие от блокирующих вызовов WikiClient
+(он выполняется в пуле потоков планировщика).
+"""
+from typing import List
+from urllib.parse import quote
+
+from .http import get_session
+
+MOBILE_API_URL = "https://{lang}.m.wikipedia.org/w/api.php"
+REST_SUMMARY_URL = "https://{lang}.wikipedia.org/api/rest_v1/page/summary/{title}"
+
+
+class AlternateNotFound(Exception):
+    """Альтернативная точка доступа не нашла статью"""
+
+
+class AlternateUnusable(Exception):
+    """Ответ альтернативной точки доступа нельзя использовать (например, неоднозначность)"""
+
+
+async def mobile_search(term: str, limit: int = 3, lang: str = "ru") -> List[str]:
+    """Поиск заголовков статей через API мобильной версии"""
+    session = await get_session()
+    params = {
+        "action": "query",
+        "list": "search",
+        "srsearch": term,
+        "srlimit": limit,
+        "srprop": "",
+        "format": "json",
+    }
+    async with session.get(MOBILE_API_URL.format(lang=lang), params=params) as response:
+        response.raise_for_status()
+        data = await response.json()
+
+    return [item["title"] for item in data.get("query", {}).get("search", [])]
+
+
+async def rest_summary(title: str, lang: str = "ru") -> dict:
+    """
+    Краткое описание статьи через REST API
+
+    Returns:
+        Словарь с ключами title, summary, url, image_url
+    """
+    session = await get_session()
+    url = REST_SUMMARY_URL.format(lang=lang, title=quote(title.replace(" ", "_"), safe=""))
+
+    async with session.get(url) as response:
+        if response.status == 404:
+            raise AlternateNotFound(title)
+        response.raise_for_status()
+        data = await response.json()
+
+    if data.get("type") != "standard":
+        # Неоднозначности и прочие особые страницы оставляем основному запросу
+        raise AlternateUnusable(data.get("type"))
+
+    return {
+        "title": data.get("title", title),
+        "summary": data.get("extract", ""),
+        "url": data.get("content_urls", {}).get("desktop", {}).get("page", ""),
+        "image_url": data.get("thumbnail", {}).get("source"),
+    }
@@ -0,0 +1,56 @@
+"""
+Хранилища состояний FSM
+
+Тип задается настройкой FSM_STORAGE: memory — в памяти процесса
+(со сроком жизни записей и ограничением размера), redis — общее для
+нескольких процессов бота. Пакет redis импортируется только при
+выборе redis.
+"""
+import logging
+from typing import Optional
+
+from aiogram.fsm.storage.base import BaseEventIsolation, BaseStorage
+
+from config import config
+from .memory_storage import BoundedMemoryStorage
+
+logger = logging.getLogger(__name__)
+
+
+def create_storage() -> BaseStorage:
+    """Создать хранилище FSM по настройкам"""
+    if config.FSM_STORAGE == "redis":
+        try:
+            from .redis_storage import RedisFSMStorage
+        except ImportError as e:
+            raise RuntimeError("Для FSM_STORAGE=redis установите пакет redis") from e
+
+        logger.info("Состояния FSM хранятся в Redis")
+        return RedisFSMStorage.from_url(
+            config.REDIS_URL,
+            state_ttl=config.FSM_STATE_TTL,
+            data_ttl=config.FSM_DATA_TTL
+        )
+
+    return BoundedMemoryStorage(
+        max_entries=config.FSM_MEMORY_MAX_ENTRIES,
+        ttl=config.FSM_STATE_TTL
+    )
+
+
+def create_events_isolation(storage: BaseStorage) -> Optional[BaseEventIsolation]:
+    """
+    Блокировка обработки событий одного пользователя между процессами
+
+    Нужна только для общего хранилища; в памяти процесса достаточно
+    обычной обработки aiogram. Подключается через EventIsolationMiddleware,
+    а не events_isolation диспетчера: отмена поиска должна проходить без
+    блокировки, которую держит сам поиск.
+    """
+    if config.FSM_STORAGE == "redis":
+        from aiogram.fsm.storage.redis import RedisEventIsolation
+        return RedisEventIsolation(redis=storage.redis)
+    return None
+
+
+__all__ = ['BoundedMemoryStorage', 'create_storage', 'create_events_isolation']
@@ -0,0 +1,155 @@
+"""
+FSM-хранилище в памяти процесса со сроком жизни и ограничением размера
+
+В отличие от MemoryStorage из aiogram:
+- чтение не создает записей (MemoryStorage заводит запись на любой
+  get_state, то есть на каждого написавшего пользователя);
+- запись без состояния и данных удаляется сразу;
+- брошенные состояния истекают через ttl секунд после последней записи;
+- при превышении max_entries вытесняются давно не использованные записи;
+- данные хранятся сериализованными (pickle), состояния — интернированными
+  строками, ключ — кортежем вместо объекта StorageKey.
+"""
+import pickle
+import sys
+import time
+from collections import OrderedDict
+from copy import copy
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+from services.metrics import metrics
+
+
+class _Record:
+    """Запись хранилища: состояние, сериализованные данные, момент истечения"""
+
+    __slots__ = ("state", "data", "expires_at")
+
+    def __init__(self):
+        self.state: Optional[str] = None
+        self.data: Optional[bytes] = None
+        self.expires_at = 0.0
+
+
+class BoundedMemoryStorage(BaseStorage):
+    """Хранилище FSM в памяти с TTL и LRU-вытеснением"""
+
+    def __init__(self, max_entries: int = 100_000, ttl: float = 24 * 3600,
+                 sweep_interval: float = 60.0, name: str = "fsm_storage"):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.name = name
+        self._entries: "OrderedDict[Tuple, _Record]" = OrderedDict()
+        self._next_sweep = time.monotonic() + sweep_interval
+        self.evictions = 0
+        self.expired = 0
+
+    @staticmethod
+    def _key(key: StorageKey) -> Tuple:
+        return (key.bot_id, key.chat_id, key.user_id, key.thread_id,
+                key.business_connection_id, key.destiny)
+
+    def _get(self, key: StorageKey) -> Optional[_Record]:
+        """Живая запись или None; просроченная удаляется"""
+        record_key = self._key(key)
+        record = self._entries.get(record_key)
+        if record is None:
+            return None
+
+        if record.expires_at <= time.monotonic():
+            del self._entries[record_key]
+            self._expire(1)
+            return None
+
+        self._entries.move_to_end(record_key)
+        return record
+
+    def _update(self, key: StorageKey, **fields) -> None:
+        """Изменить запись, продлить ее срок и соблюсти лимит размера"""
+        record_key = self._key(key)
+        now = time.monotonic()
+        record = self._entries.get(record_key)
+        if record is None or record.expires_at <= now:
+            record = _Record()
+
+        for name, value in fields.items():
+            setattr(record, name, value)
+
+        if record.state is None and record.data is None:
+            # Диалог завершен — хранить нечего
+            self._entries.pop(record_key, None)
+        else:
+            record.expires_at = now + self.ttl
+            self._entries[record_key] = record
+            self._entries.move_to_end(record_key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+                metrics.inc(f"{self.name}_evictions")
+
+        if now >= self._next_sweep:
+            self._sweep(now)
+        metrics.set_gauge(f"{self.name}_size", len(self._entries))
+
+    def _sweep(self, now: float) -> None:
+        """Удалить все просроченные записи"""
+        expired = [key for key, record in self._entries.items() if record.expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        self._expire(len(expired))
+        self._next_sweep = now + self.sweep_interval
+
+    def _expire(self, count: int) -> None:
+        if count:
+            self.expired += count
+            metrics.inc(f"{self.name}_expired", count)
+            metrics.set_gauge(f"{self.name}_size", len(self._entries))
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        """Записать состояние"""
+        value = state.state if isinstance(state, State) else state
+        self._update(key, state=sys.intern(value) if value is not None else None)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        """Получить состояние"""
+        record = self._get(key)
+        return record.state if record is not None else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        """Заменить данные"""
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(
+                f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            )
+        self._update(key, data=pickle.dumps(data, pickle.HIGHEST_PROTOCOL) if data else None)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        """Получить данные (копию)"""
+        record = self._get(key)
+        if record is None or record.data is None:
+            return {}
+        return pickle.loads(record.data)
+
+    async def get_value(self, storage_key: StorageKey, dict_key: str, default: Any = None) -> Any:
+        """Получить одно значение из данных"""
+        return copy((await self.get_data(storage_key)).get(dict_key, default))
+
+    def stats(self) -> Dict[str, int]:
+        """Размер хранилища и счетчики вытеснений"""
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'data_bytes': sum(len(record.data) for record in self._entries.values() if record.data),
+            'evictions': self.evictions,
+            'expired': self.expired,
+        }
+
+    async def close(self) -> None:
+        """Очистить хранилище"""
+        self._entries.clear()
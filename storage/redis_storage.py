@@ -0,0 +1,96 @@
+"""
+FSM-хранилище в Redis: состояние пользователей общее для всех процессов бота
+
+Каждая операция — один сетевой обмен: запись ключа и продление срока
+жизни соседнего ключа (состояние/данные) идут одним конвейером (pipeline).
+Изменение данных выполняется транзакцией с WATCH, поэтому параллельные
+обновления из разных процессов не теряются.
+"""
+import json
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from redis.asyncio import Redis
+from redis.exceptions import WatchError
+
+
+class RedisFSMStorage(BaseStorage):
+    """Хранилище состояний FSM в Redis со сроком жизни записей"""
+
+    def __init__(self, redis: Redis, key_builder: Optional[KeyBuilder] = None,
+                 state_ttl: Optional[int] = None, data_ttl: Optional[int] = None):
+        self.redis = redis
+        self.key_builder = key_builder or DefaultKeyBuilder(prefix="fsm")
+        self.state_ttl = state_ttl or None
+        self.data_ttl = data_ttl or None
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisFSMStorage":
+        """Создать хранилище по адресу redis://..."""
+        return cls(Redis.from_url(url), **kwargs)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        """Записать состояние и продлить срок жизни данных"""
+        state_key = self.key_builder.build(key, "state")
+        value = state.state if isinstance(state, State) else state
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if value is None:
+                pipe.delete(state_key)
+            else:
+                pipe.set(state_key, value, ex=self.state_ttl)
+            if self.data_ttl:
+                pipe.expire(self.key_builder.build(key, "data"), self.data_ttl)
+            await pipe.execute()
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        """Получить состояние"""
+        value = await self.redis.get(self.key_builder.build(key, "state"))
+        if isinstance(value, bytes):
+            return value.decode("utf-8")
+        return value
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        """Заменить данные и продлить срок жизни состояния"""
+        data_key = self.key_builder.build(key, "data")
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if not data:
+                pipe.delete(data_key)
+            else:
+                pipe.set(data_key, json.dumps(dict(data)), ex=self.data_ttl)
+            if self.state_ttl:
+                pipe.expire(self.key_builder.build(key, "state"), self.state_ttl)
+            await pipe.execute()
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        """Получить данные"""
+        value = await self.redis.get(self.key_builder.build(key, "data"))
+        if not value:
+            return {}
+        return json.loads(value)
+
+    async def update_data(self, key: StorageKey, data: Mapping[str, Any]) -> Dict[str, Any]:
+        """Дополнить данные атомарно (WATCH/MULTI), без потери параллельных изменений"""
+        data_key = self.key_builder.build(key, "data")
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(data_key)
+                    value = await pipe.get(data_key)
+                    current = json.loads(value) if value else {}
+                    current.update(data)
+
+                    pipe.multi()
+                    pipe.set(data_key, json.dumps(current), ex=self.data_ttl)
+                    await pipe.execute()
+                    return current.copy()
+                except WatchError:
+                    # Данные изменил другой процесс — повторяем с новыми
+                    continue
+
+    async def close(self) -> None:
+        """Закрыть соединения с Redis"""
+        await self.redis.aclose()
@@ -0,0 +1,440 @@
+"""
+Режим нескольких процессов: супервизор и процессы-обработчики
+
+Супервизор получает обновления (long polling или вебхук), не разбирая
+их в объекты aiogram, и раздает процессам по хэшу id пользователя:
+обновления одного пользователя всегда попадают в один процесс и
+обрабатываются по порядку, а его состояние FSM живет там же.
+
+Каждый процесс — обычный диспетчер бота со своим циклом событий.
+Раз в WORKER_REPORT_INTERVAL секунд он сообщает супервизору число
+обработанных обновлений; упавший процесс перезапускается.
+Исключение из порядка — отмена поиска и новый термин: они не ждут
+текущий поиск пользователя, а прерывают его (как и в одном процессе).
+
+Множество зарегистрированных пользователей у каждого процесса свое,
+только для его пользователей. Удаление пользователя (команда
+администратора выполняется в процессе администратора) супервизор
+пересылает процессу этого пользователя.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from contextlib import suppress
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+
+from config import config
+from database import db
+from services.registered import registered_users
+from services.searches import interrupts_search
+from services.shutdown import in_flight
+
+logger = logging.getLogger(__name__)
+
+# Пустое сообщение в канале обновлений — команда процессу завершиться
+STOP = b""
+# Удаление пользователя из множества зарегистрированных (далее — его id)
+DISCARD_REGISTERED = b"discard_registered:"
+
+# Сколько процесс может запускаться до первого отчета (импорт, БД, индексы)
+WORKER_START_TIMEOUT = 120.0
+
+
+def update_user_id(update: dict) -> int:
+    """id пользователя (или чата), к которому относится обновление"""
+    for payload in update.values():
+        if not isinstance(payload, dict):
+            continue
+        for field in ("from", "user", "chat"):
+            if isinstance(payload.get(field), dict):
+                return payload[field]["id"]
+    return 0
+
+
+def shard_for(update: dict, workers: int) -> int:
+    """Номер процесса для обновления"""
+    return update_user_id(update) % workers
+
+
+# ---------- Процесс-обработчик ----------
+
+class UpdateWorker:
+    """Обработка обновлений в процессе: параллельно для разных пользователей, по порядку для одного"""
+
+    def __init__(self, bot: Bot, dp: Dispatcher, workflow_data: dict):
+        self.bot = bot
+        self.dp = dp
+        self.workflow_data = workflow_data
+        self.processed = 0
+        self.errors = 0
+        self._tasks = set()
+        self._last: Dict[int, asyncio.Task] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def feed(self, update: dict) -> None:
+        """Принять обновление в обработку"""
+        user_id = update_user_id(update)
+        task = asyncio.create_task(self._process(update, self._last.get(user_id)))
+        self._last[user_id] = task
+        self._tasks.add(task)
+        # Ожидающие своей очереди обновления тоже дорабатываются при выключении
+        in_flight.track(task)
+
+        def done(finished: asyncio.Task) -> None:
+            self._tasks.discard(finished)
+            if self._last.get(user_id) is finished:
+                del self._last[user_id]
+
+        task.add_done_callback(done)
+
+    async def _interrupts_search(self, update: dict) -> bool:
+        """Отмена поиска или новый термин не ждут завершения текущего поиска пользователя"""
+        message = update.get("message")
+        text = (message or {}).get("text")
+        if not text:
+            return False
+
+        state = await self.dp.fsm.get_context(
+            bot=self.bot, chat_id=message["chat"]["id"], user_id=message["from"]["id"]
+        ).get_state()
+        return interrupts_search(text, state)
+
+    async def _process(self, update: dict, previous: Optional[asyncio.Task]) -> None:
+        jumps_queue = previous is not None and await self._interrupts_search(update)
+        if previous is not None and not jumps_queue:
+            # Предыдущее обновление пользователя должно завершиться первым
+            await asyncio.wait([previous])
+        try:
+            await self.dp.feed_raw_update(self.bot, update, **self.workflow_data)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Ошибка обработки обновления {update.get('update_id')}: {e}")
+        finally:
+            self.processed += 1
+
+        if jumps_queue:
+            # Следующие обновления пользователя ждут и прерванный поиск
+            await asyncio.wait([previous])
+
+
+async def _run_worker(index: int, conn, report_interval: float) -> None:
+    import app as bot_app
+
+    # Миграции уже выполнил супервизор: параллельные ALTER TABLE и CREATE INDEX
+    # из нескольких процессов конфликтовали бы на одном файле SQLite
+    config.DB_MIGRATE = False
+
+    # Прогрев кэша и продолжение рассылок — только в одном процессе
+    if index:
+        config.CACHE_WARMER_ENABLED = False
+        config.BROADCAST_RESUME = False
+
+    def discard_registered(telegram_id: int) -> None:
+        with suppress(OSError):
+            conn.send((DISCARD_REGISTERED, telegram_id))
+
+    # Множество зарегистрированных — только для пользователей этого процесса
+    registered_users.shard = (index, config.WORKERS)
+    registered_users.on_discard = discard_registered
+
+    bot = bot_app.create_bot()
+    dp = bot_app.create_dispatcher()
+    workflow_data = {"dispatcher": dp, "bots": [bot], **dp.workflow_data}
+    await dp.emit_startup(bot=bot, **workflow_data)
+
+    worker = UpdateWorker(bot, dp, workflow_data)
+    loop = asyncio.get_running_loop()
+    stopped = asyncio.Event()
+
+    def receive() -> None:
+        try:
+            while conn.poll():
+                data = conn.recv_bytes()
+                if data == STOP:
+                    stopped.set()
+                    break
+                if data.startswith(DISCARD_REGISTERED):
+                    registered_users.forget(int(data[len(DISCARD_REGISTERED):]))
+                    continue
+                worker.feed(json.loads(data))
+        except (EOFError, OSError):
+            # Супервизор завершился
+            stopped.set()
+        if stopped.is_set():
+            loop.remove_reader(conn.fileno())
+
+    def report() -> None:
+        with suppress(OSError):
+            conn.send((index, os.getpid(), worker.processed, worker.errors, worker.in_flight))
+
+    loop.add_reader(conn.fileno(), receive)
+    logger.info(f"Процесс #{index} (pid {os.getpid()}) готов")
+    report()
+
+    while not stopped.is_set():
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(stopped.wait(), timeout=report_interval)
+        report()
+
+    # Принятые обновления дорабатываются в on_shutdown
+    await dp.emit_shutdown(bot=bot, **workflow_data)
+    report()
+    await bot.session.close()
+
+
+def worker_main(index: int, conn, report_interval: float) -> None:
+    """Точка входа процесса-обработчика"""
+    # Ctrl+C получает вся группа процессов — останавливает их супервизор
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_run_worker(index, conn, report_interval))
+
+
+# ---------- Супервизор ----------
+
+class WorkerHandle:
+    """Процесс-обработчик глазами супервизора"""
+
+    def __init__(self, index: int, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.pid = process.pid
+        self.started_at = time.monotonic()
+        self.reported_at: Optional[float] = None
+        self.processed = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.sent = 0
+        self.rate = 0.0
+
+
+class Supervisor:
+    """Запуск процессов-обработчиков, раздача обновлений и контроль их состояния"""
+
+    def __init__(self, workers: int, report_interval: float = 10.0):
+        self.workers = workers
+        self.report_interval = report_interval
+        self.restarts = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._handles: List[WorkerHandle] = []
+
+    def start(self) -> None:
+        """Запустить все процессы"""
+        self._handles = [self._spawn(index) for index in range(self.workers)]
+
+    def _spawn(self, index: int) -> WorkerHandle:
+        parent, child = self._context.Pipe()
+        process = self._context.Process(
+            target=worker_main,
+            args=(index, child, self.report_interval),
+            name=f"bot-worker-{index}"
+        )
+        process.start()
+        child.close()
+
+        handle = WorkerHandle(index, process, parent)
+        asyncio.get_running_loop().add_reader(parent.fileno(), self._receive_reports, handle)
+        return handle
+
+    def _receive_reports(self, handle: WorkerHandle) -> None:
+        try:
+            while handle.conn.poll():
+                message = handle.conn.recv()
+                if message[0] == DISCARD_REGISTERED:
+                    self.discard_registered(message[1])
+                    continue
+                _, handle.pid, processed, handle.errors, handle.in_flight = message
+                now = time.monotonic()
+                if handle.reported_at is not None and now > handle.reported_at:
+                    handle.rate = (processed - handle.processed) / (now - handle.reported_at)
+                handle.processed, handle.reported_at = processed, now
+        except (EOFError, OSError):
+            asyncio.get_running_loop().remove_reader(handle.conn.fileno())
+
+    def dispatch(self, update: dict, raw: Optional[bytes] = None) -> None:
+        """Передать обновление процессу, отвечающему за пользователя"""
+        handle = self._handles[shard_for(update, self.workers)]
+        try:
+            handle.conn.send_bytes(raw if raw is not None else json.dumps(update).encode())
+            handle.sent += 1
+        except OSError as e:
+            # Процесс упал; его перезапустит check_workers
+            logger.error(f"Обновление {update.get('update_id')} потеряно (процесс #{handle.index}): {e}")
+
+    def discard_registered(self, telegram_id: int) -> None:
+        """Убрать пользователя из множества зарегистрированных в его процессе"""
+        handle = self._handles[telegram_id % self.workers]
+        try:
+            handle.conn.send_bytes(DISCARD_REGISTERED + str(telegram_id).encode())
+        except OSError as e:
+            # Перезапущенный процесс загрузит множество из БД заново
+            logger.warning(f"Удаление пользователя {telegram_id} не передано процессу #{handle.index}: {e}")
+
+    def healthy(self, handle: WorkerHandle) -> bool:
+        """Процесс жив и недавно присылал отчет (или еще запускается)"""
+        if not handle.process.is_alive():
+            return False
+        if handle.reported_at is None:
+            return time.monotonic() - handle.started_at < WORKER_START_TIMEOUT
+        return time.monotonic() - handle.reported_at < 3 * self.report_interval
+
+    def check_workers(self) -> None:
+        """Перезапустить упавшие процессы"""
+        for index, handle in enumerate(self._handles):
+            if handle.process.is_alive():
+                continue
+            logger.error(f"Процесс #{index} (pid {handle.pid}) завершился с кодом {handle.process.exitcode}, перезапуск")
+            asyncio.get_running_loop().remove_reader(handle.conn.fileno())
+            handle.conn.close()
+            self._handles[index] = self._spawn(index)
+            self.restarts += 1
+
+    def stats(self) -> dict:
+        """Состояние и пропускная способность процессов"""
+        return {
+            'workers': [
+                {
+                    'index': handle.index,
+                    'pid': handle.pid,
+                    'healthy': self.healthy(handle),
+                    'sent': handle.sent,
+                    'processed': handle.processed,
+                    'errors': handle.errors,
+                    'in_flight': handle.in_flight,
+                    'rate': round(handle.rate, 2),
+                }
+                for handle in self._handles
+            ],
+            'restarts': self.restarts,
+        }
+
+    async def monitor(self) -> None:
+        """Периодически проверять процессы и писать их состояние в лог"""
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.check_workers()
+            logger.info("Процессы: " + "; ".join(
+                f"#{worker['index']} {'✓' if worker['healthy'] else '✗'} "
+                f"{worker['rate']:.1f} обн/с, в работе {worker['in_flight']}"
+                for worker in self.stats()['workers']
+            ))
+
+    async def stop(self, timeout: float) -> None:
+        """Остановить процессы, дав им обработать принятые обновления"""
+        loop = asyncio.get_running_loop()
+        for handle in self._handles:
+            with suppress(OSError):
+                handle.conn.send_bytes(STOP)
+
+        deadline = time.monotonic() + timeout
+        for handle in self._handles:
+            remaining = max(0.0, deadline - time.monotonic())
+            await loop.run_in_executor(None, handle.process.join, remaining)
+            if handle.process.is_alive():
+                logger.warning(f"Процесс #{handle.index} не завершился вовремя, принудительная остановка")
+                handle.process.terminate()
+            loop.remove_reader(handle.conn.fileno())
+            handle.conn.close()
+
+
+async def poll_updates(bot: Bot, supervisor: Supervisor, allowed_updates: List[str]) -> None:
+    """Long polling без разбора обновлений: JSON сразу уходит процессам"""
+    url = bot.session.api.api_url(bot.token, "getUpdates")
+    offset = 0
+
+    async with aiohttp.ClientSession() as http:
+        while True:
+            data = {"offset": str(offset), "timeout": "30", "allowed_updates": json.dumps(allowed_updates)}
+            try:
+                async with http.post(url, data=data, timeout=aiohttp.ClientTimeout(total=40)) as response:
+                    payload = await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.warning(f"Ошибка getUpdates: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            if not payload.get("ok"):
+                logger.warning(f"getUpdates: {payload.get('description')}")
+                await asyncio.sleep(payload.get("parameters", {}).get("retry_after", 1))
+                continue
+
+            for update in payload["result"]:
+                offset = update["update_id"] + 1
+                supervisor.dispatch(update)
+
+
+def create_intake_app(supervisor: Supervisor) -> web.Application:
+    """aiohttp-приложение вебхука: обновление сразу передается процессу"""
+    app = web.Application()
+
+    async def webhook(request: web.Request) -> web.Response:
+        if config.WEBHOOK_SECRET and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != config.WEBHOOK_SECRET:
+            return web.Response(status=401)
+        raw = await request.read()
+        supervisor.dispatch(json.loads(raw), raw)
+        return web.Response()
+
+    async def health(request: web.Request) -> web.Response:
+        stats = supervisor.stats()
+        healthy = all(worker['healthy'] for worker in stats['workers'])
+        return web.json_response(stats, status=200 if healthy else 503)
+
+    app.router.add_post(config.WEBHOOK_PATH, webhook)
+    app.router.add_get("/health", health)
+    return app
+
+
+async def run_supervisor(bot: Bot, dp: Dispatcher) -> None:
+    """Запуск в режиме нескольких процессов (WORKERS > 1)"""
+    # Миграции выполняются один раз, до запуска процессов
+    await db.init_db()
+
+    supervisor = Supervisor(config.WORKERS, config.WORKER_REPORT_INTERVAL)
+    supervisor.start()
+    logger.info(f"Запущено процессов-обработчиков: {config.WORKERS}")
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopped.set)
+
+    allowed_updates = dp.resolve_used_update_types()
+    runner = None
+    tasks = [asyncio.create_task(stopped.wait()), asyncio.create_task(supervisor.monitor())]
+    if config.BOT_MODE == "webhook":
+        await bot.set_webhook(
+            url=config.WEBHOOK_URL + config.WEBHOOK_PATH,
+            secret_token=config.WEBHOOK_SECRET or None,
+            allowed_updates=allowed_updates
+        )
+        runner = web.AppRunner(create_intake_app(supervisor))
+        await runner.setup()
+        await web.TCPSite(runner, host=config.WEBAPP_HOST, port=config.WEBAPP_PORT).start()
+    else:
+        await bot.delete_webhook()
+        tasks.append(asyncio.create_task(poll_updates(bot, supervisor, allowed_updates)))
+
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        if runner is not None:
+            await runner.cleanup()
+        # Процессам нужно время доработать обновления и закрыть соединения
+        await supervisor.stop(config.SHUTDOWN_TIMEOUT + 10)
+        logger.info("Процессы-обработчики остановлены")
+        await db.checkpoint()
@@ -0,0 +1,101 @@
+"""
+Общие настройки тестов
+
+Токен бота и путь к БД задаются до импорта модулей бота: config
+читает переменные окружения при импорте. Все асинхронные тесты
+выполняются в одном цикле событий — глобальные службы бота
+(планировщик, кэши, семафоры) создают примитивы asyncio один раз.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["BOT_TOKEN"] = "123456:TEST"
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["CACHE_WARMER_ENABLED"] = "False"
+os.environ["BROADCAST_RESUME"] = "False"
+
+from aiogram.client.session.aiohttp import AiohttpSession  # noqa: E402
+from aiogram.methods import SendMessage  # noqa: E402
+from aiogram.types import Chat, Message  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def run(loop):
+    """Выполнить корутину в общем цикле событий"""
+    return loop.run_until_complete
+
+
+@pytest.fixture
+def database(run, tmp_path):
+    """Пустая БД во временном файле"""
+    from database import db
+
+    previous = db.db_path
+    db.db_path = str(tmp_path / "bot.db")
+    run(db.init_db())
+    yield db
+    db.db_path = previous
+
+
+@pytest.fixture(scope="session")
+def dispatcher():
+    """Диспетчер бота (роутеры подключаются к диспетчеру один раз за процесс)"""
+    import app
+
+    return app.create_dispatcher()
+
+
+class RecordingSession(AiohttpSession):
+    """Сессия бота без сети: запоминает вызванные методы Bot API"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    async def make_request(self, bot, method, timeout=None):
+        self.requests.append(method)
+        if isinstance(method, SendMessage):
+            return Message(
+                message_id=len(self.requests),
+                date=int(time.time()),
+                chat=Chat(id=method.chat_id, type="private"),
+                text=method.text
+            ).as_(bot)
+        return True
+
+
+@pytest.fixture
+def session():
+    return RecordingSession()
+
+
+def make_update(update_id: int, user_id: int, text: str) -> dict:
+    """Синтетическое обновление с текстовым сообщением пользователя"""
+    entities = []
+    if text.startswith("/"):
+        entities.append({"type": "bot_command", "offset": 0, "length": len(text.split()[0])})
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+            "text": text,
+            "entities": entities,
+        },
+    }
@@ -0,0 +1,144 @@
+"""
+Выключатель запросов к Википедии и его учет в WikiService._call/_alt_call
+"""
+import asyncio
+import threading
+import time
+
+import aiohttp
+import pytest
+
+from services.breaker import CircuitBreaker
+from services.lookup import UpstreamUnavailable, wiki
+from services.scheduler import LookupRejected, lookup_scheduler
+from services.wiki_rest import AlternateNotFound
+
+
+def half_open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.01)
+    breaker.record_failure()
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    return breaker
+
+
+def test_opens_after_threshold_and_rejects():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_single_probe():
+    breaker = half_open_breaker()
+    assert [breaker.allow_request() for _ in range(3)] == [True, False, False]
+
+
+def test_half_open_probe_outcomes():
+    breaker = half_open_breaker()
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker = half_open_breaker()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_released_probe_frees_the_slot():
+    breaker = half_open_breaker()
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = wiki.backend()
+    monkeypatch.setattr(backend, "breaker", half_open_breaker())
+    monkeypatch.setattr(backend, "alt_breaker", half_open_breaker())
+    return backend
+
+
+def test_cancelled_probe_releases_breaker(run, backend):
+    release = threading.Event()
+
+    async def scenario():
+        deadline = time.monotonic() + 10
+        task = asyncio.ensure_future(wiki._call(backend, deadline, release.wait, 5))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    try:
+        run(scenario())
+    finally:
+        release.set()
+    assert backend.breaker.state == CircuitBreaker.HALF_OPEN
+    assert backend.breaker.allow_request()
+
+
+def test_rejected_probe_releases_breaker(run, backend, monkeypatch):
+    async def rejected(*args, **kwargs):
+        raise LookupRejected("очередь заполнена")
+
+    monkeypatch.setattr(lookup_scheduler, "run", rejected)
+    with pytest.raises(LookupRejected):
+        run(wiki._call(backend, time.monotonic() + 10, lambda: None))
+    assert backend.breaker.allow_request()
+
+
+def test_unexpected_error_counts_as_failure(run, backend):
+    def broken():
+        raise KeyError("query")
+
+    with pytest.raises(KeyError):
+        run(wiki._call(backend, time.monotonic() + 10, broken))
+    assert backend.breaker.state == CircuitBreaker.OPEN
+
+
+def test_alternate_not_found_closes_alt_breaker(run, backend):
+    async def missing(title, lang):
+        raise AlternateNotFound(title)
+
+    with pytest.raises(AlternateNotFound):
+        run(wiki._alt_call(backend, time.monotonic() + 10, missing, "Нет такой статьи"))
+    assert backend.alt_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_alternate_network_error_opens_alt_breaker(run, backend):
+    async def broken(title, lang):
+        raise aiohttp.ClientConnectionError("нет соединения")
+
+    with pytest.raises(UpstreamUnavailable):
+        run(wiki._alt_call(backend, time.monotonic() + 10, broken, "Статья"))
+    assert backend.alt_breaker.state == CircuitBreaker.OPEN
+
+
+def test_cancelled_alternate_releases_alt_breaker(run, backend):
+    async def scenario():
+        task = asyncio.ensure_future(
+            wiki._alt_call(backend, time.monotonic() + 10, lambda title, lang: asyncio.sleep(5), "Статья")
+        )
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    run(scenario())
+    assert backend.alt_breaker.allow_request()
@@ -0,0 +1,112 @@
+"""
+Рассылка: продолжение после перезапуска и отмена из другого процесса
+"""
+import asyncio
+from types import SimpleNamespace
+
+from services.broadcast import Broadcaster
+
+ADMIN_ID = 999
+
+
+class _Bot:
+    """Бот без сети: запоминает получателей рассылки"""
+
+    def __init__(self, on_send=None):
+        self.sent = []
+        self.on_send = on_send
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        if chat_id != ADMIN_ID:
+            self.sent.append(chat_id)
+            if self.on_send is not None:
+                await self.on_send(chat_id)
+        return SimpleNamespace(message_id=1)
+
+    async def edit_message_text(self, *args, **kwargs):
+        return True
+
+
+async def _users(db, count: int) -> None:
+    for telegram_id in range(101, 101 + count):
+        await db.get_or_create_user(telegram_id, first_name="Test")
+
+
+async def _finish(broadcaster: Broadcaster) -> None:
+    await asyncio.wait_for(asyncio.gather(*broadcaster._tasks.values()), timeout=5)
+
+
+def _broadcaster() -> Broadcaster:
+    return Broadcaster(concurrency=2, rate=1000, batch_size=2, progress_interval=0)
+
+
+def test_resume_continues_after_saved_cursor(run, database):
+    async def scenario():
+        await _users(database, 5)
+        broadcast = await database.create_broadcast("Новости", ADMIN_ID)
+        # Перезапуск случился после второй пачки: два пользователя уже получили рассылку
+        broadcast.status, broadcast.last_user_id, broadcast.delivered = "running", 2, 2
+        await database.save_broadcast(broadcast)
+
+        broadcaster, bot = _broadcaster(), _Bot()
+        await broadcaster.resume(bot)
+        await _finish(broadcaster)
+        return bot.sent, await database.get_broadcast(broadcast.id)
+
+    sent, broadcast = run(scenario())
+    assert sent == [103, 104, 105]
+    assert (broadcast.status, broadcast.last_user_id, broadcast.delivered) == ("done", 5, 5)
+
+
+def test_cancel_in_another_process_stops_delivery(run, database):
+    async def scenario():
+        await _users(database, 6)
+        broadcast = await database.create_broadcast("Новости", ADMIN_ID)
+        broadcast.status = "running"
+        await database.save_broadcast(broadcast)
+
+        # Рассылка идет в одном процессе, а кнопку остановки получает другой
+        running, admin_worker = _broadcaster(), _broadcaster()
+
+        async def cancel_during_first_batch(chat_id):
+            if chat_id == 101:
+                cancelled = await admin_worker.cancel(broadcast.id)
+                assert cancelled.status == "cancelled"
+
+        bot = _Bot(on_send=cancel_during_first_batch)
+        running.start(bot, broadcast)
+        await _finish(running)
+        return bot.sent, await database.get_broadcast(broadcast.id)
+
+    sent, broadcast = run(scenario())
+    # Досылается только начатая пачка, ее итог не затирает отмену
+    assert sent == [101, 102]
+    assert (broadcast.status, broadcast.last_user_id) == ("cancelled", 0)
+
+
+def test_cancel_between_batches_is_noticed(run, database, monkeypatch):
+    save_broadcast = database.save_broadcast
+
+    async def save_then_cancel(broadcast, expected_status=None):
+        saved = await save_broadcast(broadcast, expected_status)
+        # Отмена приходит сразу после сохранения первой пачки
+        if broadcast.last_user_id == 2:
+            await database.cancel_broadcast(broadcast.id)
+        return saved
+
+    monkeypatch.setattr(database, "save_broadcast", save_then_cancel)
+
+    async def scenario():
+        await _users(database, 4)
+        broadcast = await database.create_broadcast("Новости", ADMIN_ID)
+        broadcast.status = "running"
+        await save_broadcast(broadcast)
+
+        running, bot = _broadcaster(), _Bot()
+        running.start(bot, broadcast)
+        await _finish(running)
+        return bot.sent, await database.get_broadcast(broadcast.id)
+
+    sent, broadcast = run(scenario())
+    assert sent == [101, 102]
+    assert (broadcast.status, broadcast.last_user_id, broadcast.delivered) == ("cancelled", 2, 2)
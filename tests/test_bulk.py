@@ -0,0 +1,64 @@
+"""
+Поиск нескольких терминов: параллельные запросы, страницы ответа и запись истории
+"""
+import asyncio
+
+from handlers.callbacks import _pack_pages
+from services.lookup import Article, ArticleNotFound, WikiService
+
+
+def test_lookup_many_limits_concurrency_and_isolates_errors(run, monkeypatch):
+    service = WikiService()
+    active, peak = [0], [0]
+
+    async def lookup(term, lang=None):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        if term == "Нет такого":
+            raise ArticleNotFound(term)
+        return Article(title=term, summary="", url="")
+
+    monkeypatch.setattr(service, "lookup", lookup)
+    terms = ["Химия", "Нет такого", "Физика", "Биология", "Геология"]
+
+    results = run(service.lookup_many(terms, concurrency=2))
+    assert [term for term, _ in results] == terms
+    assert isinstance(results[1][1], ArticleNotFound)
+    assert [result.title for _, result in results if isinstance(result, Article)] == [
+        "Химия", "Физика", "Биология", "Геология"
+    ]
+    assert peak[0] == 2
+
+
+def test_pages_respect_limit_and_keep_order():
+    items = [f"результат {i} " + "x" * 30 for i in range(10)]
+    pages = _pack_pages(items, limit=100)
+
+    assert [item for page in pages for item in page] == items
+    # Элементы страницы вместе с разделителями помещаются в лимит
+    assert all(sum(len(item) + 2 for item in page) - 2 <= 100 for page in pages)
+    # Слишком длинный элемент занимает страницу целиком
+    assert _pack_pages(["x" * 150, "y"], limit=100) == [["x" * 150], ["y"]]
+
+
+def test_history_batch_is_written_in_one_call(run, database):
+    async def scenario():
+        await database.get_or_create_user(501, first_name="Test")
+        written = await database.add_search_history_batch(501, [
+            ("Химия", "Химия", "https://ru.wikipedia.org/wiki/Химия", True),
+            ("Нет такого", None, None, False),
+        ])
+        unknown = await database.add_search_history_batch(502, [("Химия", None, None, False)])
+        empty = await database.add_search_history_batch(502, [])
+        history = await database.get_user_search_history(501)
+        profile = await database.get_user_profile(501)
+        return written, unknown, empty, history, profile
+
+    written, unknown, empty, history, profile = run(scenario())
+    assert (written, unknown, empty) == (True, False, True)
+    assert sorted((item.search_term, bool(item.success)) for item in history) == [
+        ("Нет такого", False), ("Химия", True)
+    ]
+    assert profile.search_count == 2
@@ -0,0 +1,104 @@
+"""
+Исправление опечаток: индекс заголовков и место исправления в поиске статьи
+"""
+import random
+
+import pytest
+
+from config import config
+from services.fuzzy import FuzzyMatcher, edit_distance
+from services.lookup import Article, ArticleNotFound, WikiService
+
+
+def _reference_distance(a: str, b: str) -> int:
+    """Полная матрица Дамерау — Левенштейна (перестановки соседних символов)"""
+    d = [[i + j if not i or not j else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[-1][-1]
+
+
+def test_edit_distance_matches_full_matrix():
+    rng = random.Random(7)
+    for _ in range(5000):
+        a = "".join(rng.choice("абв") for _ in range(rng.randint(0, 8)))
+        b = "".join(rng.choice("абв") for _ in range(rng.randint(0, 8)))
+        for max_distance in (0, 1, 2):
+            expected = _reference_distance(a, b)
+            assert edit_distance(a, b, max_distance) == min(expected, max_distance + 1), (a, b)
+
+
+def test_best_prefers_closest_then_popular_title():
+    matcher = FuzzyMatcher(max_distance=2)
+    matcher.build([("Химия", 50), ("Химик", 10), ("Физика", 5), ("Фотосинтез", 1)])
+
+    assert matcher.best("Химия") == ("Химия", 0)
+    assert matcher.best("Фотосинтзе") == ("Фотосинтез", 1)
+    assert matcher.best("Фзиика") == ("Физика", 1)
+    # Короткие термины исправляются только при точном совпадении
+    assert matcher.best("Хими") is None
+
+
+def test_per_key_limit_keeps_first_titles():
+    matcher = FuzzyMatcher(max_distance=1, prefix_length=3, max_candidates=1)
+    matcher.build([("Абвгд", 9), ("Абвжз", 1)])
+    assert matcher.lookup("Абвжз") == []
+    assert matcher.lookup("Абвгд") == [("Абвгд", 0)]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(config, "FUZZY_ENABLED", True)
+    service = WikiService()
+    service._offline_loaded = True
+    service.fuzzy.build([("Химия", 10), ("Физика", 5)])
+    # «Химик» уже искали: это известный запрос, а не опечатка
+    service.titles.build([("Химия", 10), ("Физика", 5), ("Химик", 1)])
+    loads = []
+
+    async def load(backend, term, page_title=None):
+        loads.append((term, page_title))
+        if term in ("Химик", "Химия"):
+            return Article(title=term, summary="", url="")
+        raise ArticleNotFound(term)
+
+    monkeypatch.setattr(service, "_load", load)
+    return service, loads
+
+
+def test_known_term_is_not_rewritten(run, service):
+    service, loads = service
+    article = run(service.lookup("Химик"))
+    assert article.title == "Химик"
+    assert loads == [("Химик", None)]
+
+
+def test_misspelled_term_skips_search(run, service):
+    service, loads = service
+    article = run(service.lookup("Хиимя"))
+    assert article.title == "Химия"
+    # Сразу загружается исправленный заголовок, без поиска по опечатке
+    assert loads == [("Химия", "Химия")]
+
+    # Исправленный ответ кэшируется под исходным термином
+    loads.clear()
+    assert run(service.lookup("Хиимя")).title == "Химия"
+    assert loads == []
+
+
+def test_corrected_title_miss_is_not_searched_again(run, service):
+    service, loads = service
+    with pytest.raises(ArticleNotFound) as error:
+        run(service.lookup("Фзиика"))
+    assert error.value.args == ("Фзиика",)
+    assert loads == [("Физика", "Физика")]
+
+
+def test_unknown_term_is_searched(run, service):
+    service, loads = service
+    with pytest.raises(ArticleNotFound):
+        run(service.lookup("Ботаника"))
+    assert loads == [("Ботаника", None)]
@@ -0,0 +1,97 @@
+"""
+Хеджированные запросы и их учет в выключателе и окне длительностей
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.breaker import CircuitBreaker
+from services.hedging import hedged
+from services.lookup import wiki
+from services.metrics import metrics
+
+
+def test_fast_primary_is_not_hedged(run):
+    async def alternate():
+        raise AssertionError("альтернатива не должна запускаться")
+
+    result = run(hedged("test_fast", lambda: asyncio.sleep(0, result="основной"), alternate, delay=1))
+    assert result == ("основной", False)
+    assert metrics.get("test_fast_hedge_fired") == 0
+
+
+def test_slow_primary_is_cancelled_and_latency_recorded(run):
+    finished = []
+
+    async def primary():
+        await asyncio.sleep(0.1)
+        finished.append(True)
+        return "основной"
+
+    async def scenario():
+        result = await hedged("test_slow", primary, lambda: asyncio.sleep(0.02, result="альтернатива"), delay=0.01)
+        await asyncio.sleep(0.15)
+        return result
+
+    assert run(scenario()) == ("альтернатива", True)
+    # Проигравший основной запрос отменен, в окно попало время до отмены
+    assert finished == []
+    assert metrics.percentile("test_slow_latency", 0.5, min_samples=1) >= 0.03
+
+
+def test_failed_primary_latency_is_recorded(run):
+    async def primary():
+        await asyncio.sleep(0.02)
+        raise TimeoutError
+
+    with pytest.raises(TimeoutError):
+        run(hedged("test_error", primary, lambda: asyncio.sleep(0, result="x"), delay=1))
+    assert metrics.percentile("test_error_latency", 0.5, min_samples=1) >= 0.02
+
+
+def test_both_failing_raise_primary_error(run):
+    async def primary():
+        await asyncio.sleep(0.02)
+        raise ValueError("основной")
+
+    async def alternate():
+        raise KeyError("альтернатива")
+
+    with pytest.raises(ValueError):
+        run(hedged("test_both", primary, alternate, delay=0.01))
+
+
+def test_cancelled_probe_frees_breaker_slot(run, monkeypatch):
+    """Альтернатива выиграла у пробного запроса — слот пробы освобождается"""
+    backend = wiki.backend()
+    breaker = CircuitBreaker("test_probe", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    monkeypatch.setattr(backend, "breaker", breaker)
+    release = threading.Event()
+
+    def slow_page():
+        release.wait(5)
+        return {"title": "Статья"}
+
+    async def scenario():
+        deadline = time.monotonic() + 10
+        result = await hedged(
+            "test_probe",
+            lambda: wiki._call(backend, deadline, slow_page),
+            lambda: asyncio.sleep(0, result="альтернатива"),
+            delay=0.01
+        )
+        # Даем отмене дойти до основного запроса
+        await asyncio.sleep(0.01)
+        return result
+
+    try:
+        assert run(scenario()) == ("альтернатива", True)
+    finally:
+        release.set()
+    # Исход пробы неизвестен: выключатель ждет следующую
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
@@ -0,0 +1,89 @@
+"""
+FSM-хранилище в памяти: срок жизни записей и вытеснение давно не использованных
+"""
+from types import SimpleNamespace
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+
+from storage import memory_storage
+from storage.memory_storage import BoundedMemoryStorage
+from utils.states import SearchStates
+
+
+def _key(user_id: int) -> StorageKey:
+    return StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(memory_storage, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_reads_do_not_create_entries_and_empty_records_are_dropped(run, clock):
+    storage = BoundedMemoryStorage()
+
+    async def scenario():
+        await storage.get_state(_key(1))
+        await storage.get_data(_key(1))
+        empty_after_reads = len(storage._entries)
+
+        await storage.set_state(_key(1), SearchStates.waiting_for_term)
+        await storage.set_data(_key(1), {"page": 2})
+        data = await storage.get_data(_key(1))
+        data["page"] = 3
+        stored = await storage.get_data(_key(1))
+
+        await storage.set_state(_key(1), None)
+        await storage.set_data(_key(1), {})
+        return empty_after_reads, stored, len(storage._entries)
+
+    empty_after_reads, stored, remaining = run(scenario())
+    assert empty_after_reads == 0
+    # Наружу отдается копия данных
+    assert stored == {"page": 2}
+    assert remaining == 0
+
+
+def test_records_expire_after_ttl(run, clock):
+    storage = BoundedMemoryStorage(ttl=60, sweep_interval=30)
+
+    async def scenario():
+        await storage.set_state(_key(1), SearchStates.waiting_for_term)
+        await storage.set_state(_key(2), SearchStates.waiting_for_term)
+
+        # Запись продлевает срок, чтение — нет
+        clock[0] += 50
+        await storage.set_data(_key(1), {"page": 1})
+        await storage.get_state(_key(2))
+
+        clock[0] += 20
+        states = (await storage.get_state(_key(1)), await storage.get_state(_key(2)))
+
+        # Просроченные записи, которые никто не читает, убирает периодическая чистка
+        clock[0] += 60
+        await storage.set_state(_key(3), SearchStates.waiting_for_term)
+        return states
+
+    states = run(scenario())
+    assert states == (SearchStates.waiting_for_term.state, None)
+    assert list(storage._entries) == [storage._key(_key(3))]
+    assert storage.expired == 2
+
+
+def test_least_recently_used_records_are_evicted(run, clock):
+    storage = BoundedMemoryStorage(max_entries=2)
+
+    async def scenario():
+        await storage.set_state(_key(1), SearchStates.waiting_for_term)
+        await storage.set_state(_key(2), SearchStates.waiting_for_term)
+        # Чтение освежает запись: вытеснена будет вторая
+        await storage.get_state(_key(1))
+        await storage.set_state(_key(3), SearchStates.waiting_for_term)
+        return [await storage.get_state(_key(user_id)) for user_id in (1, 2, 3)]
+
+    states = run(scenario())
+    assert states == [SearchStates.waiting_for_term.state, None, SearchStates.waiting_for_term.state]
+    assert storage.stats()['evictions'] == 1 and storage.stats()['entries'] == 2
@@ -0,0 +1,89 @@
+"""
+Офлайн-индекс: формат файла и сборка из дампа Википедии
+"""
+import bz2
+
+import build_offline_index
+from services.offline_index import OfflineIndex, OfflineIndexWriter
+
+PAGES_DUMP = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/">
+  <siteinfo><sitename>Википедия</sitename></siteinfo>
+  <page>
+    <title>Химия</title><ns>0</ns>
+    <revision><text>'''Хи́мия''' — [[наука]] о веществах.&lt;ref&gt;Источник&lt;/ref&gt;
+== История ==
+Текст раздела.</text></revision>
+  </page>
+  <page>
+    <title>Chemistry</title><ns>0</ns><redirect title="Химия" />
+    <revision><text>#REDIRECT [[Химия]]</text></revision>
+  </page>
+  <page>
+    <title>Меркурий</title><ns>0</ns>
+    <revision><text>'''Меркурий''' — многозначный термин.
+* [[Меркурий (планета)]]
+{{неоднозначность}}</text></revision>
+  </page>
+  <page>
+    <title>Mercury</title><ns>0</ns><redirect title="Меркурий" />
+    <revision><text>#REDIRECT [[Меркурий]]</text></revision>
+  </page>
+  <page>
+    <title>Марс (значения)</title><ns>0</ns>
+    <revision><text>'''Марс''' — планета и бог.</text></revision>
+  </page>
+  <page>
+    <title>Википедия:Правила</title><ns>4</ns>
+    <revision><text>Служебная страница.</text></revision>
+  </page>
+</mediawiki>
+"""
+
+
+def test_writer_and_reader_round_trip(tmp_path):
+    path = str(tmp_path / "index.bin")
+    writer = OfflineIndexWriter(path, lang="ru")
+    writer.add_article("Химия", "Наука о веществах")
+    writer.add_article("Ёж", "Млекопитающее")
+    writer.add_article("химия", "Дубликат по ключу")
+    writer.add_redirect("Chemistry", "Химия")
+    writer.add_redirect("Missing", "Нет такой статьи")
+    result = writer.finish()
+
+    index = OfflineIndex(path)
+    try:
+        assert result == {'articles': 2, 'redirects': 1, 'keys': 3}
+        assert len(index) == 2 and index.lang == "ru"
+        assert index.lookup("  ХИМИЯ ").summary == "Наука о веществах"
+        assert index.lookup("chemistry").title == "Химия"
+        assert index.lookup("Еж").url == "https://ru.wikipedia.org/wiki/%D0%81%D0%B6"
+        assert index.lookup("Missing") is None
+        assert sorted(index.iter_titles()) == ["Ёж", "Химия"]
+    finally:
+        index.close()
+
+
+def test_build_skips_disambiguation_pages(tmp_path):
+    dump = tmp_path / "ruwiki-pages-articles.xml.bz2"
+    dump.write_bytes(bz2.compress(PAGES_DUMP.encode("utf-8")))
+    path = str(tmp_path / "index.bin")
+
+    result = build_offline_index.build(str(dump), path, "ru")
+
+    index = OfflineIndex(path)
+    try:
+        assert result['articles'] == 1 and result['disambiguations'] == 2
+        assert index.lookup("Химия").summary == "Хи́мия — наука о веществах."
+        assert index.lookup("Chemistry").title == "Химия"
+        # Неоднозначности и редиректы на них ищутся онлайн
+        for term in ("Меркурий", "Mercury", "Марс (значения)", "Википедия:Правила"):
+            assert index.lookup(term) is None
+    finally:
+        index.close()
+
+
+def test_is_disambiguation():
+    assert build_offline_index.is_disambiguation("Меркурий", "текст\n{{Неоднозначность|тип=планеты}}")
+    assert build_offline_index.is_disambiguation("Mercury (disambiguation)")
+    assert build_offline_index.is_disambiguation("Иванов", "{{Однофамильцы}}")
+    assert not build_offline_index.is_disambiguation("Химия", "{{Наука}} {{неоднозначный термин}}")
@@ -0,0 +1,39 @@
+"""
+Очередь исходящих запросов: доля общего лимита и повторы после flood control
+"""
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+import app
+from config import config
+from services.outbound import OutboundSession
+
+
+def test_global_rate_is_split_between_workers(monkeypatch):
+    monkeypatch.setattr(config, "OUTBOUND_SCHEDULER_ENABLED", True)
+    monkeypatch.setattr(config, "OUTBOUND_GLOBAL_RATE", 30.0)
+    monkeypatch.setattr(config, "WORKERS", 4)
+
+    bot = app.create_bot()
+    assert isinstance(bot.session, OutboundSession)
+    assert bot.session.global_budget.rate == 7.5
+
+
+def test_retry_after_acquires_global_token_again(run, monkeypatch):
+    attempts = []
+
+    async def flaky_request(self, bot, method, timeout=None):
+        attempts.append(self.global_budget.available())
+        if len(attempts) == 1:
+            raise TelegramRetryAfter(method=method, message="Flood control", retry_after=0)
+        return True
+
+    monkeypatch.setattr(AiohttpSession, "make_request", flaky_request)
+    session = OutboundSession(global_rate=0.001, chat_rate=100, chat_burst=10)
+    session.global_budget.capacity = session.global_budget.tokens = 2
+
+    result = run(session.make_request(None, SendMessage(chat_id=1, text="test")))
+    assert result is True
+    # Каждая попытка забрала свой токен общего лимита
+    assert [round(tokens) for tokens in attempts] == [1, 0]
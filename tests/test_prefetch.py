@@ -0,0 +1,53 @@
+"""
+Упреждающая загрузка ссылок: выбор кандидатов и бюджеты запросов
+"""
+from database import db
+from services.lookup import Article, wiki
+from services.prefetch import LinkPrefetcher
+
+SHOWN = Article(title="Префетч: статья", summary="", url="", lang=wiki.default_lang)
+RELATED = [("Префетч: A", 9), ("Префетч: B", 8), ("Префетч: C", 7), ("Префетч: вне ссылок", 6)]
+
+
+def _fake_wiki(monkeypatch):
+    loaded = []
+
+    async def related_titles(title, window, limit):
+        return RELATED
+
+    async def article_links(title, lang=None):
+        return [title for title, _ in RELATED[:3]]
+
+    async def lookup_title(title, lang=None):
+        loaded.append(title)
+        return Article(title=title, summary="", url="", lang=lang)
+
+    monkeypatch.setattr(db, "get_related_titles", related_titles)
+    monkeypatch.setattr(wiki, "article_links", article_links)
+    monkeypatch.setattr(wiki, "lookup_title", lookup_title)
+    return loaded
+
+
+def test_only_searched_links_are_prefetched(run, monkeypatch):
+    loaded = _fake_wiki(monkeypatch)
+    prefetcher = LinkPrefetcher(top_n=3, user_budget=10, global_rate=0.001, global_burst=10)
+
+    assert run(prefetcher.prefetch(SHOWN, user_id=1)) == 3
+    # Ссылки, которой нет в статье, не загружаем, даже если ее искали
+    assert loaded == ["Префетч: A", "Префетч: B", "Префетч: C"]
+
+
+def test_user_and_global_budgets_limit_prefetch(run, monkeypatch):
+    loaded = _fake_wiki(monkeypatch)
+    # Глобальный бюджет: запрос ссылок и две статьи
+    prefetcher = LinkPrefetcher(top_n=3, user_budget=2, user_window=300, global_rate=0.001, global_burst=4)
+
+    first = run(prefetcher.prefetch(SHOWN, user_id=1))
+    # Бюджет пользователя исчерпан — даже ссылки не запрашиваются
+    again = run(prefetcher.prefetch(SHOWN, user_id=1))
+    # У другого пользователя свой бюджет, но общий почти исчерпан
+    other = run(prefetcher.prefetch(SHOWN, user_id=2))
+
+    assert (first, again, other) == (2, 0, 0)
+    assert loaded == ["Префетч: A", "Префетч: B"]
+    assert prefetcher.global_budget.available() < 1
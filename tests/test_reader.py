@@ -0,0 +1,53 @@
+"""
+Постраничное чтение статьи и сводные ответы: разбиение текста и оформление
+"""
+from services.reader import message_size, split_pages
+from utils.message_templates import get_bulk_item, get_reader_page
+
+
+def test_message_size_counts_utf16_units_and_escaping():
+    assert message_size("abc") == 3
+    # Символ вне BMP — две единицы UTF-16
+    assert message_size("😀") == 2
+    assert message_size('<a & "b">') == len("&lt;a &amp; &quot;b&quot;&gt;")
+
+
+def test_pages_respect_limit_and_keep_text():
+    paragraphs = [f"Абзац {i}. " + "Предложение о химии. " * 15 for i in range(20)]
+    text = "\n\n".join(paragraph.strip() for paragraph in paragraphs)
+
+    pages = split_pages(text, limit=500)
+    assert len(pages) > 1
+    assert all(message_size(page) <= 500 for page in pages)
+    # Разрезы не теряют слов
+    assert " ".join(" ".join(pages).split()) == " ".join(text.split())
+
+
+def test_short_paragraphs_share_a_page():
+    pages = split_pages("Первый.\n\nВторой.\n\nТретий.", limit=100)
+    assert pages == ["Первый.\n\nВторой.\n\nТретий."]
+
+
+def test_long_word_is_cut_by_characters():
+    pages = split_pages("я" * 250, limit=100)
+    assert [len(page) for page in pages] == [100, 100, 50]
+
+
+def test_escaping_is_counted_against_limit():
+    pages = split_pages("& " * 100, limit=50)
+    assert all(message_size(page) <= 50 for page in pages)
+
+
+def test_reader_page_escapes_title_once():
+    page = get_reader_page("AT&T <Inc>", "Текст & ещё", 0, 3)
+    assert page.startswith("<b>📄 AT&amp;T &lt;Inc&gt;</b> <i>(1/3)</i>")
+    assert page.endswith("Текст &amp; ещё")
+    assert "&amp;amp;" not in page
+
+
+def test_bulk_item_escapes_title_and_term_once():
+    found = get_bulk_item("R&D", title="R&D <центр>", summary="Исследования & разработки")
+    missing = get_bulk_item("<b>", error="статья не найдена")
+
+    assert found == "✅ <b>R&amp;D &lt;центр&gt;</b>\nИсследования &amp; разработки"
+    assert missing == "❌ <code>&lt;b&gt;</code> — статья не найдена"
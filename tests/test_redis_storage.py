@@ -0,0 +1,154 @@
+"""
+Общее хранилище FSM в Redis, блокировка событий и отмена поисков между процессами
+"""
+import asyncio
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.redis import RedisEventIsolation
+from aiogram.types import Chat, Message, Update, User
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from middlewares.event_isolation import EventIsolationMiddleware  # noqa: E402
+from services.searches import SearchRegistry  # noqa: E402
+from storage.redis_storage import RedisFSMStorage  # noqa: E402
+from utils.states import SearchStates  # noqa: E402
+
+KEY = StorageKey(bot_id=1, chat_id=42, user_id=42)
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def _redis(server):
+    return fakeredis.aioredis.FakeRedis(server=server)
+
+
+def test_state_and_data_round_trip(run, server):
+    async def scenario():
+        storage = RedisFSMStorage(_redis(server), state_ttl=60, data_ttl=120)
+        await storage.set_state(KEY, SearchStates.waiting_for_term)
+        await storage.set_data(KEY, {"page": 1})
+        updated = await storage.update_data(KEY, {"term": "Химия"})
+
+        result = (
+            await storage.get_state(KEY),
+            await storage.get_data(KEY),
+            updated,
+            await storage.redis.ttl(storage.key_builder.build(KEY, "state")),
+            await storage.redis.ttl(storage.key_builder.build(KEY, "data")),
+        )
+        await storage.set_state(KEY, None)
+        await storage.set_data(KEY, {})
+        cleared = (await storage.get_state(KEY), await storage.get_data(KEY))
+        await storage.close()
+        return result, cleared
+
+    (state, data, updated, state_ttl, data_ttl), cleared = run(scenario())
+    assert state == SearchStates.waiting_for_term.state
+    assert data == updated == {"page": 1, "term": "Химия"}
+    assert 0 < state_ttl <= 60 and 60 < data_ttl <= 120
+    assert cleared == (None, {})
+
+
+def test_state_is_shared_between_processes(run, server):
+    async def scenario():
+        first, second = RedisFSMStorage(_redis(server)), RedisFSMStorage(_redis(server))
+        await first.set_state(KEY, SearchStates.waiting_for_term)
+        await asyncio.gather(*(
+            storage.update_data(KEY, {f"field{i}": i})
+            for i, storage in enumerate([first, second] * 5)
+        ))
+        return await second.get_state(KEY), await second.get_data(KEY)
+
+    state, data = run(scenario())
+    assert state == SearchStates.waiting_for_term.state
+    # Параллельные изменения не теряются
+    assert data == {f"field{i}": i for i in range(10)}
+
+
+def _update(text: str) -> Update:
+    return Update(update_id=1, message=Message(
+        message_id=1, date=0, chat=Chat(id=42, type="private"),
+        from_user=User(id=42, is_bot=False, first_name="Test"), text=text
+    ))
+
+
+class _Context:
+    """FSMContext поверх хранилища (как его создает диспетчер)"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.key = KEY
+
+    async def get_state(self):
+        return await self.storage.get_state(self.key)
+
+
+def test_cancel_word_bypasses_event_isolation(run, server):
+    async def scenario():
+        storage = RedisFSMStorage(_redis(server))
+        middleware = EventIsolationMiddleware(RedisEventIsolation(_redis(server)))
+        search_started, release_search = asyncio.Event(), asyncio.Event()
+        handled = []
+
+        async def handler(event, data):
+            handled.append(event.message.text)
+            if event.message.text == "/random":
+                search_started.set()
+                await release_search.wait()
+
+        def data(state=None):
+            return {"state": _Context(storage), "raw_state": state}
+
+        search = asyncio.create_task(middleware(handler, _update("/random"), data()))
+        await search_started.wait()
+
+        # Отмена и новый термин проходят, пока поиск держит блокировку
+        await asyncio.wait_for(middleware(handler, _update("отмена"), data()), timeout=2)
+        waiting_for_term = SearchStates.waiting_for_term.state
+        await asyncio.wait_for(middleware(handler, _update("Физика"), data(waiting_for_term)), timeout=2)
+
+        # Остальные события ждут
+        other = asyncio.create_task(middleware(handler, _update("Химия"), data()))
+        await asyncio.sleep(0.05)
+        waited = not other.done()
+        release_search.set()
+        await asyncio.wait_for(asyncio.gather(search, other), timeout=2)
+        return handled, waited
+
+    handled, waited = run(scenario())
+    assert handled == ["/random", "отмена", "Физика", "Химия"]
+    assert waited
+
+
+def test_cancel_reaches_search_in_another_process(run, server):
+    async def scenario():
+        here, there = SearchRegistry(), SearchRegistry()
+        await here.connect(_redis(server))
+        await there.connect(_redis(server))
+        try:
+            remote = await there.start(42, lambda: asyncio.sleep(30))
+            await asyncio.sleep(0.05)
+
+            cancelled_here = await here.cancel(42)
+            await asyncio.wait({remote}, timeout=2)
+            first = (cancelled_here, remote.cancelled(), there.superseded(remote))
+
+            # Новый поиск в одном процессе заменяет поиск пользователя в другом
+            remote = await there.start(42, lambda: asyncio.sleep(30))
+            await asyncio.sleep(0.05)
+            local = await here.start(42, lambda: asyncio.sleep(0, "ok"))
+            await asyncio.wait({remote}, timeout=2)
+            second = (remote.cancelled(), await local)
+        finally:
+            await here.disconnect()
+            await there.disconnect()
+        return first, second
+
+    first, second = run(scenario())
+    assert first == (False, True, True)
+    assert second == (True, "ok")
@@ -0,0 +1,129 @@
+"""
+Множество зарегистрированных пользователей и его доли в процессах-обработчиках
+"""
+from types import SimpleNamespace
+
+from middlewares import registration_gate
+from middlewares.registration_gate import RegistrationGateMiddleware
+from services.metrics import metrics
+from services.registered import RegisteredUsers
+from supervisor import DISCARD_REGISTERED, Supervisor
+
+
+async def _register(db, *telegram_ids: int) -> None:
+    for telegram_id in telegram_ids:
+        await db.get_or_create_user(telegram_id, first_name="Test")
+        await db.update_user_profile(telegram_id, email=f"{telegram_id}@example.com")
+
+
+def test_changes_before_and_after_load(run, database):
+    run(_register(database, 1, 2, 3))
+    users = RegisteredUsers(compact_min=2)
+
+    # До загрузки известны только изменения
+    users.add(10)
+    users.discard(2)
+    assert users.contains(1) is None
+    assert users.contains(10) is True and users.contains(2) is False
+
+    run(users.load())
+    assert [users.contains(telegram_id) for telegram_id in (1, 2, 3, 10, 99)] == [True, False, True, True, False]
+    # Изменения, накопленные до загрузки, влиты в массив
+    assert list(users._ids) == [1, 3, 10]
+    assert not users._added and not users._removed
+
+    users.add(5)
+    users.add(7)
+    users.discard(1)
+    assert list(users._ids) == [1, 3, 5, 7, 10] and users._removed == {1}
+    assert [users.contains(telegram_id) for telegram_id in (1, 3, 5, 7, 10)] == [False, True, True, True, True]
+    assert len(users) == 4
+
+
+def test_shard_loads_only_own_users(run, database):
+    run(_register(database, *range(1, 11)))
+    users = RegisteredUsers()
+    users.shard = (1, 3)
+
+    run(users.load())
+    assert list(users._ids) == [1, 4, 7, 10]
+
+
+def test_discard_is_forwarded_but_forget_is_local():
+    users = RegisteredUsers()
+    forwarded = []
+    users.on_discard = forwarded.append
+
+    users.forget(5)
+    users.discard(6)
+    assert forwarded == [6]
+    assert users.contains(5) is False and users.contains(6) is False
+
+
+class _Conn:
+    def __init__(self, messages=()):
+        self.messages = list(messages)
+        self.sent = []
+
+    def poll(self):
+        return bool(self.messages)
+
+    def recv(self):
+        return self.messages.pop(0)
+
+    def send_bytes(self, data):
+        self.sent.append(data)
+
+
+class _Handle:
+    def __init__(self, index, conn):
+        self.index = index
+        self.conn = conn
+
+
+def test_supervisor_forwards_discard_to_owning_worker():
+    supervisor = Supervisor(workers=3)
+    supervisor._handles = [_Handle(index, _Conn()) for index in range(3)]
+    admin = _Handle(0, _Conn([(DISCARD_REGISTERED, 701)]))
+
+    supervisor._receive_reports(admin)
+    assert [handle.conn.sent for handle in supervisor._handles] == [[], [], [DISCARD_REGISTERED + b"701"]]
+
+
+class _Message:
+    def __init__(self):
+        self.answers = []
+
+    async def answer(self, text, **kwargs):
+        self.answers.append(text)
+
+
+def test_gate_checks_database_until_set_is_loaded(run, database, monkeypatch):
+    run(_register(database, 1))
+    run(database.get_or_create_user(2, first_name="Test"))
+    users = RegisteredUsers()
+    monkeypatch.setattr(registration_gate, "registered_users", users)
+    gate = RegistrationGateMiddleware()
+    handled = []
+
+    async def handler(event, data):
+        handled.append(data["event_from_user"].id)
+
+    def call(telegram_id):
+        message = _Message()
+        data = {
+            "handler": SimpleNamespace(flags={"registration_required": True}),
+            "event_from_user": SimpleNamespace(id=telegram_id),
+        }
+        run(gate(handler, message, data))
+        return message.answers
+
+    fallbacks = metrics.get("registration_gate_db_fallback")
+    # Множество еще не загружено: ответ дает БД
+    assert call(1) == [] and call(2) != []
+    assert metrics.get("registration_gate_db_fallback") - fallbacks == 2
+
+    run(users.load())
+    assert call(1) == [] and call(2) != []
+    assert metrics.get("registration_gate_db_fallback") - fallbacks == 2
+    assert handled == [1, 1]
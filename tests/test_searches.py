@@ -0,0 +1,83 @@
+"""
+Реестр поисков: новый поиск и отмена прерывают текущий поиск пользователя
+"""
+import asyncio
+
+from services.searches import SearchRegistry, interrupts_search
+from utils.states import SearchStates
+
+
+def test_new_search_supersedes_previous_after_it_finishes(run):
+    registry = SearchRegistry()
+    events = []
+
+    async def slow_search():
+        try:
+            await asyncio.sleep(30)
+        finally:
+            # Очистка прерванного поиска (например, правка сообщения)
+            await asyncio.sleep(0.01)
+            events.append("предыдущий завершен")
+
+    async def new_search():
+        events.append("новый начат")
+        return "статья"
+
+    async def scenario():
+        previous = await registry.start(1, slow_search)
+        await asyncio.sleep(0)
+        current = await registry.start(1, new_search)
+        return previous, current, await current
+
+    previous, current, result = run(scenario())
+    assert events == ["предыдущий завершен", "новый начат"]
+    assert previous.cancelled() and registry.superseded(previous)
+    assert result == "статья" and not registry.superseded(current)
+
+
+def test_finish_keeps_newer_search(run):
+    registry = SearchRegistry()
+
+    async def scenario():
+        first = await registry.start(1, lambda: asyncio.sleep(30))
+        second = await registry.start(1, lambda: asyncio.sleep(30))
+        # Поздний finish прерванного поиска не убирает новый
+        registry.finish(1, first)
+        active = len(registry)
+        registry.finish(1, second)
+        second.cancel()
+        await asyncio.gather(second, return_exceptions=True)
+        return active
+
+    assert run(scenario()) == 1
+    assert len(registry) == 0
+
+
+def test_cancel_only_running_search(run):
+    registry = SearchRegistry()
+
+    async def scenario():
+        task = await registry.start(1, lambda: asyncio.sleep(30))
+        other = await registry.start(2, lambda: asyncio.sleep(30))
+        await asyncio.sleep(0)
+        cancelled = (await registry.cancel(1), await registry.cancel(1), await registry.cancel(3))
+        await asyncio.gather(task, return_exceptions=True)
+
+        # Отмена снаружи (остановка бота) — не отмена реестром
+        other.cancel()
+        await asyncio.gather(other, return_exceptions=True)
+        return task, other, cancelled
+
+    task, other, cancelled = run(scenario())
+    assert cancelled == (True, False, False)
+    assert task.cancelled() and registry.superseded(task)
+    assert other.cancelled() and not registry.superseded(other)
+
+
+def test_interrupts_search():
+    waiting = SearchStates.waiting_for_term.state
+    assert interrupts_search("Отмена", None)
+    assert interrupts_search("Химия", waiting)
+    assert not interrupts_search("Химия", None)
+    assert not interrupts_search("/random", waiting)
+    assert not interrupts_search(None, waiting)
@@ -0,0 +1,76 @@
+"""
+Плавное выключение: доработка принятых обновлений не дольше срока
+"""
+import asyncio
+
+from services.shutdown import InFlightTracker
+
+
+def _handler(tracker: InFlightTracker, delay: float, finished: list, name: str):
+    """Обработка обновления: задача отмечает себя, как это делает InFlightMiddleware"""
+    async def handle():
+        tracker.track(asyncio.current_task())
+        await asyncio.sleep(delay)
+        finished.append(name)
+    return handle()
+
+
+def test_drain_waits_for_accepted_updates(run):
+    tracker = InFlightTracker()
+    finished = []
+
+    async def scenario():
+        # Задачи созданы перед остановкой приема, но еще не начались
+        for i in range(3):
+            asyncio.create_task(_handler(tracker, 0.01 * i, finished, f"обновление {i}"))
+        return await tracker.drain(timeout=1)
+
+    assert run(scenario()) == (3, 0)
+    assert sorted(finished) == ["обновление 0", "обновление 1", "обновление 2"]
+    assert len(tracker) == 0
+
+
+def test_drain_waits_for_updates_started_while_draining(run):
+    tracker = InFlightTracker()
+    finished = []
+
+    async def first():
+        tracker.track(asyncio.current_task())
+        await asyncio.sleep(0.01)
+        # Обработчик запустил еще одну отмеченную задачу
+        asyncio.create_task(_handler(tracker, 0.02, finished, "второе"))
+        finished.append("первое")
+
+    async def scenario():
+        asyncio.create_task(first())
+        return await tracker.drain(timeout=1)
+
+    assert run(scenario()) == (2, 0)
+    assert finished == ["первое", "второе"]
+
+
+def test_drain_cancels_updates_after_timeout(run):
+    tracker = InFlightTracker()
+    finished = []
+
+    async def scenario():
+        fast = asyncio.create_task(_handler(tracker, 0.01, finished, "быстрое"))
+        slow = asyncio.create_task(_handler(tracker, 30, finished, "медленное"))
+        result = await tracker.drain(timeout=0.1)
+        return result, fast, slow
+
+    (drained, dropped), fast, slow = run(scenario())
+    assert (drained, dropped) == (1, 1)
+    assert finished == ["быстрое"]
+    assert slow.cancelled() and not fast.cancelled()
+
+
+def test_drain_from_tracked_task_does_not_wait_for_itself(run):
+    tracker = InFlightTracker()
+
+    async def shutdown_from_handler():
+        # Выключение, запущенное из обработки обновления (например, командой)
+        tracker.track(asyncio.current_task())
+        return await tracker.drain(timeout=1)
+
+    assert run(asyncio.wait_for(shutdown_from_handler(), timeout=2)) == (0, 0)
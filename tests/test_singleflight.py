@@ -0,0 +1,96 @@
+"""
+Объединение одновременных одинаковых запросов
+"""
+import asyncio
+
+import pytest
+
+from services.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution(run):
+    flights = SingleFlight("test")
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "статья"
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("ключ", factory) for _ in range(5)))
+
+    assert run(scenario()) == ["статья"] * 5
+    assert len(calls) == 1
+    assert len(flights) == 0
+
+
+def test_different_keys_run_separately(run):
+    flights = SingleFlight("test")
+
+    async def scenario():
+        return await asyncio.gather(
+            flights.do("a", lambda: asyncio.sleep(0, result="a")),
+            flights.do("b", lambda: asyncio.sleep(0, result="b")),
+        )
+
+    assert run(scenario()) == ["a", "b"]
+
+
+def test_error_reaches_every_waiter(run):
+    flights = SingleFlight("test")
+
+    async def factory():
+        await asyncio.sleep(0.01)
+        raise ValueError("сбой")
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do("ключ", factory) for _ in range(3)), return_exceptions=True)
+
+    results = run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_shared_call_survives_one_cancelled_waiter(run):
+    flights = SingleFlight("test")
+
+    async def factory():
+        await asyncio.sleep(0.05)
+        return "готово"
+
+    async def scenario():
+        first = asyncio.ensure_future(flights.do("ключ", factory))
+        second = asyncio.ensure_future(flights.do("ключ", factory))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert run(scenario()) == "готово"
+
+
+def test_call_is_cancelled_when_all_waiters_leave(run):
+    flights = SingleFlight("test")
+    started = asyncio.Event()
+    cancelled = []
+
+    async def factory():
+        started.set()
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def scenario():
+        waiter = asyncio.ensure_future(flights.do("ключ", factory))
+        await started.wait()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+
+    run(scenario())
+    assert cancelled == [True]
+    assert len(flights) == 0
@@ -0,0 +1,89 @@
+"""
+Процесс-обработчик: порядок обновлений одного пользователя и отмена поиска
+"""
+import asyncio
+
+from aiogram.methods import SendMessage
+
+import app
+from conftest import make_update
+from services.searches import search_registry
+from services.lookup import wiki
+from supervisor import UpdateWorker, shard_for, update_user_id
+from utils.states import SearchStates
+
+USER_ID = 701
+
+
+def test_update_user_id_and_shard():
+    update = make_update(1, USER_ID, "/start")
+    assert update_user_id(update) == USER_ID
+    assert shard_for(update, 4) == USER_ID % 4
+    assert update_user_id({"update_id": 2}) == 0
+
+
+async def _registered_user(db) -> None:
+    await db.get_or_create_user(USER_ID, first_name="Test")
+    await db.update_user_profile(USER_ID, email="test@example.com", age=30)
+
+
+def test_cancel_word_does_not_wait_for_running_search(run, database, dispatcher, session, monkeypatch):
+    started = asyncio.Event()
+    cancelled = []
+
+    async def slow_lookup(term, lang=None):
+        started.set()
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.append(term)
+            raise
+
+    monkeypatch.setattr(wiki, "lookup_with_fallback", slow_lookup)
+
+    async def scenario():
+        await _registered_user(database)
+        bot = app.create_bot(session=session)
+        worker = UpdateWorker(bot, dispatcher, {"dispatcher": dispatcher, "bots": [bot], **dispatcher.workflow_data})
+        await dispatcher.fsm.get_context(bot=bot, chat_id=USER_ID, user_id=USER_ID).set_state(
+            SearchStates.waiting_for_term
+        )
+
+        worker.feed(make_update(1, USER_ID, "Химия"))
+        await asyncio.wait_for(started.wait(), timeout=5)
+
+        # Отмена обрабатывается, пока поиск еще идет, и прерывает его
+        worker.feed(make_update(2, USER_ID, "отмена"))
+        await asyncio.wait_for(asyncio.gather(*worker._tasks), timeout=5)
+        return worker
+
+    worker = run(scenario())
+    assert cancelled == ["Химия"]
+    assert worker.processed == 2 and worker.errors == 0
+    assert len(search_registry) == 0
+    sent = [request.text for request in session.requests if isinstance(request, SendMessage)]
+    assert any("отмен" in text.lower() for text in sent)
+
+
+def test_updates_of_one_user_stay_ordered(run, database, dispatcher, session):
+    async def scenario():
+        bot = app.create_bot(session=session)
+        worker = UpdateWorker(bot, dispatcher, {"dispatcher": dispatcher, "bots": [bot], **dispatcher.workflow_data})
+        order = []
+        original = worker.dp.feed_raw_update
+
+        async def recording_feed(bot, update, **kwargs):
+            await asyncio.sleep(0.05 if update["update_id"] == 1 else 0)
+            order.append(update["update_id"])
+            return await original(bot, update, **kwargs)
+
+        worker.dp.feed_raw_update = recording_feed
+        try:
+            worker.feed(make_update(1, USER_ID + 1, "/help"))
+            worker.feed(make_update(2, USER_ID + 1, "/start"))
+            await asyncio.wait_for(asyncio.gather(*worker._tasks), timeout=5)
+        finally:
+            del worker.dp.feed_raw_update
+        return order
+
+    assert run(scenario()) == [1, 2]
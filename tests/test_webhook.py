@@ -0,0 +1,79 @@
+"""
+Режим webhook: синтетические обновления через aiohttp-приложение бота
+"""
+import asyncio
+
+from aiogram.methods import SendMessage
+from aiohttp.test_utils import TestClient, TestServer
+
+import app
+from config import config
+from conftest import make_update
+
+
+async def _sent_messages(session, count: int, timeout: float = 5.0) -> list:
+    """Дождаться count отправленных сообщений (обновления обрабатываются в фоне)"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        sent = [request for request in session.requests if isinstance(request, SendMessage)]
+        if len(sent) >= count:
+            return sent
+        await asyncio.sleep(0.01)
+    return [request for request in session.requests if isinstance(request, SendMessage)]
+
+
+def test_webhook_update_is_acknowledged_and_handled(run, database, dispatcher, session):
+    async def scenario():
+        bot = app.create_bot(session=session)
+        client = TestClient(TestServer(app.create_webhook_app(bot, dispatcher)))
+        await client.start_server()
+        try:
+            response = await client.post(config.WEBHOOK_PATH, json=make_update(1, 501, "/help"))
+            assert response.status == 200
+            return await _sent_messages(session, 1)
+        finally:
+            await client.close()
+
+    sent = run(scenario())
+    assert len(sent) == 1
+    assert sent[0].chat_id == 501
+    # Пользователь не зарегистрирован — отвечает проверка регистрации
+    assert "регистрац" in sent[0].text
+
+
+def test_webhook_rejects_wrong_secret(run, database, dispatcher, session, monkeypatch):
+    monkeypatch.setattr(config, "WEBHOOK_SECRET", "s3cret")
+
+    async def scenario():
+        bot = app.create_bot(session=session)
+        client = TestClient(TestServer(app.create_webhook_app(bot, dispatcher)))
+        await client.start_server()
+        try:
+            update = make_update(2, 502, "/help")
+            wrong = await client.post(config.WEBHOOK_PATH, json=update,
+                                      headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"})
+            right = await client.post(config.WEBHOOK_PATH, json=make_update(3, 502, "/help"),
+                                      headers={"X-Telegram-Bot-Api-Secret-Token": "s3cret"})
+            return wrong.status, right.status, await _sent_messages(session, 1)
+        finally:
+            await client.close()
+
+    wrong, right, sent = run(scenario())
+    assert wrong == 401
+    assert right == 200
+    assert len(sent) == 1
+
+
+def test_health_endpoint(run, database, dispatcher, session):
+    async def scenario():
+        bot = app.create_bot(session=session)
+        client = TestClient(TestServer(app.create_webhook_app(bot, dispatcher)))
+        await client.start_server()
+        try:
+            response = await client.get("/health")
+            return response.status, await response.text()
+        finally:
+            await client.close()
+
+    assert run(scenario()) == (200, "ok")
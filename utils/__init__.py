@@ -18,16 +18,31 @@ from .message_templates import (
     get_search_prompt,
     get_search_started,
     get_search_result,
+    get_inline_result_text,
+    get_reader_page,
+    get_bulk_started,
+    get_bulk_item,
+    get_bulk_page,
     get_search_not_found,
     get_search_error,
+    get_search_busy_message,
+    get_search_unavailable_message,
+    get_stale_result_notice,
+    get_fallback_language_notice,
     get_disambiguation_message,
+    get_choice_expired_message,
     get_about_message,
     get_contacts_message,
     get_faq_message,
     get_settings_message,
     get_settings_option_message,
+    get_language_name,
+    get_language_settings_message,
+    get_registration_required_message,
     get_cancel_search_message,
     get_empty_term_message,
+    get_broadcast_preview,
+    get_broadcast_progress,
 )
 
 # Состояния FSM
@@ -40,6 +55,9 @@ from .user_helpers import (
     validate_age,
     format_search_history_item,
     format_bot_stats,
+    format_lookup_stats,
+    format_fsm_stats,
+    format_outbound_stats,
     parse_datetime,
     format_users_list_for_admin,
     format_datetime
@@ -63,16 +81,31 @@ __all__ = [
     'get_search_prompt',
     'get_search_started',
     'get_search_result',
+    'get_inline_result_text',
+    'get_reader_page',
+    'get_bulk_started',
+    'get_bulk_item',
+    'get_bulk_page',
     'get_search_not_found',
     'get_search_error',
+    'get_search_busy_message',
+    'get_search_unavailable_message',
+    'get_stale_result_notice',
+    'get_fallback_language_notice',
     'get_disambiguation_message',
+    'get_choice_expired_message',
     'get_about_message',
     'get_contacts_message',
     'get_faq_message',
     'get_settings_message',
     'get_settings_option_message',
+    'get_language_name',
+    'get_language_settings_message',
+    'get_registration_required_message',
     'get_cancel_search_message',
     'get_empty_term_message',
+    'get_broadcast_preview',
+    'get_broadcast_progress',
 
     # Состояния
     'RegistrationStates',
@@ -90,6 +123,9 @@ __all__ = [
     'validate_age',
     'format_search_history_item',
     'format_bot_stats',
+    'format_lookup_stats',
+    'format_fsm_stats',
+    'format_outbound_stats',
     'parse_datetime',
     'format_users_list_for_admin',
     'format_datetime'
@@ -98,6 +98,71 @@ def get_search_result(title: str, summary: str) -> str:
     return f"{bold(f'📚 {safe_title}')}\n\n{safe_summary}"
 
 
+def get_bulk_started(count: int) -> str:
+    """Сообщение о начале поиска нескольких терминов"""
+    return f"{bold(f'🔎 Ищу статьи для {count} терминов...')}\n{italic('Это займет несколько секунд.')}"
+
+
+def get_bulk_item(term: str, title: str = None, summary: str = None, error: str = None) -> str:
+    """
+    Результат по одному термину при поиске нескольких терминов
+
+    Args:
+        term: Исходный термин
+        title: Заголовок найденной статьи
+        summary: Краткое описание (обрезается до первых 200 символов)
+        error: Причина, по которой статья не найдена
+    """
+    if title is None:
+        return f"❌ {code(term)} — {error or 'статья не найдена'}"
+
+    short = summary[:200].rsplit(" ", 1)[0] + "..." if len(summary) > 200 else summary
+    return f"✅ {bold(title)}\n{safe_html(short)}"
+
+
+def get_bulk_page(items: list, found: int, total: int, page: int, pages: int) -> str:
+    """
+    Страница сводного ответа по нескольким терминам
+
+    Args:
+        items: Отформатированные результаты (get_bulk_item)
+        found: Сколько статей найдено
+        total: Сколько терминов искали
+        page: Номер страницы (с нуля)
+        pages: Всего страниц
+    """
+    header = f"{bold(f'📚 Найдено статей: {found} из {total}')}"
+    if pages > 1:
+        header += f" {italic(f'({page + 1}/{pages})')}"
+    return header + "\n\n" + "\n\n".join(items)
+
+
+def get_reader_page(title: str, text: str, page: int, total: int) -> str:
+    """
+    Страница полного текста статьи
+
+    Args:
+        title: Заголовок статьи
+        text: Текст страницы (уже разбит с учетом лимита Telegram)
+        page: Номер страницы (с нуля)
+        total: Всего страниц
+    """
+    return f"{bold(f'📄 {title}')} {italic(f'({page + 1}/{total})')}\n\n{safe_html(text)}"
+
+
+def get_inline_result_text(title: str, summary: str, url: str) -> str:
+    """
+    Текст сообщения, отправляемого из инлайн-режима
+
+    Args:
+        title: Заголовок статьи
+        summary: Краткое описание (может быть пустым, если статьи нет в кэше)
+        url: Ссылка на статью
+    """
+    text = get_search_result(title, summary) if summary else bold(f"📚 {title}")
+    return f"{text}\n\n{link('📖 Читать в Википедии', url)}"
+
+
 def get_search_not_found(term: str) -> str:
     """
     Сообщение, если термин не найден
@@ -129,6 +194,32 @@ def get_search_error(term: str, error: str) -> str:
     )
 
 
+def get_search_busy_message() -> str:
+    """Сообщение о перегрузке сервиса поиска"""
+    return (
+        f"⏳ {bold('Сервис поиска сейчас перегружен.')}\n\n"
+        f"Пожалуйста, повторите запрос через несколько секунд."
+    )
+
+
+def get_search_unavailable_message() -> str:
+    """Сообщение о недоступности Википедии"""
+    return (
+        f"⚠️ {bold('Википедия временно недоступна.')}\n\n"
+        f"Попробуйте повторить поиск чуть позже."
+    )
+
+
+def get_stale_result_notice() -> str:
+    """Пометка для результата, взятого из устаревшего кэша"""
+    return f"\n\n{italic('⚠️ Википедия сейчас недоступна, показана сохраненная версия статьи.')}"
+
+
+def get_fallback_language_notice(language: str) -> str:
+    """Пометка для статьи, найденной в разделе на другом языке"""
+    return f"\n\n{italic(f'🌍 Статья найдена в разделе на другом языке: {language}')}"
+
+
 def get_disambiguation_message(term: str, options: list) -> str:
     """
     Сообщение о неоднозначности поиска
@@ -143,10 +234,15 @@ def get_disambiguation_message(term: str, options: list) -> str:
     return (
         f"{bold(f'🔍 Найдено несколько вариантов для {code(safe_term)}:')}\n\n"
         f"{options_text}\n\n"
-        f"{italic('Пожалуйста, уточните ваш запрос.')}"
+        f"{italic('Выберите вариант кнопкой ниже или уточните запрос.')}"
     )
 
 
+def get_choice_expired_message() -> str:
+    """Сообщение об устаревших вариантах неоднозначного термина"""
+    return "Варианты устарели, повторите поиск"
+
+
 def get_about_message() -> str:
     """Информация о боте"""
     return (
@@ -211,14 +307,6 @@ def get_settings_option_message(option: str) -> str:
             f"• Частоту оповещений\n"
             f"• Типы уведомлений"
         ),
-        'language': (
-            f"{bold('🌍 Выбор языка')}\n\n"
-            f"Доступные языки:\n"
-            f"• Русский\n"
-            f"• Английский\n"
-            f"• Испанский\n"
-            f"• Немецкий"
-        ),
         'theme': (
             f"{bold('🎨 Выбор темы')}\n\n"
             f"Доступные темы:\n"
@@ -230,6 +318,42 @@ def get_settings_option_message(option: str) -> str:
     return text_map.get(option, f"{bold('Настройка')}\n\nОпция настройки.")
 
 
+# Названия языковых разделов Википедии
+LANGUAGE_NAMES = {
+    'ru': "🇷🇺 Русский",
+    'en': "🇬🇧 Английский",
+    'es': "🇪🇸 Испанский",
+    'de': "🇩🇪 Немецкий",
+}
+
+
+def get_language_name(lang: str) -> str:
+    """Название языка по коду (неизвестный код возвращается как есть)"""
+    return LANGUAGE_NAMES.get(lang, lang)
+
+
+def get_language_settings_message(current: str) -> str:
+    """
+    Текст для выбора языка поиска
+
+    Args:
+        current: Код текущего языка пользователя
+    """
+    return (
+        f"{bold('🌍 Выбор языка')}\n\n"
+        f"Статьи ищутся в разделе Википедии на выбранном языке.\n\n"
+        f"Текущий язык: {bold(get_language_name(current))}"
+    )
+
+
+def get_registration_required_message() -> str:
+    """Сообщение для незарегистрированного пользователя"""
+    return (
+        f"⚠️ {bold('Сначала нужно завершить регистрацию!')}\n\n"
+        f"Используйте команду /start для регистрации."
+    )
+
+
 def get_cancel_search_message() -> str:
     """Сообщение об отмене поиска"""
     return f"{bold('🔍 Поиск отменен.')}\nВозвращаю в главное меню."
@@ -237,4 +361,35 @@ def get_cancel_search_message() -> str:
 
 def get_empty_term_message() -> str:
     """Сообщение при пустом вводе термина"""
-    return "❌ Пожалуйста, введите термин для поиска."
\ No newline at end of file
+    return "❌ Пожалуйста, введите термин для поиска."
+
+
+def get_broadcast_preview(text: str, recipients: int) -> str:
+    """
+    Предпросмотр рассылки перед подтверждением
+
+    Args:
+        text: Текст рассылки (HTML)
+        recipients: Число получателей
+    """
+    return (
+        f"{bold('📣 Рассылка')}\n\n"
+        f"{text}\n\n"
+        f"{italic(f'Получателей: {recipients}. Отправить?')}"
+    )
+
+
+def get_broadcast_progress(broadcast) -> str:
+    """Ход рассылки: доставлено, заблокировали бота, ошибки"""
+    statuses = {
+        'draft': '📝 черновик',
+        'running': '⏳ идет',
+        'done': '✅ завершена',
+        'cancelled': '⏹ остановлена',
+    }
+    return (
+        f"{bold(f'📣 Рассылка #{broadcast.id}')}: {statuses.get(broadcast.status, broadcast.status)}\n\n"
+        f"• Доставлено: {broadcast.delivered}\n"
+        f"• Заблокировали бота: {broadcast.blocked}\n"
+        f"• Ошибок: {broadcast.failed}"
+    )
@@ -112,6 +112,94 @@ def format_bot_stats(stats) -> str:
 
     return "\n".join(result)
 
+def format_lookup_stats(lookup_stats: dict) -> str:
+    """Форматирование состояния запросов к Википедии"""
+    from .html_formatter import bold
+
+    result = []
+    result.append(f"{bold('🌐 Запросы к Википедии:')}")
+    result.append(f"• Потоков: {lookup_stats.get('workers', 0)}")
+    result.append(f"• Выполняется: {lookup_stats.get('in_flight', 0)}")
+    result.append(f"• В очереди: {lookup_stats.get('queued', 0)}")
+    result.append(f"• Отклонено: {lookup_stats.get('rejected', 0)}")
+
+    breaker_states = {
+        'closed': '🟢 замкнут',
+        'half_open': '🟡 пробный запрос',
+        'open': '🔴 разомкнут',
+    }
+    if 'breaker' in lookup_stats:
+        result.append(f"• Выключатель: {breaker_states.get(lookup_stats['breaker'], lookup_stats['breaker'])}")
+    if 'cache_size' in lookup_stats:
+        result.append(f"• Статей в кэше: {lookup_stats['cache_size']}")
+        result.append(f"• Выдано устаревших: {lookup_stats.get('stale_served', 0)}")
+
+    if 'fuzzy_titles' in lookup_stats:
+        result.append(
+            f"• Исправлено опечаток: {lookup_stats['fuzzy_corrections']} "
+            f"(заголовков в индексе: {lookup_stats['fuzzy_titles']})"
+        )
+
+    if 'offline_hits' in lookup_stats:
+        result.append(f"• Ответов из офлайн-индекса: {lookup_stats['offline_hits']}")
+
+    if 'warmer_last_warmed' in lookup_stats:
+        result.append(
+            f"• Прогрев кэша: {lookup_stats['warmer_last_warmed']} статей "
+            f"за {lookup_stats.get('warmer_last_duration', 0):.1f} с"
+        )
+
+    if 'disambiguation_prefetched' in lookup_stats:
+        result.append(f"• Загружено вариантов заранее: {lookup_stats['disambiguation_prefetched']}")
+
+    if 'prefetch_fetched' in lookup_stats:
+        fetched = lookup_stats['prefetch_fetched']
+        hits = lookup_stats['prefetch_hits']
+        hit_rate = hits / fetched * 100 if fetched else 0
+        result.append(f"• Загружено по ссылкам: {fetched}, пригодилось: {hits} ({hit_rate:.1f}%)")
+
+    if 'fallback_started' in lookup_stats:
+        result.append(
+            f"• Поиск в запасных языках: {lookup_stats['fallback_started']}, "
+            f"найдено там: {lookup_stats['fallback_won']}"
+        )
+
+    for key, label in (('hedge_search', 'поиск'), ('hedge_page', 'статья')):
+        if key in lookup_stats:
+            hedge = lookup_stats[key]
+            result.append(
+                f"• Хеджирование ({label}): {hedge['hedge_rate'] * 100:.1f}% запросов, "
+                f"побед альтернативы {hedge['win_rate'] * 100:.1f}%"
+            )
+
+    return "\n".join(result)
+
+def format_fsm_stats(fsm_stats: dict) -> str:
+    """Форматирование состояния хранилища FSM"""
+    from .html_formatter import bold
+
+    result = []
+    result.append(f"{bold('🗂 Состояния диалогов:')}")
+    result.append(f"• Записей: {fsm_stats['entries']} из {fsm_stats['max_entries']}")
+    result.append(f"• Данные: {fsm_stats['data_bytes'] / 1024:.1f} КБ")
+    result.append(f"• Истекло: {fsm_stats['expired']}, вытеснено: {fsm_stats['evictions']}")
+    return "\n".join(result)
+
+def format_outbound_stats(outbound_stats: dict) -> str:
+    """Форматирование состояния очереди исходящих сообщений"""
+    from .html_formatter import bold
+
+    result = []
+    result.append(f"{bold('📤 Исходящие сообщения:')}")
+    result.append(f"• В очереди: {outbound_stats['queued']}")
+    if outbound_stats['queue_delay_p95'] is not None:
+        result.append(
+            f"• Ожидание: p50 {outbound_stats['queue_delay_p50'] * 1000:.0f} мс, "
+            f"p95 {outbound_stats['queue_delay_p95'] * 1000:.0f} мс"
+        )
+    result.append(f"• Пауз по flood control: {outbound_stats['retry_after']}")
+    return "\n".join(result)
+
 def format_users_list_for_admin(users: list) -> str:
     """Форматирование списка пользователей для администратора"""
     from .html_formatter import bold, code